@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+直接从 zip / tar 归档读取输入：成员内容读入内存后交给 LZ4 解压和 BinaryReader，
+atlas 替换也作用在成员内容上，整个过程不把归档解压到磁盘
+"""
+import os
+import tarfile
+import zipfile
+
+# 归档路径去掉这些后缀作为默认输出目录
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tbz2', '.txz', '.tar', '.zip')
+
+
+def is_archive(path):
+    """路径是否为可识别的 zip / tar 归档文件"""
+    if not os.path.isfile(path):
+        return False
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def default_output_dir(archive_path):
+    """归档的默认输出目录：与归档同名（去掉归档后缀）的目录"""
+    lower = archive_path.lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        if lower.endswith(suffix):
+            return archive_path[:-len(suffix)]
+    return archive_path + '.out'
+
+
+def member_output_path(output_dir, name):
+    """
+    成员在输出目录下对应的路径；成员名含 ..、绝对路径或盘符时抛出 ValueError，
+    防止构造的归档把文件写到输出目录之外
+    """
+    parts = name.replace('\\', '/').split('/')
+    if (name.startswith(('/', '\\')) or '..' in parts or ':' in parts[0]
+            or not any(part not in ('', '.') for part in parts)):
+        raise ValueError(f"不安全的归档成员名: {name}")
+    output_root = os.path.abspath(output_dir)
+    output_path = os.path.abspath(os.path.join(output_root, *[part for part in parts if part not in ('', '.')]))
+    if os.path.commonpath([output_root, output_path]) != output_root or output_path == output_root:
+        raise ValueError(f"不安全的归档成员名: {name}")
+    return os.path.join(output_dir, os.path.relpath(output_path, output_root))
+
+
+class ArchiveInput:
+    """
+    只读打开一个 zip / tar 归档，按成员名（统一为 / 分隔的相对路径）读取内容
+    lz4=True 时 .scsp 成员在读取时于内存中做分块 LZ4 解压
+    """
+    def __init__(self, archive_path, lz4=False):
+        self.archive_path = archive_path
+        self.lz4 = lz4
+        if zipfile.is_zipfile(archive_path):
+            self.zip = zipfile.ZipFile(archive_path)
+            self.tar = None
+            self.members = {info.filename: info for info in self.zip.infolist() if not info.is_dir()}
+        else:
+            self.zip = None
+            self.tar = tarfile.open(archive_path)
+            self.members = {info.name: info for info in self.tar.getmembers() if info.isfile()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        (self.zip or self.tar).close()
+
+    def size(self, name):
+        """成员在归档中记录的（未压缩）大小"""
+        info = self.members[name]
+        return info.file_size if self.zip else info.size
+
+    def find_members(self, extension):
+        """按归档中的顺序返回以 extension 结尾的成员名"""
+        extension = extension.lower()
+        return [name for name in self.members if name.lower().endswith(extension)]
+
+    def read_raw(self, name):
+        if self.zip:
+            return self.zip.read(self.members[name])
+        with self.tar.extractfile(self.members[name]) as f:
+            return f.read()
+
+    def read(self, name):
+        """读取成员内容，必要时在内存中做 LZ4 解压"""
+        data = self.read_raw(name)
+        if self.lz4 and name.lower().endswith('.scsp'):
+            import lz4_processor
+            data = lz4_processor.decompress_bytes(data)
+        return data
+
+    def display_path(self, name):
+        """错误汇总等处显示的成员路径"""
+        return os.path.join(self.archive_path, name)
+
+
+def process_atlas_members(archive_path, output_dir, include=None, exclude=None, shard=None):
+    """
+    对归档中所有 .atlas 成员做 sct -> png 替换，写到输出目录的对应相对路径下
+    :param include: 只处理匹配其中任一模式的成员，见 file_selection
+    :param exclude: 不处理匹配其中任一模式的成员
+    :param shard: (index, count)，只处理按成员名哈希属于该节点分片的成员，见 node_shards
+    :return: 写出的atlas数量
+    """
+    from file_selection import matches
+    from replace_sct_with_png import replace_page_extension
+    with ArchiveInput(archive_path) as archive:
+        atlas_members = [name for name in archive.find_members('.atlas') if matches(name, include, exclude)]
+        if shard is not None:
+            from node_shards import select_shard
+            atlas_members = select_shard(atlas_members, shard, str)
+        if not atlas_members:
+            print(f"在 {archive_path} 中未找到任何.atlas文件")
+            return 0
+        print(f"找到 {len(atlas_members)} 个.atlas文件，开始处理...")
+        processed_count = written_count = 0
+        for name in atlas_members:
+            try:
+                output_path = member_output_path(output_dir, name)
+            except ValueError as e:
+                print(f"跳过: {e}")
+                continue
+            content, changed = replace_page_extension(archive.read_raw(name).decode('utf-8'))
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            written_count += 1
+            if changed:
+                processed_count += 1
+        print(f"处理完成！共处理了 {processed_count} 个文件，输出到 {output_dir}\n")
+        return written_count
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+批量转换进度显示：限频刷新一行进度，包含完成数、文件/秒、MB/秒和按剩余字节估算的 ETA
+"""
+import sys
+import time
+
+MB = 1024 * 1024
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class BatchProgress:
+    def __init__(self, total_files, total_bytes, interval=1.0, stream=None):
+        """
+        :param total_files: 待转换文件总数
+        :param total_bytes: 待转换文件总字节数
+        :param interval: 最短刷新间隔（秒）
+        :param stream: 输出流，默认为 stderr
+        """
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.is_tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.start = time.perf_counter()
+        self.last_print = 0.0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.failed_files = 0
+
+    def update(self, file_bytes, failed=False):
+        """记录一个文件完成，距上次刷新超过 interval 时输出进度"""
+        self.done_files += 1
+        self.done_bytes += file_bytes
+        if failed:
+            self.failed_files += 1
+        now = time.perf_counter()
+        if now - self.last_print >= self.interval or self.done_files == self.total_files:
+            self.last_print = now
+            self.write(self.line(now))
+
+    def line(self, now=None):
+        elapsed = max((now or time.perf_counter()) - self.start, 1e-9)
+        files_rate = self.done_files / elapsed
+        bytes_rate = self.done_bytes / elapsed
+        remaining = self.total_bytes - self.done_bytes
+        eta = format_duration(remaining / bytes_rate) if bytes_rate > 0 else "--:--"
+        failed = f"，失败 {self.failed_files}" if self.failed_files else ""
+        return (f"进度: {self.done_files}/{self.total_files}{failed}"
+                f" | {files_rate:.2f} 文件/s | {bytes_rate / MB:.2f} MB/s"
+                f" | 已用 {format_duration(elapsed)} | 剩余 {eta}")
+
+    def write(self, text):
+        if self.is_tty:
+            self.stream.write('\r' + text + '\x1b[K')
+            if self.done_files == self.total_files:
+                self.stream.write('\n')
+        else:
+            self.stream.write(text + '\n')
+        self.stream.flush()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+把所有转换结果写进一个打包文件，避免在网络文件系统上产生大量小文件：
+  .zip   不压缩存储（需要压缩时配合 --compress 压缩每个成员）
+  .tar   普通 tar
+  其他   索引包：成员数据依次拼接，末尾为 JSON 索引和 12 字节尾部 (索引偏移 uint64, 魔数 SCJB)
+三种格式都带成员索引 {成员名: {"offset": 数据在打包文件中的偏移, "size": 字节数}}，
+zip / tar 中索引为最后一个成员 __index__.json，可直接按偏移读取任意成员
+"""
+import io
+import json
+import struct
+import tarfile
+import time
+import zipfile
+
+MAGIC = b'SCJB'
+# 索引包尾部：索引起始偏移 + 魔数
+FOOTER = struct.Struct('<Q4s')
+INDEX_NAME = '__index__.json'
+
+
+class ZipBundle:
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+        self.index = {}
+
+    def add(self, name, data):
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        self.zip.writestr(info, data)
+        # 本地文件头固定 30 字节 + 文件名 + 扩展字段，之后是未压缩的成员数据
+        offset = info.header_offset + 30 + len(info.filename.encode('utf-8')) + len(info.extra)
+        self.index[name] = {"offset": offset, "size": len(data)}
+
+    def close(self):
+        self.zip.writestr(INDEX_NAME, index_bytes(self.index))
+        self.zip.close()
+
+
+class TarBundle:
+    def __init__(self, path):
+        self.tar = tarfile.open(path, 'w', format=tarfile.PAX_FORMAT)
+        self.index = {}
+
+    def add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+        # addfile 之后 tar.offset 指向补齐到 512 字节的成员数据末尾
+        padded = -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        self.index[name] = {"offset": self.tar.offset - padded, "size": len(data)}
+
+    def close(self):
+        data = index_bytes(self.index)
+        info = tarfile.TarInfo(INDEX_NAME)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+        self.tar.close()
+
+
+class IndexedBundle:
+    def __init__(self, path):
+        self.f = open(path, 'wb')
+        self.index = {}
+
+    def add(self, name, data):
+        self.index[name] = {"offset": self.f.tell(), "size": len(data)}
+        self.f.write(data)
+
+    def close(self):
+        index_offset = self.f.tell()
+        self.f.write(index_bytes(self.index))
+        self.f.write(FOOTER.pack(index_offset, MAGIC))
+        self.f.close()
+
+
+def index_bytes(index):
+    return json.dumps({"version": 1, "members": index}, ensure_ascii=False).encode('utf-8')
+
+
+def open_bundle(path):
+    """按扩展名创建打包写入器：.zip / .tar，其余为索引包"""
+    lower = path.lower()
+    if lower.endswith('.zip'):
+        return ZipBundle(path)
+    if lower.endswith('.tar'):
+        return TarBundle(path)
+    return IndexedBundle(path)
+
+
+def load_index(path):
+    """读取打包文件的成员索引 {成员名: {"offset", "size"}}"""
+    lower = path.lower()
+    if lower.endswith('.zip'):
+        with zipfile.ZipFile(path) as z:
+            return json.loads(z.read(INDEX_NAME))["members"]
+    if lower.endswith('.tar'):
+        with tarfile.open(path) as t:
+            with t.extractfile(INDEX_NAME) as f:
+                return json.loads(f.read())["members"]
+    with open(path, 'rb') as f:
+        f.seek(-FOOTER.size, io.SEEK_END)
+        footer_offset = f.tell()
+        index_offset, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"不是有效的索引包文件: {path}")
+        f.seek(index_offset)
+        return json.loads(f.read(footer_offset - index_offset))["members"]
+
+
+def read_member(path, name, index=None):
+    """按索引中的偏移直接读取一个成员的数据"""
+    entry = (index or load_index(path))[name]
+    with open(path, 'rb') as f:
+        f.seek(entry["offset"])
+        return f.read(entry["size"])
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+选择要处理的输入文件：
+  walk_files    一次 os.scandir 递归遍历目录，边遍历边按扩展名和 include / exclude 过滤，
+                被 exclude 命中的目录整个跳过，不会进入
+  read_file_list 读取调用方给出的文件列表（--from-list），只对列出的文件取大小，完全不遍历目录
+
+include / exclude 为 fnmatch 风格的模式，匹配相对于输入目录、以 / 分隔的路径（* 可以跨越目录），
+如 chars/*、*_old.scsp；设置了 include 时文件至少要匹配其中一个，命中任意 exclude 的文件不处理
+"""
+import fnmatch
+import os
+import sys
+
+
+def matches(rel_path, include=None, exclude=None):
+    """以 / 分隔的相对路径是否通过 include / exclude 过滤"""
+    if include and not any(fnmatch.fnmatch(rel_path, pattern) for pattern in include):
+        return False
+    return not (exclude and any(fnmatch.fnmatch(rel_path, pattern) for pattern in exclude))
+
+
+def excluded_dir(rel_dir, exclude):
+    """目录本身（以 / 结尾的相对路径）命中 exclude 时，其下所有文件都不处理"""
+    return bool(exclude) and any(fnmatch.fnmatch(rel_dir + '/', pattern) for pattern in exclude)
+
+
+def walk_files(directory_path, extension, include=None, exclude=None):
+    """
+    查找目录下所有指定扩展名且通过过滤的文件，包括子目录
+    scandir 的目录项自带类型信息，遍历过程中不需要额外 stat
+    :param extension: 扩展名，或扩展名元组（一次遍历同时选出多种文件）
+    """
+    extension = extension.lower() if isinstance(extension, str) else tuple(e.lower() for e in extension)
+    target_files = []
+    pending = [(directory_path, '')]
+    while pending:
+        path, rel_dir = pending.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError as e:
+            print(f"无法读取目录 {path}: {e}", file=sys.stderr)
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                if not excluded_dir(rel_path, exclude):
+                    subdirs.append((entry.path, rel_path + '/'))
+            elif entry.name.lower().endswith(extension) and matches(rel_path, include, exclude):
+                target_files.append(entry.path)
+        # 逆序入栈，按目录项顺序深度优先
+        pending.extend(reversed(subdirs))
+    return target_files
+
+
+def read_file_list(list_path, directory_path):
+    """
+    读取文件列表：每行一个路径，空行和 # 开头的行忽略，相对路径相对于输入目录
+    :param list_path: 列表文件路径，- 为从 stdin 读取
+    :return: 去重后按列表顺序的路径列表
+    """
+    if list_path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(list_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    files = []
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        path = os.path.normpath(line if os.path.isabs(line) else os.path.join(directory_path, line))
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+    return files
+
+
+def select_listed(files, directory_path, extension, include=None, exclude=None):
+    """从给定的文件列表中选出指定扩展名、通过过滤且存在的文件，不存在的文件给出提示后跳过"""
+    extension = extension.lower()
+    selected = []
+    for path in files:
+        if not path.lower().endswith(extension):
+            continue
+        if not matches(os.path.relpath(path, directory_path).replace(os.sep, '/'), include, exclude):
+            continue
+        if not os.path.isfile(path):
+            print(f"列表中的文件不存在，跳过: {path}", file=sys.stderr)
+            continue
+        selected.append(path)
+    return selected
@@ -1,48 +1,61 @@
 import argparse
+import io
 import struct
 import sys
 import os
 import lz4.block
+from metrics import METRICS
 
 
 
-def process_file(in_path, out_path, endian='<'):
+def decompress_stream(f_in, f_out, endian='<'):
+	"""从 f_in 读取分块压缩流，解压后写入 f_out，返回写入的字节数"""
 	written = 0
-	with open(in_path, 'rb') as f_in, open(out_path, 'wb') as f_out:
-		block_index = 0
-		while True:
-			hdr = f_in.read(8)
-			if not hdr:
-				break
-			if len(hdr) < 8:
-				raise EOFError(f'文件在读取第 {block_index} 个块时遇到不完整的头（长度 {len(hdr)}）')
-
-			decomp_size, comp_len = struct.unpack(endian + 'II', hdr)
-
-			if comp_len == 0:
-				# 空块，写入对应长度的空字节
-				if decomp_size:
-					f_out.write(b'\x00' * decomp_size)
-					written += decomp_size
-				block_index += 1
-				continue
-
-			comp = f_in.read(comp_len)
-			if len(comp) < comp_len:
-				raise EOFError(f'文件在读取第 {block_index} 个块的数据时不完整（期望 {comp_len}，得到 {len(comp)}）')
-
-			data = lz4.block.decompress(comp, uncompressed_size=decomp_size)
-
-			if len(data) != decomp_size:
-				# 仅警告，不立即失败
-				sys.stderr.write(f'警告：第 {block_index} 个块解压后的大小为 {len(data)} ，期望 {decomp_size}\n')
-
-			f_out.write(data)
-			written += len(data)
+	block_index = 0
+	while True:
+		hdr = f_in.read(8)
+		if not hdr:
+			break
+		if len(hdr) < 8:
+			raise EOFError(f'文件在读取第 {block_index} 个块时遇到不完整的头（长度 {len(hdr)}）')
+
+		decomp_size, comp_len = struct.unpack(endian + 'II', hdr)
+
+		if comp_len == 0:
+			# 空块，写入对应长度的空字节
+			if decomp_size:
+				f_out.write(b'\x00' * decomp_size)
+				written += decomp_size
 			block_index += 1
+			continue
+
+		comp = f_in.read(comp_len)
+		if len(comp) < comp_len:
+			raise EOFError(f'文件在读取第 {block_index} 个块的数据时不完整（期望 {comp_len}，得到 {len(comp)}）')
+
+		data = lz4.block.decompress(comp, uncompressed_size=decomp_size)
+
+		if len(data) != decomp_size:
+			# 仅警告，不立即失败
+			sys.stderr.write(f'警告：第 {block_index} 个块解压后的大小为 {len(data)} ，期望 {decomp_size}\n')
+
+		f_out.write(data)
+		written += len(data)
+		block_index += 1
 
 	return written
 
+def process_file(in_path, out_path, endian='<'):
+	with open(in_path, 'rb') as f_in, open(out_path, 'wb') as f_out:
+		return decompress_stream(f_in, f_out, endian)
+
+def decompress_bytes(data, endian='<'):
+	"""在内存中解压一段分块压缩数据（如归档成员、stdin），返回解压后的 bytes"""
+	out = io.BytesIO()
+	with METRICS.time('scsp_stage_duration_seconds', stage='lz4'):
+		decompress_stream(io.BytesIO(data), out, endian)
+	return out.getvalue()
+
 def decompress_single_file(file_path, output_dir=None, endian='<'):
 	"""解压单个文件"""
 	if not os.path.isfile(file_path):
@@ -55,7 +68,8 @@ def decompress_single_file(file_path, output_dir=None, endian='<'):
 		out_path = file_path + '.decompressed'
 
 	try:
-		written = process_file(file_path, out_path, endian=endian)
+		with METRICS.time('scsp_stage_duration_seconds', stage='lz4'):
+			written = process_file(file_path, out_path, endian=endian)
 		print(f'完成，写入 {written} 字节 到: {out_path}\n')
 		return True
 	except Exception as e:
@@ -74,6 +88,10 @@ def process_folder(folder_path, output_dir=None, endian='<'):
 		print(f'在 {folder_path} 及其子目录中没有找到 .scsp 文件')
 		return
 	
+	process_files(scsp_files, output_dir, endian)
+
+def process_files(scsp_files, output_dir=None, endian='<'):
+	"""解压给定的一组.scsp文件（如按 --from-list / --include 选出的文件）"""
 	print(f'找到 {len(scsp_files)} 个 .scsp 文件，开始解压...')
 	
 	for file_path in scsp_files:
@@ -1,26 +1,142 @@
 import argparse
+import contextlib
+import importlib
 import sys
 import os
-import lz4_processor
-import scsp_dec_to_json
-import replace_sct_with_png
+import threading
+import time
 
+START = time.perf_counter()
 
-def main_process(dir_path, skip_atlas=False, lz4=False, extension='scsp'):
+# 各阶段的模块在用到时才导入，numpy / simplejson / lz4 等重模块不拖慢启动
+# (阶段名, 耗时秒数)，--timings 时输出
+TIMINGS = []
+
+
+def load_module(name):
+    """导入阶段模块并记录导入耗时"""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    TIMINGS.append((f"导入 {name}", time.perf_counter() - start))
+    return module
+
+
+def print_timings():
+    print("\n=== 耗时统计 ===", file=sys.stderr)
+    for label, seconds in TIMINGS:
+        print(f"{label}: {seconds * 1000:.1f} ms", file=sys.stderr)
+
+
+def main_process(dir_path, skip_atlas=False, lz4=False, extension='scsp', output_format='json',
+                 compress=None, compress_level=None, precision=None, precision_report=False,
+                 jobs=1, max_memory=None, metrics_path=None, metrics_interval=15.0, bundle_path=None,
+                 backend='process', file_timeout=600.0, read_budget=64.0, curve_mode='fit',
+                 animation_workers=1, pipeline_workers=None, queue_size=None, from_list=None, include=None, exclude=None,
+                 shard=None, shard_balance=False, shard_manifest=None):
     """
     主要处理流程函数
     
     Args:
-        dir_path (str): 处理目录路径
+        dir_path (str): 处理目录路径，也可以是 zip / tar 归档文件（见 archive_process）
         skip_atlas (bool): 是否跳过atlas文件处理，默认为False
         lz4_only (bool): 是否仅处理LZ4解压，默认为False
         extension (str): 要转换的文件扩展名，默认为.scsp
+        output_format (str): 输出格式 json / skel / both / sharded，默认为json
+        compress (str): JSON输出压缩方式 gzip / lz4，默认为不压缩
+        compress_level (int): 压缩等级，默认为压缩方式的默认等级
+        precision (str): 浮点数精度设置，如 position=2,uv=5,curve=4 或 compact，默认为不量化
+        precision_report (bool): 是否输出量化前后的JSON大小对比，默认为False
+        jobs (int): 并行转换的进程数，默认为1
+        max_memory (str): 并行转换的内存预算，如 4G / 512M，默认为不限制
+        metrics_path (str): 指标输出文件 (.prom 为 Prometheus textfile，.json 为 JSON 快照)，默认不输出
+        metrics_interval (float): 转换过程中定期写出指标的间隔秒数，默认为15
+        bundle_path (str): 打包输出文件 (.zip / .tar / 其他为带索引的打包文件)，默认逐个写出文件
+        backend (str): 并行方式 process (进程池) / thread (线程池) / pipeline (分阶段流水线)，默认为process；
+            pipeline 时 atlas 处理与转换同时进行，LZ4 在内存中解压，不再写出 .decompressed 文件
+        file_timeout (float): 单个文件的最长解析秒数，超出的文件记入错误汇总，None 为不限制，默认为600
+        read_budget (float): 单个文件累计读取字节数上限 (文件大小的倍数)，None 为不限制，默认为64
+        curve_mode (str): 贝塞尔曲线输出方式 fit (拟合) / raw (输出采样点) / lazy (序列化时才拟合)，默认为fit
+        animation_workers (int): 单个文件内解码动画的进程数，动画很多的大骨骼文件可设为大于 1，默认为1
+        pipeline_workers (str): pipeline 各阶段线程数，如 read=2,parse=4,write=2，默认 parse 为 jobs
+        queue_size (int): pipeline 各阶段输入队列的容量，默认为4
+        from_list (str): 输入文件列表路径，- 为从 stdin 读取；设置后只处理列出的文件，不遍历目录
+        include (list): 只处理相对路径匹配其中任一 fnmatch 模式的文件
+        exclude (list): 不处理相对路径匹配其中任一 fnmatch 模式的文件，命中的目录整个跳过
+        shard (str): 节点分片 INDEX/COUNT，如 0/4；只处理选出的文件中属于本分片的部分 (见 node_shards)，默认处理全部
+        shard_balance (bool): 按文件大小均衡分片，默认为按相对路径哈希分片
+        shard_manifest (str): 本分片的结果清单路径，默认为输出目录下的 scsp-shard-INDEX-of-COUNT.json
     """
+    if os.path.isfile(dir_path):
+        return archive_process(dir_path, skip_atlas, lz4, extension, output_format,
+                               compress, compress_level, precision, precision_report,
+                               jobs, max_memory, metrics_path, metrics_interval, bundle_path,
+                               file_timeout=file_timeout, read_budget=read_budget, curve_mode=curve_mode,
+                               animation_workers=animation_workers, from_list=from_list,
+                               include=include, exclude=exclude,
+                               shard=shard, shard_balance=shard_balance, shard_manifest=shard_manifest)
+
     print(f"开始处理目录: {dir_path}")
+    run_start = time.perf_counter()
+    pipeline = backend == 'pipeline'
+    node_shards = None
+    if shard is not None:
+        node_shards = load_module('node_shards')
+        shard = node_shards.parse_shard(shard)
+    # 转换时由 batch_convert_decompressed_files 分片；文件已在 LZ4 步骤中分过片时为 None
+    convert_shard = shard
+
+    # 设置了文件列表、过滤条件或节点分片时，atlas / LZ4 / 转换各步骤共用一次选出的文件，不再各自遍历目录
+    files = None
+    if from_list is not None or include or exclude or shard is not None:
+        file_selection = load_module('file_selection')
+        start = time.perf_counter()
+        if from_list is not None:
+            files = file_selection.read_file_list(from_list, dir_path)
+            print(f"文件列表中共 {len(files)} 个路径")
+        else:
+            files = file_selection.walk_files(dir_path, ('.atlas', '.scsp', f".{extension.lstrip('.')}"),
+                                              include, exclude)
+        TIMINGS.append(("选择输入文件", time.perf_counter() - start))
+
+    def select(ext, balance=False):
+        """
+        按文件列表选出指定扩展名的文件，节点分片时只保留本分片的文件
+        未设置文件列表、过滤条件和节点分片时返回 None（由各步骤自行遍历）
+        """
+        if files is None:
+            return None
+        selected = file_selection.select_listed(files, dir_path, ext, include, exclude)
+        if shard is not None:
+            sizes = {path: os.path.getsize(path) for path in selected} if balance else None
+            selected = node_shards.select_shard(selected, shard, lambda path: node_shards.relative_key(path, dir_path),
+                                                sizes)
+        return selected
     
+    atlas_thread = None
+    atlas_errors = []
     if not skip_atlas:
         print("正在处理 Atlas 文件...")
-        replace_sct_with_png.scan_and_process_atlas_files(dir_path)
+        replace_sct_with_png = load_module('replace_sct_with_png')
+        atlas_files = select('.atlas')
+
+        def process_atlas():
+            start = time.perf_counter()
+            replace_sct_with_png.scan_and_process_atlas_files(dir_path, atlas_files)
+            TIMINGS.append(("Atlas 处理", time.perf_counter() - start))
+
+        def process_atlas_in_background():
+            # 后台线程中的异常不会传到主线程，记下来在转换结束后重新抛出
+            try:
+                process_atlas()
+            except Exception as e:
+                atlas_errors.append(e)
+
+        if pipeline:
+            # atlas 替换与转换互不依赖，流水线模式下在后台线程中同时进行
+            atlas_thread = threading.Thread(target=process_atlas_in_background, daemon=True)
+            atlas_thread.start()
+        else:
+            process_atlas()
     else:
         print("跳过 Atlas 文件处理")
         
@@ -30,18 +146,250 @@ def main_process(dir_path, skip_atlas=False, lz4=False, extension='scsp'):
     
     # 执行处理步骤
     
-    if lz4:
+    if lz4 and not pipeline:
         print("正在处理 LZ4 压缩文件...")
-        lz4_processor.process_folder(dir_path)
+        lz4_processor = load_module('lz4_processor')
+        start = time.perf_counter()
+        # 节点分片时只解压本分片的文件，转换时不再重复分片
+        scsp_files = select('.scsp', shard_balance)
+        convert_shard = None
+        if scsp_files is None:
+            lz4_processor.process_folder(dir_path)
+        else:
+            lz4_processor.process_files(scsp_files)
+            # 只转换这次解压出的文件；过滤条件已作用在 .scsp 文件上
+            files = [path + '.decompressed' for path in scsp_files]
+            include = exclude = None
+        TIMINGS.append(("LZ4 解压", time.perf_counter() - start))
         extension = 'decompressed'  # LZ4处理后文件扩展名
 
     
+    scsp_dec_to_json = load_module('scsp_dec_to_json')
+    max_memory_bytes = None
+    if max_memory is not None:
+        memory_scheduler = load_module('memory_scheduler')
+        max_memory_bytes = memory_scheduler.parse_size(max_memory)
+    workers = None
+    if pipeline:
+        workers = load_module('staged_pipeline').parse_workers(pipeline_workers, jobs)
+
     print("正在批量转换解压文件...")
-    scsp_dec_to_json.batch_convert_decompressed_files(dir_path, extension)
+    start = time.perf_counter()
+    records = scsp_dec_to_json.batch_convert_decompressed_files(dir_path, extension, output_format,
+                                                      compress=compress, compress_level=compress_level,
+                                                      precision=scsp_dec_to_json.FloatPrecision.parse(precision),
+                                                      precision_report=precision_report,
+                                                      jobs=jobs, max_memory=max_memory_bytes,
+                                                      metrics_path=metrics_path, metrics_interval=metrics_interval,
+                                                      lz4=lz4 and pipeline, bundle_path=bundle_path, backend=backend,
+                                                      file_timeout=file_timeout, read_budget=read_budget,
+                                                      curve_mode=curve_mode, animation_workers=animation_workers,
+                                                      pipeline_workers=workers,
+                                                      queue_size=queue_size, files=files,
+                                                      include=include, exclude=exclude,
+                                                      shard=convert_shard, shard_balance=shard_balance)
+    TIMINGS.append(("批量转换", time.perf_counter() - start))
+    if atlas_thread is not None:
+        atlas_thread.join()
+        if atlas_errors:
+            raise atlas_errors[0]
+    if shard is not None:
+        node_shards.write_manifest(shard_manifest or node_shards.default_manifest_path(dir_path, shard),
+                                   shard, shard_balance, dir_path, records, time.perf_counter() - run_start)
     
     print("处理完成！")
 
 
+def archive_process(archive_path, skip_atlas, lz4, extension, output_format,
+                    compress, compress_level, precision, precision_report,
+                    jobs, max_memory, metrics_path, metrics_interval, bundle_path=None,
+                    file_timeout=600.0, read_budget=64.0, curve_mode='fit', animation_workers=1,
+                    from_list=None, include=None, exclude=None,
+                    shard=None, shard_balance=False, shard_manifest=None):
+    """
+    输入为 zip / tar 归档时的处理流程：不解压到磁盘，
+    atlas 替换结果和转换结果写到与归档同名的目录中，LZ4 在内存中解压
+    参数含义同 main_process
+    """
+    archive_input = load_module('archive_input')
+    if not archive_input.is_archive(archive_path):
+        raise ValueError(f"不支持的归档文件: {archive_path}")
+    output_dir = archive_input.default_output_dir(archive_path)
+    print(f"开始处理归档: {archive_path}，输出目录: {output_dir}")
+    run_start = time.perf_counter()
+    node_shards = None
+    if shard is not None:
+        node_shards = load_module('node_shards')
+        shard = node_shards.parse_shard(shard)
+
+    if not skip_atlas:
+        print("正在处理 Atlas 文件...")
+        start = time.perf_counter()
+        archive_input.process_atlas_members(archive_path, output_dir, include, exclude, shard)
+        TIMINGS.append(("Atlas 处理", time.perf_counter() - start))
+    else:
+        print("跳过 Atlas 文件处理")
+
+    scsp_dec_to_json = load_module('scsp_dec_to_json')
+    max_memory_bytes = None
+    if max_memory is not None:
+        memory_scheduler = load_module('memory_scheduler')
+        max_memory_bytes = memory_scheduler.parse_size(max_memory)
+
+    print("正在批量转换归档成员...")
+    start = time.perf_counter()
+    records = scsp_dec_to_json.batch_convert_decompressed_files(archive_path, extension, output_format,
+                                                      compress=compress, compress_level=compress_level,
+                                                      precision=scsp_dec_to_json.FloatPrecision.parse(precision),
+                                                      precision_report=precision_report,
+                                                      jobs=jobs, max_memory=max_memory_bytes,
+                                                      metrics_path=metrics_path, metrics_interval=metrics_interval,
+                                                      lz4=lz4, bundle_path=bundle_path,
+                                                      file_timeout=file_timeout, read_budget=read_budget,
+                                                      curve_mode=curve_mode, animation_workers=animation_workers,
+                                                      include=include, exclude=exclude,
+                                                      shard=shard, shard_balance=shard_balance)
+    TIMINGS.append(("批量转换", time.perf_counter() - start))
+    if shard is not None:
+        node_shards.write_manifest(shard_manifest or node_shards.default_manifest_path(output_dir, shard),
+                                   shard, shard_balance, archive_path, records, time.perf_counter() - run_start)
+
+    print("处理完成！")
+
+
+def enqueue_process(dir_path, queue_path, skip_atlas=False, lz4=False, extension='scsp', output_format='json',
+                    compress=None, compress_level=None, precision=None, file_timeout=600.0, read_budget=64.0,
+                    curve_mode='fit', animation_workers=1, from_list=None, include=None, exclude=None):
+    """
+    工作队列模式的入队：处理 atlas 文件，把选出的文件和转换选项写进队列数据库 (见 work_queue)，
+    由任意数量的 --worker 进程转换；再次入队时只加入新文件，并让之前失败的文件重新排队
+    参数含义同 main_process；LZ4 由工作进程在内存中解压
+    """
+    if not os.path.isdir(dir_path):
+        raise ValueError(f"工作队列模式只支持目录输入: {dir_path}")
+    if animation_workers > 1:
+        # 工作进程转换时有续约心跳线程在运行，fork 可能死锁，动画只会按顺序解码
+        raise ValueError("--animation-workers 不能用于工作队列模式")
+    dir_path = os.path.abspath(dir_path)
+    work_queue = load_module('work_queue')
+    file_selection = load_module('file_selection')
+    # 提前检查精度和曲线模式设置，避免每个工作进程各自报错
+    scsp_dec_to_json = load_module('scsp_dec_to_json')
+    scsp_dec_to_json.FloatPrecision.parse(precision)
+    scsp_dec_to_json.check_curve_mode(curve_mode, output_format)
+    print(f"开始处理目录: {dir_path}")
+
+    start = time.perf_counter()
+    ext = f".{extension.lstrip('.')}"
+    if from_list is not None:
+        files = file_selection.read_file_list(from_list, dir_path)
+    else:
+        files = file_selection.walk_files(dir_path, ('.atlas', ext), include, exclude)
+    targets = file_selection.select_listed(files, dir_path, ext, include, exclude)
+    TIMINGS.append(("选择输入文件", time.perf_counter() - start))
+
+    if not skip_atlas:
+        print("正在处理 Atlas 文件...")
+        start = time.perf_counter()
+        atlas_files = file_selection.select_listed(files, dir_path, '.atlas', include, exclude)
+        load_module('replace_sct_with_png').scan_and_process_atlas_files(dir_path, atlas_files)
+        TIMINGS.append(("Atlas 处理", time.perf_counter() - start))
+    else:
+        print("跳过 Atlas 文件处理")
+
+    with work_queue.WorkQueue(queue_path) as queue:
+        options = {
+            "root": dir_path, "extension": extension, "lz4": lz4,
+            "output_format": output_format, "compress": compress, "compress_level": compress_level,
+            "precision": precision, "file_timeout": file_timeout, "read_budget": read_budget,
+            "curve_mode": curve_mode, "animation_workers": animation_workers,
+        }
+        try:
+            root = queue.options()["root"]
+        except ValueError:
+            root = dir_path
+        if root != dir_path:
+            raise ValueError(f"队列 {queue_path} 已用于目录 {root}")
+        queue.set_options(options)
+        added, requeued = queue.enqueue([(os.path.abspath(path), os.path.getsize(path)) for path in targets])
+        print(f"入队 {len(targets)} 个 {ext} 文件：新加入 {added}，失败后重新排队 {requeued}")
+        print(f"队列状态: {work_queue.format_counts(queue.counts())}")
+
+
+def worker_process(queue_path, lease_seconds=300.0, metrics_path=None):
+    """
+    工作队列模式的工作进程：按入队时保存的选项，逐个领取并转换队列中的文件，直到队列处理完
+    可在同一台或共享队列路径的多台机器上同时运行任意多个；崩溃进程领取的文件在租约过期后由其他进程重试
+    """
+    if not lease_seconds > 0:
+        raise ValueError(f"无效的租约秒数 --lease {lease_seconds}，应大于 0")
+    if not os.path.isfile(queue_path):
+        raise ValueError(f"队列数据库不存在: {queue_path}")
+    work_queue = load_module('work_queue')
+    scsp_dec_to_json = load_module('scsp_dec_to_json')
+    with work_queue.WorkQueue(queue_path, lease_seconds) as queue:
+        options = queue.options()
+        root = options["root"]
+        extension = options["extension"]
+        precision = scsp_dec_to_json.FloatPrecision.parse(options["precision"])
+        budget = {"time_budget": options["file_timeout"], "read_budget": options["read_budget"]}
+        lz4_processor = load_module('lz4_processor') if options["lz4"] else None
+
+        def convert(input_file):
+            data = None
+            if lz4_processor is not None:
+                with open(input_file, 'rb') as f:
+                    data = lz4_processor.decompress_bytes(f.read())
+            stats = scsp_dec_to_json.convert_file(
+                input_file, scsp_dec_to_json.output_json_path(input_file, root, extension),
+                options["output_format"], options["compress"], options["compress_level"], precision,
+                budget=budget, curve_mode=options["curve_mode"],
+                animation_workers=options["animation_workers"], data=data)
+            scsp_dec_to_json.METRICS.inc("scsp_files_converted_total")
+            return stats['outputs']
+
+        print(f"工作进程 {work_queue.worker_name()} 开始处理队列: {queue_path}")
+        start = time.perf_counter()
+        done, failed = work_queue.run_worker(queue, convert)
+        TIMINGS.append(("队列转换", time.perf_counter() - start))
+        print(f"\n本进程转换 {done} 个文件，失败 {failed} 个")
+        print(f"队列状态: {work_queue.format_counts(queue.counts())}")
+        failures = queue.failures()
+        if failures:
+            print(f"\n=== 错误汇总 ===")
+            for i, (path, error) in enumerate(failures, 1):
+                print(f"{i}. 文件: {path}")
+                print(f"   错误: {error}\n")
+    if metrics_path:
+        scsp_dec_to_json.METRICS.write(metrics_path)
+
+
+def pipe_process(lz4=False, output_format='json', compress=None, compress_level=None,
+                 precision=None, metrics_path=None, file_timeout=600.0, read_budget=64.0, curve_mode='fit',
+                 animation_workers=1):
+    """
+    管道模式：从 stdin 读取一份 SCSP 数据，转换结果写到 stdout，其余输出全部转到 stderr
+    LZ4 frame 格式的输入自动解压，--lz4 时按分块 LZ4 格式解压
+    """
+    scsp_dec_to_json = load_module('scsp_dec_to_json')
+    out = os.fdopen(sys.stdout.fileno(), 'wb', closefd=False)
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        data = sys.stdin.buffer.read()
+        TIMINGS.append(("读取 stdin", time.perf_counter() - start))
+        start = time.perf_counter()
+        written = scsp_dec_to_json.convert_stream(data, out, output_format,
+                                                  compress=compress, compress_level=compress_level,
+                                                  precision=scsp_dec_to_json.FloatPrecision.parse(precision),
+                                                  block_lz4=lz4,
+                                                  budget={"time_budget": file_timeout, "read_budget": read_budget},
+                                                  curve_mode=curve_mode, animation_workers=animation_workers)
+        TIMINGS.append(("转换", time.perf_counter() - start))
+        print(f"输入 {len(data)} 字节，输出 {written} 字节")
+        if metrics_path:
+            scsp_dec_to_json.METRICS.write(metrics_path)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='处理 Scsp 文件的工具集',
@@ -51,7 +399,7 @@ def main():
         'directory',
         nargs='?',
         default=os.getcwd(),
-        help='要处理的目录路径 (默认为当前工作目录)'
+        help='要处理的目录路径，或 zip / tar 归档文件；为 - 时从 stdin 读取一份 SCSP 数据并把结果写到 stdout (默认为当前工作目录)'
     )
     parser.add_argument(
         '--skip-atlas',
@@ -70,6 +418,187 @@ def main():
         dest='extension',
         help='要转换的文件扩展名 (默认为 scsp)'
     )
+    parser.add_argument(
+        '--from-list',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='只处理文件列表中的文件 (每行一个路径，相对路径相对于处理目录，# 开头为注释)，\n'
+             '为 - 时从 stdin 读取；不遍历目录 (默认为遍历整个目录)'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        default=None,
+        metavar='PATTERN',
+        help='只处理相对路径匹配该 fnmatch 模式的文件，如 chars/* ；可重复指定'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        default=None,
+        metavar='PATTERN',
+        help='不处理相对路径匹配该 fnmatch 模式的文件，如 backup/* 或 *_old.scsp；\n'
+             '命中的目录整个跳过，不会遍历其中的文件；可重复指定'
+    )
+    parser.add_argument(
+        '--shard',
+        type=str,
+        default=None,
+        metavar='INDEX/COUNT',
+        help='多机分片转换: 把选出的文件确定性地分成 COUNT 份，只处理第 INDEX 份 (从 0 开始)，\n'
+             '如 0/4；默认按相对路径哈希分片，各节点无需协调 (默认处理全部文件)'
+    )
+    parser.add_argument(
+        '--shard-balance',
+        action='store_true',
+        help='按文件大小均衡分片 (各节点需看到相同的文件集合)'
+    )
+    parser.add_argument(
+        '--shard-manifest',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='本分片的结果清单路径 (默认为输出目录下的 scsp-shard-INDEX-of-COUNT.json)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['json', 'skel', 'both', 'sharded'],
+        default='json',
+        dest='output_format',
+        help='输出格式: json / skel (Spine 3.8 二进制) / both / sharded (按动画分片) (默认为 json)'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=['gzip', 'lz4'],
+        default=None,
+        help='压缩 JSON 输出为 .json.gz / .json.lz4 (默认为不压缩)'
+    )
+    parser.add_argument(
+        '--compress-level',
+        type=int,
+        default=None,
+        help='压缩等级 (gzip 0-9，默认 6；lz4 0-16，默认 0)'
+    )
+    parser.add_argument(
+        '--precision',
+        type=str,
+        default=None,
+        help='浮点数保留的小数位数，按类别设置 position/uv/curve/default，\n'
+             '如 position=2,uv=5,curve=4；compact 为该组合的预设 (默认为不量化)'
+    )
+    parser.add_argument(
+        '--precision-report',
+        action='store_true',
+        help='输出量化前后的 JSON 大小对比'
+    )
+    parser.add_argument(
+        '--curve-mode',
+        choices=['fit', 'raw', 'lazy'],
+        default='fit',
+        help='贝塞尔曲线输出方式: fit 拟合出 curve/c2/c3/c4 / raw 不拟合，输出 9 个采样点 (samples 字段，\n'
+             '不能与 skel / both 输出同时使用) / lazy 序列化时才拟合 (默认为 fit)'
+    )
+    parser.add_argument(
+        '--animation-workers',
+        type=int,
+        default=1,
+        help='单个文件内并行解码动画的进程数（fork 创建），用于动画很多的大骨骼文件；\n'
+             '动画少于 16 个的文件和 Windows 上仍按顺序解码；不能与 thread / pipeline 后端和 --enqueue 同时使用 (默认为 1)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='并行转换的进程数 (默认为 1)'
+    )
+    parser.add_argument(
+        '--backend',
+        choices=['process', 'thread', 'pipeline'],
+        default='process',
+        help='--jobs 大于 1 时的并行方式: process 进程池 (支持 --max-memory) / thread 线程池\n'
+             '(只导入一次 numpy，free-threaded Python 上可多核解析) / pipeline 分阶段流水线\n'
+             '(预读、LZ4 解压、解析、序列化、写出各有线程和有界队列，atlas 处理同时进行) (默认为 process)'
+    )
+    parser.add_argument(
+        '--pipeline-workers',
+        type=str,
+        default=None,
+        help='pipeline 各阶段线程数，如 read=2,lz4=1,parse=4,serialize=1,write=2\n'
+             '(默认 parse 为 --jobs，read / write 为 2，其余为 1)'
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=None,
+        help='pipeline 各阶段输入队列的容量，限制同时在内存中的文件数 (默认为 4)'
+    )
+    parser.add_argument(
+        '--file-timeout',
+        type=float,
+        default=600.0,
+        help='单个文件的最长解析秒数，超时的文件记入错误汇总，其余文件继续转换；0 为不限制 (默认为 600)'
+    )
+    parser.add_argument(
+        '--read-budget',
+        type=float,
+        default=64.0,
+        help='单个文件累计读取字节数上限，为文件大小的倍数；0 为不限制 (默认为 64)'
+    )
+    parser.add_argument(
+        '--max-memory',
+        type=str,
+        default=None,
+        help='并行转换的内存预算，如 4G / 512M；按文件大小估算内存，\n'
+             '只在预算内提交任务，并记录每个文件的峰值内存 (默认为不限制)'
+    )
+    parser.add_argument(
+        '--metrics',
+        type=str,
+        default=None,
+        dest='metrics_path',
+        help='运行指标输出文件：.prom 为 Prometheus textfile，.json 为 JSON 快照 (默认不输出)'
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=15.0,
+        help='转换过程中定期写出指标文件的间隔秒数 (默认为 15)'
+    )
+    parser.add_argument(
+        '--bundle',
+        type=str,
+        default=None,
+        dest='bundle_path',
+        help='把所有输出写进一个打包文件：.zip / .tar / 其他扩展名为带索引的打包文件 (默认逐个写出文件)'
+    )
+    parser.add_argument(
+        '--enqueue',
+        type=str,
+        default=None,
+        metavar='QUEUE',
+        help='工作队列模式: 处理 atlas 后把目录中选出的文件和转换选项写进 SQLite 队列数据库，\n'
+             '不在本进程转换；再次入队时只加入新文件并重试失败的文件'
+    )
+    parser.add_argument(
+        '--worker',
+        type=str,
+        default=None,
+        metavar='QUEUE',
+        help='工作队列模式: 作为工作进程从队列数据库逐个领取文件，按入队时的选项转换并记录状态、耗时和错误，\n'
+             '可同时运行任意多个；队列处理完后退出'
+    )
+    parser.add_argument(
+        '--lease',
+        type=float,
+        default=300.0,
+        help='--worker 领取文件的租约秒数，转换期间自动续约；进程崩溃后租约过期的文件由其他进程重试 (默认为 300)'
+    )
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='在结束时输出各模块导入耗时和各阶段耗时'
+    )
     # parser.add_argument(
     #     '-v', '--verbose',
     #     action='store_true',
@@ -78,11 +607,46 @@ def main():
     
     args = parser.parse_args()
     
+    TIMINGS.append(("启动与参数解析", time.perf_counter() - START))
     try:
-        main_process(args.directory, skip_atlas=args.skip_atlas, lz4=args.lz4, extension=args.extension)
+        if args.worker is not None:
+            worker_process(args.worker, lease_seconds=args.lease, metrics_path=args.metrics_path)
+            return
+        if args.enqueue is not None:
+            enqueue_process(args.directory, args.enqueue, skip_atlas=args.skip_atlas, lz4=args.lz4,
+                            extension=args.extension, output_format=args.output_format,
+                            compress=args.compress, compress_level=args.compress_level, precision=args.precision,
+                            file_timeout=args.file_timeout or None, read_budget=args.read_budget or None,
+                            curve_mode=args.curve_mode, animation_workers=args.animation_workers,
+                            from_list=args.from_list, include=args.include, exclude=args.exclude)
+            return
+        if args.jobs < 1:
+            raise ValueError(f"无效的并行数 --jobs {args.jobs}，应不小于 1")
+        if args.directory == '-':
+            pipe_process(lz4=args.lz4, output_format=args.output_format,
+                         compress=args.compress, compress_level=args.compress_level,
+                         precision=args.precision, metrics_path=args.metrics_path,
+                         file_timeout=args.file_timeout or None, read_budget=args.read_budget or None,
+                         curve_mode=args.curve_mode, animation_workers=args.animation_workers)
+            return
+        main_process(args.directory, skip_atlas=args.skip_atlas, lz4=args.lz4, extension=args.extension, output_format=args.output_format,
+                     compress=args.compress, compress_level=args.compress_level,
+                     precision=args.precision, precision_report=args.precision_report,
+                     jobs=args.jobs, max_memory=args.max_memory,
+                     metrics_path=args.metrics_path, metrics_interval=args.metrics_interval,
+                     bundle_path=args.bundle_path, backend=args.backend,
+                     file_timeout=args.file_timeout or None, read_budget=args.read_budget or None,
+                     curve_mode=args.curve_mode, animation_workers=args.animation_workers,
+                     pipeline_workers=args.pipeline_workers,
+                     queue_size=args.queue_size, from_list=args.from_list,
+                     include=args.include, exclude=args.exclude,
+                     shard=args.shard, shard_balance=args.shard_balance, shard_manifest=args.shard_manifest)
     except Exception as e:
         print(f"处理过程中发生错误: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if args.timings:
+            print_timings()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+按内存预算调度并行转换任务：
+根据文件大小和头部计数估算每个文件的内存占用，只在预算内提交任务，
+并在子进程中用 tracemalloc 记录每个文件的实际峰值内存（另附工作进程的累计 RSS 峰值）
+未设置预算时（只有 --jobs）同样使用进程池，但不启用 tracemalloc，避免拖慢解析
+"""
+import os
+import struct
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+from scsp_dec_to_json import ScspOffsets
+
+MB = 1024 * 1024
+# 每个工作进程自身（解释器 + numpy）的常驻内存
+WORKER_BASELINE = 64 * MB
+# 解析结果（嵌套 dict/list + Decimal）相对输入文件大小的膨胀系数
+SIZE_FACTOR = 12
+# 每个动画的额外开销（时间轴字典、曲线拟合临时数组）
+ANIMATION_COST = 64 * 1024
+# 预算不足的文件被后面的小文件越过这么多次后，不再放行其他文件，等内存空出来先执行它，避免大文件一直等到最后
+MAX_SKIPS = 4
+
+
+def parse_size(text):
+    """解析 512M / 4G / 1024K / 纯字节数 形式的内存大小"""
+    text = str(text).strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': MB, 'G': 1024 * MB}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def read_header_counts(file_path):
+    """读取文件头中的骨骼、插槽、皮肤、动画数量，文件过短时返回全 0"""
+    with open(file_path, 'rb') as f:
+        header = f.read(ScspOffsets.BONES_COUNT + 2)
+    if len(header) < ScspOffsets.BONES_COUNT + 2:
+        return {'bones': 0, 'slots': 0, 'skins': 0, 'animations': 0}
+    count = lambda offset: max(0, struct.unpack_from('<h', header, offset)[0])
+    return {
+        'bones': count(ScspOffsets.BONES_COUNT),
+        'slots': count(ScspOffsets.SLOTS_COUNT),
+        'skins': count(ScspOffsets.SKINS_COUNT),
+        'animations': count(ScspOffsets.ANIMATIONS_COUNT),
+    }
+
+
+def estimate_file_memory(file_path):
+    """估算转换单个文件所需的内存（字节）"""
+    size = os.path.getsize(file_path)
+    counts = read_header_counts(file_path)
+    return WORKER_BASELINE + size * SIZE_FACTOR + counts['animations'] * ANIMATION_COST
+
+
+def current_rss_peak():
+    """
+    当前进程启动以来的 RSS 峰值（字节），不支持的平台返回 None
+    进程池中的工作进程会复用，这个值只增不减，是该进程之前所有文件中的最大值，不是单个文件的峰值
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_call(func, *args, **kwargs):
+    """
+    在子进程中执行 func 并记录峰值内存（tracemalloc 会明显拖慢解析，只在按内存预算调度时使用）
+    返回 (结果, 错误信息, tracemalloc峰值, 工作进程累计RSS峰值, 耗时)
+    """
+    tracemalloc.start()
+    try:
+        result, error, _, rss, elapsed = timed_call(func, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, error, peak, rss, elapsed
+
+
+def timed_call(func, *args, **kwargs):
+    """
+    在子进程中执行 func，只记录耗时，不跟踪内存分配
+    返回格式同 measure_call，tracemalloc峰值为 None
+    """
+    start = time.perf_counter()
+    result = None
+    error = None
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        error = str(e)
+    return result, error, None, current_rss_peak(), time.perf_counter() - start
+
+
+def run_scheduled(tasks, func, jobs=1, max_memory=None, on_done=None):
+    """
+    在进程池中按内存预算执行任务
+    :param tasks: [(任务key, 输入文件路径, args元组)]，args 传给 func
+    :param func: 可被子进程 pickle 的顶层函数
+    :param jobs: 最大并行进程数
+    :param max_memory: 内存预算（字节），None 表示不限制，此时不用 tracemalloc 记录峰值内存
+    :param on_done: 回调 on_done(key, 结果, 错误信息, 统计字典)
+    :return: 每个任务的内存统计列表，未设置内存预算时 peak 为 None
+    """
+    if jobs < 1:
+        raise ValueError(f"无效的并行数: {jobs}，应不小于 1")
+    pending = [(key, path, args, estimate_file_memory(path)) for key, path, args in tasks]
+    in_flight = {}
+    skips = {}  # 任务key -> 因预算不足被越过的次数
+    used = 0
+    peaks = []
+    call = measure_call if max_memory is not None else timed_call
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        while pending or in_flight:
+            # 在预算内提交尽可能多的任务；预算不足时跳过大文件，先放行能装下的小文件，
+            # 但大文件被越过 MAX_SKIPS 次后为它保留预算：不再放行其他文件，直到它能提交
+            index = 0
+            while index < len(pending) and len(in_flight) < jobs:
+                key, path, args, estimate = pending[index]
+                if max_memory is not None and in_flight and used + estimate > max_memory:
+                    if skips.get(key, 0) >= MAX_SKIPS:
+                        break
+                    skips[key] = skips.get(key, 0) + 1
+                    index += 1
+                    continue
+                if max_memory is not None and estimate > max_memory:
+                    print(f"警告: {path} 估计需要 {estimate / MB:.1f} MB，超过内存预算，单独执行")
+                pending.pop(index)
+                future = executor.submit(call, func, *args)
+                in_flight[future] = (key, path, estimate)
+                used += estimate
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, path, estimate = in_flight.pop(future)
+                used -= estimate
+                try:
+                    result, error, peak, rss, elapsed = future.result()
+                except Exception as e:  # 子进程崩溃（如被 OOM 杀掉）
+                    peak = 0 if max_memory is not None else None
+                    result, error, rss, elapsed = None, f"工作进程异常退出: {e}", None, 0.0
+                stats = {
+                    'file_path': path,
+                    'estimate': estimate,
+                    'peak': peak,
+                    'rss': rss,  # 工作进程至今的峰值，见 current_rss_peak
+                    'seconds': elapsed,
+                }
+                peaks.append(stats)
+                if peak is not None:
+                    rss_text = f"，工作进程累计RSS峰值 {rss / MB:.1f} MB" if rss else ""
+                    print(f"内存: {os.path.basename(path)} 峰值 {peak / MB:.1f} MB"
+                          f" (估计 {estimate / MB:.1f} MB{rss_text})，耗时 {elapsed:.2f}s")
+                if on_done:
+                    on_done(key, result, error, stats)
+    return peaks
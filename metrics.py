@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+转换过程的运行指标：计数器、仪表与直方图
+可导出为 Prometheus textfile（.prom）或 JSON 快照（.json），供定时任务监控使用
+"""
+import json
+import os
+import threading
+import time
+
+# 阶段耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "scsp_files_converted_total": "成功转换的文件数",
+    "scsp_files_failed_total": "转换失败的文件数",
+    "scsp_input_bytes_total": "输入文件字节数",
+    "scsp_output_bytes_total": "写出的输出字节数",
+    "scsp_stage_duration_seconds": "各处理阶段耗时",
+    "scsp_curves_fitted_total": "贝塞尔曲线拟合次数",
+    "scsp_timelines_decoded_total": "按 type_id 统计的已解码时间轴数量",
+    "scsp_pipeline_queue_depth": "流水线各阶段输入队列的当前深度",
+    "scsp_pipeline_queue_depth_max": "流水线各阶段输入队列的最大深度",
+    "scsp_pipeline_idle_seconds_total": "流水线各阶段等待输入的累计秒数",
+    "scsp_pipeline_blocked_seconds_total": "流水线各阶段因下游队列已满而阻塞的累计秒数",
+    "scsp_pipeline_stage_seconds": "流水线各阶段处理单个文件的耗时",
+}
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """设置仪表的当前值"""
+        key = self.key(name, labels)
+        with self.lock:
+            self.gauges[key] = value
+
+    def set_max(self, name, value, **labels):
+        """仪表只在 value 更大时更新，用于记录峰值"""
+        key = self.key(name, labels)
+        with self.lock:
+            current = self.gauges.get(key)
+            if current is None or value > current:
+                self.gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            histogram["counts"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def time(self, name, **labels):
+        """上下文管理器：记录代码块耗时到直方图"""
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        """返回可 JSON 序列化的指标快照"""
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.counters.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.gauges.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "counts": list(h["counts"]),
+                     "sum": h["sum"], "count": h["count"]}
+                    for (name, labels), h in self.histograms.items()
+                ],
+            }
+
+    def drain(self):
+        """取出当前快照并清空，用于把工作进程中的指标传回主进程"""
+        snapshot = self.snapshot()
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+        return snapshot
+
+    def merge(self, snapshot):
+        """合并其他进程的指标快照"""
+        if not snapshot:
+            return
+        with self.lock:
+            for c in snapshot["counters"]:
+                key = self.key(c["name"], c["labels"])
+                self.counters[key] = self.counters.get(key, 0) + c["value"]
+            for g in snapshot.get("gauges", ()):
+                # 仪表是瞬时值，以最新的快照为准
+                self.gauges[self.key(g["name"], g["labels"])] = g["value"]
+            for h in snapshot["histograms"]:
+                key = self.key(h["name"], h["labels"])
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = {
+                        "counts": [0] * (len(self.buckets) + 1),
+                        "sum": 0.0,
+                        "count": 0,
+                    }
+                for i, n in enumerate(h["counts"]):
+                    histogram["counts"][i] += n
+                histogram["sum"] += h["sum"]
+                histogram["count"] += h["count"]
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+    def to_prometheus(self):
+        """导出为 Prometheus 文本格式"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((k, dict(v, counts=list(v["counts"]))) for k, v in self.histograms.items())
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self.format_labels(labels)} {value}")
+        for (name, labels), value in gauges:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{self.format_labels(labels)} {value}")
+        for (name, labels), h in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + ["+Inf"], h["counts"]):
+                cumulative += n
+                lines.append(f"{name}_bucket{self.format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{self.format_labels(labels)} {h['sum']}")
+            lines.append(f"{name}_count{self.format_labels(labels)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        原子写出指标文件：.json 为 JSON 快照，其余为 Prometheus textfile
+        先写临时文件再替换，避免采集端读到半个文件
+        """
+        if path.lower().endswith('.json'):
+            content = json.dumps(dict(self.snapshot(), timestamp=time.time()), ensure_ascii=False, indent=2)
+        else:
+            content = self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class _Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+class MetricsWriter:
+    """按间隔定期写出指标文件，path 为空时不做任何事"""
+    def __init__(self, metrics, path, interval=15.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.last_write = time.perf_counter()
+
+    def maybe_write(self):
+        if self.path and time.perf_counter() - self.last_write >= self.interval:
+            self.write()
+
+    def write(self):
+        if self.path:
+            self.metrics.write(self.path)
+            self.last_write = time.perf_counter()
+
+
+# 进程内全局指标
+METRICS = Metrics()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+多机分片转换：--shard INDEX/COUNT 把选出的输入文件确定性地分成 COUNT 份，本机只处理第 INDEX 份（从 0 开始），
+共享文件系统上的多台机器各自指定不同的 INDEX 即可分别转换互不重叠的文件，彼此不需要协调
+
+  默认按相对于输入目录、以 / 分隔的路径的 SHA-1 取模分片，文件归属只取决于自身路径，与其他文件和运行顺序无关
+  balance 时按文件大小均衡：所有文件按大小从大到小（大小相同时按路径）依次分给当前总大小最小的分片；
+          各节点看到的文件集合和大小相同时分法一致，文件增删会影响其他文件的归属
+  atlas 文件很小，总是按路径哈希分片
+
+每个节点转换结束后写出本分片的结果清单（默认为输出目录下的 scsp-shard-INDEX-of-COUNT.json），
+记录每个文件的大小、状态、输出文件和错误信息，汇总各节点的清单即可检查整次转换
+"""
+import hashlib
+import heapq
+import json
+import os
+import platform
+import time
+
+
+def parse_shard(spec):
+    """
+    解析分片设置 INDEX/COUNT，如 0/4
+    :return: (index, count)
+    """
+    index, sep, count = str(spec).partition('/')
+    if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+        raise ValueError(f"无效的分片设置: {spec}，应为 INDEX/COUNT，如 0/4")
+    index, count = int(index), int(count)
+    if count < 1 or index >= count:
+        raise ValueError(f"无效的分片设置: {spec}，INDEX 应在 0 到 COUNT-1 之间")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    """以 / 分隔的相对路径所属的分片，跨进程、跨机器稳定（不使用随机化的内置 hash）"""
+    digest = hashlib.sha1(rel_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+
+def relative_key(path, directory_path):
+    """文件相对于输入目录、以 / 分隔的路径，作为分片的键"""
+    return os.path.relpath(path, directory_path).replace(os.sep, '/')
+
+
+def select_shard(files, shard, key, sizes=None):
+    """
+    选出属于本分片的文件，保持原有顺序
+    :param shard: (index, count)
+    :param key: key(文件) 返回以 / 分隔的相对路径
+    :param sizes: {文件: 字节数}，给出时按大小均衡分片，否则按路径哈希
+    """
+    index, count = shard
+    if sizes is None:
+        return [f for f in files if shard_of(key(f), count) == index]
+    # 贪心均衡：从大到小依次分给当前总大小最小的分片，总大小相同时取编号小的分片
+    loads = [(0, i) for i in range(count)]
+    selected = set()
+    for f in sorted(files, key=lambda f: (-sizes[f], key(f))):
+        load, i = heapq.heappop(loads)
+        if i == index:
+            selected.add(f)
+        heapq.heappush(loads, (load + sizes[f], i))
+    return [f for f in files if f in selected]
+
+
+def default_manifest_path(output_root, shard):
+    index, count = shard
+    return os.path.join(output_root, f"scsp-shard-{index}-of-{count}.json")
+
+
+def write_manifest(manifest_path, shard, balance, input_path, records, seconds):
+    """
+    写出本分片的结果清单，先写临时文件再替换，其他节点读到的总是完整的清单
+    :param records: batch_convert_decompressed_files 返回的每个文件的结果
+    """
+    index, count = shard
+    failed = sum(1 for record in records if record['error'] is not None)
+    manifest = {
+        "shard": {"index": index, "count": count, "balance": balance},
+        "input": input_path,
+        "host": platform.node(),
+        "finished": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "seconds": round(seconds, 3),
+        "converted": len(records) - failed,
+        "failed": failed,
+        "input_bytes": sum(record['bytes'] for record in records),
+        "files": records,
+    }
+    output_dir = os.path.dirname(manifest_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+    print(f"分片 {index}/{count} 结果清单: {manifest_path}（成功 {manifest['converted']}，失败 {failed}）")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+向量化的姿势采样：按 Spine 3.8 运行时的规则，对任意一组时间一次算出所有骨骼的世界变换矩阵，
+不需要 Spine 运行时，用于快速生成包围盒、碰撞框和预览
+
+  骨骼来自 parse_bones（parent、x、y、rotation、scale、shear、transform 模式），
+  动画来自 parse_animations 的 rotate / translate / scale / shear 时间轴（scsp_columnar 的列式数组）
+  所有采样时间作为 numpy 数组的第一维一起计算：时间轴求值对所有时间一次完成，
+  骨骼层级按深度分层，同一深度的骨骼一次完成，循环次数只与层级深度有关
+
+世界矩阵为 (时间数, 骨骼数, 2, 3) 的数组，每个骨骼为 [[a, b, worldX], [c, d, worldY]]，
+局部坐标 (x, y) 变换到世界坐标为 (a*x + b*y + worldX, c*x + d*y + worldY)
+
+只计算骨骼时间轴，不执行 IK / transform / path 约束，也不做动画混合（alpha 为 1，时间在第一帧之前为初始姿势）
+
+用法：
+  sampler = PoseSampler.from_file("xxx.scsp.decompressed")
+  world = sampler.world("idle", np.linspace(0, 1, 31))
+  bounds = sampler.bounds("idle", np.linspace(0, 1, 31))
+"""
+import numpy as np
+
+from scsp_columnar import CURVE_LINEAR, CURVE_STEPPED, read_timeline
+from scsp_dec_to_json import BinaryReader, ScspParser
+
+# 与 scsp_model.TRANSFORM_MODES 相同的编号
+NORMAL, ONLY_TRANSLATION, NO_ROTATION_OR_REFLECTION, NO_SCALE, NO_SCALE_OR_REFLECTION = range(5)
+
+# 局部姿势的各通道，与 BoneData 的字段名一致
+CHANNELS = ("x", "y", "rotation", "scaleX", "scaleY", "shearX", "shearY")
+# 骨骼时间轴名 -> (受影响的通道, 合成方式)：add 为初始值加上关键帧值，mul 为初始值乘以关键帧值
+BONE_TIMELINES = {
+    "rotate": (("rotation",), "add"),
+    "translate": (("x", "y"), "add"),
+    "scale": (("scaleX", "scaleY"), "mul"),
+    "shear": (("shearX", "shearY"), "add"),
+}
+# Spine 运行时把贝塞尔曲线近似为 10 段折线
+BEZIER_SEGMENTS = 10
+
+
+def bezier_samples(curves):
+    """
+    贝塞尔控制点 (m, 4) 对应的折线端点，与 Spine 运行时 CurveTimeline.setCurve 的采样相同
+    :return: (xs, ys)，各为 (m, BEZIER_SEGMENTS + 1)，首尾为 (0, 0) 和 (1, 1)
+    """
+    t = np.arange(BEZIER_SEGMENTS + 1) / BEZIER_SEGMENTS
+    u = 1 - t
+    # 三次贝塞尔 P0=(0,0)、P3=(1,1)
+    b1 = 3 * u * u * t
+    b2 = 3 * u * t * t
+    b3 = t ** 3
+    cx1, cy1, cx2, cy2 = (curves[:, i:i + 1].astype(np.float64) for i in range(4))
+    return cx1 * b1 + cx2 * b2 + b3, cy1 * b1 + cy2 * b2 + b3
+
+
+def curve_percent(curve_types, curves, segment, percent):
+    """
+    按每个采样所在关键帧段的曲线，把线性进度 percent 映射为曲线进度（Spine 3.8 getCurvePercent）
+    :param segment: 每个采样所在段的编号
+    """
+    result = np.clip(percent, 0.0, 1.0)
+    if len(curve_types) == 0:
+        return result
+    kinds = curve_types[segment]
+    result = np.where(kinds == CURVE_STEPPED, 0.0, result)
+    bezier = (kinds != CURVE_LINEAR) & (kinds != CURVE_STEPPED)
+    if bezier.any():
+        xs, ys = bezier_samples(curves[segment[bezier]])
+        p = result[bezier]
+        # 第一个 x >= p 的采样点之前的一段
+        k = np.clip((xs[:, 1:-1] < p[:, None]).sum(axis=1), 0, BEZIER_SEGMENTS - 1)
+        rows = np.arange(len(p))
+        x0, x1 = xs[rows, k], xs[rows, k + 1]
+        y0, y1 = ys[rows, k], ys[rows, k + 1]
+        span = np.where(x1 - x0 > 0, x1 - x0, 1.0)
+        result[bezier] = y0 + (y1 - y0) * (p - x0) / span
+    return result
+
+
+def evaluate(timeline, times, rotate=False):
+    """
+    对一组时间求一条数值时间轴的值
+    :param timeline: scsp_columnar.TimelineColumns
+    :param rotate: 旋转角度按最短方向插值
+    :return: (values (t, k), active (t,))，active 为 False 的时间在第一帧之前，应使用初始姿势
+    """
+    frame_times = timeline.times.astype(np.float64)
+    values = timeline.values.astype(np.float64)
+    count = len(frame_times)
+    if count == 0:
+        return np.zeros((len(times), values.shape[1] if values.ndim == 2 else 0)), np.zeros(len(times), dtype=bool)
+    # 下一帧的位置：第一个时间大于 t 的关键帧
+    upper = np.searchsorted(frame_times, times, side='right')
+    active = upper > 0
+    prev = np.clip(upper - 1, 0, count - 1)
+    after = np.minimum(upper, count - 1)
+    start = values[prev]
+    delta = values[after] - start
+    if rotate:
+        # 与运行时相同，取 (-180, 180] 内的差值
+        delta = delta - 360.0 * np.ceil(delta / 360.0 - 0.5)
+    span = frame_times[after] - frame_times[prev]
+    interpolating = (upper < count) & (span > 0)
+    percent = np.where(interpolating, (times - frame_times[prev]) / np.where(span > 0, span, 1.0), 0.0)
+    segment = np.minimum(prev, max(count - 2, 0))
+    percent = np.where(interpolating, curve_percent(timeline.curve_types, timeline.curves, segment, percent), 0.0)
+    return start + delta * percent[:, None], active
+
+
+def _cos(degrees):
+    return np.cos(np.radians(degrees))
+
+
+def _sin(degrees):
+    return np.sin(np.radians(degrees))
+
+
+class PoseSampler:
+    """
+    一个骨骼的姿势采样器
+    :param bones: parse_model() 的 BoneData 列表（父骨骼在子骨骼之前）
+    :param animations: parse_animations() 的结果，数值时间轴需为列式数组（见 from_file）
+    :param scale_x / scale_y: 骨骼整体缩放（Skeleton.scaleX / scaleY），负数为翻转
+    """
+    def __init__(self, bones, animations=None, scale_x=1.0, scale_y=1.0):
+        self.bone_names = [bone.name for bone in bones]
+        index = {name: i for i, name in enumerate(self.bone_names)}
+        self.parents = np.array([-1 if bone.parent is None else index[bone.parent] for bone in bones], dtype=np.intp)
+        self.modes = np.array([bone.transform for bone in bones], dtype=np.int8)
+        self.setup = {name: np.array([float(getattr(bone, name)) for bone in bones]) for name in CHANNELS}
+        self.animations = animations or {}
+        self.scale_x = scale_x
+        self.scale_y = scale_y
+        # 按深度分层，每层的骨骼只依赖上一层
+        depth = np.zeros(len(bones), dtype=np.intp)
+        for i, parent in enumerate(self.parents):
+            if parent >= i:
+                raise ValueError(f"骨骼 {self.bone_names[i]} 的父骨骼排在其后")
+            if parent >= 0:
+                depth[i] = depth[parent] + 1
+        self.levels = [np.flatnonzero(depth == d) for d in range(int(depth.max()) + 1)] if len(bones) else []
+
+    @classmethod
+    def from_file(cls, file_path, data=None, scale_x=1.0, scale_y=1.0, **reader_options):
+        """
+        解析文件得到骨骼和列式动画时间轴
+        :param reader_options: 传给 BinaryReader 的其他参数（precision、time_budget、read_budget）
+        """
+        parser = ScspParser(BinaryReader(file_path, data=data, **reader_options))
+        parser.timeline_decoder = read_timeline
+        model = parser.parse_model()
+        return cls(model.bones, model.animations, scale_x, scale_y)
+
+    def bone_index(self, name):
+        return self.bone_names.index(name)
+
+    def local_pose(self, animation, times):
+        """
+        各采样时间的骨骼局部姿势
+        :param animation: 动画名，None 为初始姿势
+        :return: {通道: (时间数, 骨骼数) 数组}，通道见 CHANNELS
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+        pose = {name: np.tile(values, (len(times), 1)) for name, values in self.setup.items()}
+        if animation is None:
+            return pose
+        for bone_name, timelines in self.animations[animation]["bones"].items():
+            if bone_name not in self.bone_names:
+                continue
+            i = self.bone_index(bone_name)
+            for timeline_name, (channels, blend) in BONE_TIMELINES.items():
+                timeline = timelines.get(timeline_name)
+                if timeline is None:
+                    continue
+                values, active = evaluate(timeline, times, rotate=timeline_name == "rotate")
+                for column, channel in enumerate(channels):
+                    base = self.setup[channel][i]
+                    value = base + values[:, column] if blend == "add" else base * values[:, column]
+                    pose[channel][:, i] = np.where(active, value, base)
+        return pose
+
+    def world(self, animation, times):
+        """
+        各采样时间所有骨骼的世界变换矩阵（Spine 3.8 Bone.updateWorldTransform）
+        :return: (时间数, 骨骼数, 2, 3) 数组
+        """
+        pose = self.local_pose(animation, times)
+        x, y = pose["x"], pose["y"]
+        rotation, shear_x, shear_y = pose["rotation"], pose["shearX"], pose["shearY"]
+        scale_x, scale_y = pose["scaleX"], pose["scaleY"]
+        sx, sy = self.scale_x, self.scale_y
+        shape = x.shape
+        a, b, c, d = np.empty(shape), np.empty(shape), np.empty(shape), np.empty(shape)
+        world_x, world_y = np.empty(shape), np.empty(shape)
+        for level in self.levels:
+            roots = level[self.parents[level] < 0]
+            if len(roots):
+                self._update_roots(roots, pose, sx, sy, a, b, c, d, world_x, world_y)
+            level = level[self.parents[level] >= 0]
+            if not len(level):
+                continue
+            parents = self.parents[level]
+            pa, pb, pc, pd = a[:, parents], b[:, parents], c[:, parents], d[:, parents]
+            lx, ly = x[:, level], y[:, level]
+            world_x[:, level] = pa * lx + pb * ly + world_x[:, parents]
+            world_y[:, level] = pc * lx + pd * ly + world_y[:, parents]
+            r, shx, shy = rotation[:, level], shear_x[:, level], shear_y[:, level]
+            scx, scy = scale_x[:, level], scale_y[:, level]
+            modes = self.modes[level]
+
+            # normal / onlyTranslation 的局部矩阵
+            la, lb = _cos(r + shx) * scx, _cos(r + 90 + shy) * scy
+            lc, ld = _sin(r + shx) * scx, _sin(r + 90 + shy) * scy
+            na, nb = pa * la + pb * lc, pa * lb + pb * ld
+            nc, nd = pc * la + pd * lc, pc * lb + pd * ld
+            # onlyTranslation：不继承父骨骼的旋转和缩放
+            oa, ob, oc, od = la * sx, lb * sx, lc * sy, ld * sy
+
+            # noRotationOrReflection：只继承父骨骼的缩放
+            s = pa * pa + pc * pc
+            valid = s > 0.0001
+            s = np.where(valid, np.abs(pa * pd - pb * pc) / np.where(valid, s, 1.0), 0.0)
+            qa = np.where(valid, pa / sx, 0.0)
+            qc = np.where(valid, pc / sy, 0.0)
+            qb, qd = np.where(valid, qc * s, pb), np.where(valid, qa * s, pd)
+            prx = np.where(valid, np.degrees(np.arctan2(qc, qa)), 90 - np.degrees(np.arctan2(pd, pb)))
+            rx, ry = r + shx - prx, r + shy - prx + 90
+            ra, rb = _cos(rx) * scx, _cos(ry) * scy
+            rc, rd = _sin(rx) * scx, _sin(ry) * scy
+            ra, rb, rc, rd = ((qa * ra - qb * rc) * sx, (qa * rb - qb * rd) * sx,
+                              (qc * ra + qd * rc) * sy, (qc * rb + qd * rd) * sy)
+
+            # noScale / noScaleOrReflection：只继承父骨骼的旋转
+            cos, sin = _cos(r), _sin(r)
+            za = (pa * cos + pb * sin) / sx
+            zc = (pc * cos + pd * sin) / sy
+            s = np.sqrt(za * za + zc * zc)
+            s = np.where(s > 0.00001, 1 / np.where(s > 0.00001, s, 1.0), s)
+            za, zc = za * s, zc * s
+            s = np.sqrt(za * za + zc * zc)
+            flip = (pa * pd - pb * pc < 0) != ((sx < 0) != (sy < 0))
+            s = np.where((modes == NO_SCALE) & flip, -s, s)
+            angle = np.pi / 2 + np.arctan2(zc, za)
+            zb, zd = np.cos(angle) * s, np.sin(angle) * s
+            ka, kb = _cos(shx) * scx, _cos(90 + shy) * scy
+            kc, kd = _sin(shx) * scx, _sin(90 + shy) * scy
+            za, zb, zc, zd = ((za * ka + zb * kc) * sx, (za * kb + zb * kd) * sx,
+                              (zc * ka + zd * kc) * sy, (zc * kb + zd * kd) * sy)
+
+            choices = [modes == ONLY_TRANSLATION, modes == NO_ROTATION_OR_REFLECTION,
+                       (modes == NO_SCALE) | (modes == NO_SCALE_OR_REFLECTION)]
+            a[:, level] = np.select(choices, [oa, ra, za], na)
+            b[:, level] = np.select(choices, [ob, rb, zb], nb)
+            c[:, level] = np.select(choices, [oc, rc, zc], nc)
+            d[:, level] = np.select(choices, [od, rd, zd], nd)
+        return np.stack([np.stack([a, b, world_x], axis=-1), np.stack([c, d, world_y], axis=-1)], axis=-2)
+
+    def _update_roots(self, roots, pose, sx, sy, a, b, c, d, world_x, world_y):
+        """根骨骼：只受骨骼整体缩放影响，不区分变换模式"""
+        r = pose["rotation"][:, roots]
+        scx, scy = pose["scaleX"][:, roots], pose["scaleY"][:, roots]
+        a[:, roots] = _cos(r + pose["shearX"][:, roots]) * scx * sx
+        b[:, roots] = _cos(r + 90 + pose["shearY"][:, roots]) * scy * sx
+        c[:, roots] = _sin(r + pose["shearX"][:, roots]) * scx * sy
+        d[:, roots] = _sin(r + 90 + pose["shearY"][:, roots]) * scy * sy
+        world_x[:, roots] = pose["x"][:, roots] * sx
+        world_y[:, roots] = pose["y"][:, roots] * sy
+
+    @staticmethod
+    def transform_points(world, bone, points):
+        """
+        把某个骨骼局部坐标下的一组点（如 region / 无权重附件的顶点）变换到各采样时间的世界坐标
+        :param world: world() 的结果
+        :param points: (n, 2) 局部坐标
+        :return: (时间数, n, 2)
+        """
+        matrix = world[:, bone]
+        points = np.asarray(points, dtype=np.float64)
+        return np.einsum('tij,nj->tni', matrix[:, :, :2], points) + matrix[:, None, :, 2]
+
+    def bounds(self, animation, times, world=None):
+        """
+        各采样时间所有骨骼原点的包围盒
+        :return: (时间数, 4) 数组 [min_x, min_y, max_x, max_y]
+        """
+        if world is None:
+            world = self.world(animation, times)
+        xs, ys = world[:, :, 0, 2], world[:, :, 1, 2]
+        return np.stack([xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)], axis=1)
@@ -15,60 +15,68 @@ def process_atlas_file(file_path):
     处理单个atlas文件：读取第二行并将sct扩展名替换为png
     """
     try:
-        # 读取文件的所有行
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # 按原样读取，保留原有的换行符
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
 
+        lines = content.splitlines()
         if len(lines) < 2:
             print(f"警告: {file_path} 行数少于2行，跳过处理")
             return False
 
-        # 获取第二行内容
+        # 替换规则只在 replace_page_extension 中实现，与归档成员的处理保持一致
+        new_content, changed = replace_page_extension(content)
         second_line = lines[1]
-
-        # 检查第二行是否包含.sct
-        if '.sct' in second_line:
-            # 替换.sct为.png
-            new_second_line = second_line.replace('.sct', '.png')
-            
-            # 更新lines列表
-            lines[1] = new_second_line
-            
+        if changed:
             # 写回文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.writelines(lines)
-                
-            print(f"已处理: {file_path}, 将 '{second_line.strip()}' 替换为 '{new_second_line.strip()}'")
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(new_content)
+
+            print(f"已处理: {file_path}, 将 '{second_line.strip()}' 替换为 '{new_content.splitlines()[1].strip()}'")
             return True
+
+        # 检查是否已经是.png，如果是则跳过
+        if '.png' in second_line:
+            print(f"跳过: {file_path}, 第二行已是.png扩展名")
         else:
-            # 检查是否已经是.png，如果是则跳过
-            if '.png' in second_line:
-                print(f"跳过: {file_path}, 第二行已是.png扩展名")
-            else:
-                print(f"跳过: {file_path}, 第二行不含.sct扩展名")
-            return False
+            print(f"跳过: {file_path}, 第二行不含.sct扩展名")
+        return False
 
     except Exception as e:
         print(f"处理文件 {file_path} 时出错: {str(e)}")
         return False
 
 
-def scan_and_process_atlas_files(folder_path):
+def replace_page_extension(content):
+    """
+    对atlas文本内容做同样的替换（用于归档成员等不在磁盘上的atlas）
+    :return: (替换后的内容, 是否有修改)
+    """
+    lines = content.splitlines(keepends=True)
+    if len(lines) < 2 or '.sct' not in lines[1]:
+        return content, False
+    lines[1] = lines[1].replace('.sct', '.png')
+    return ''.join(lines), True
+
+
+def scan_and_process_atlas_files(folder_path, atlas_files=None):
     """
     扫描指定文件夹中的所有atlas文件并处理
+    :param atlas_files: 已选出的atlas文件列表（见 file_selection），为 None 时扫描整个文件夹
     """
-    # 构建搜索模式，查找所有.atlas文件
-    atlas_pattern = os.path.join(folder_path, "*.atlas")
-    
-    # 获取所有atlas文件
-    atlas_files = glob.glob(atlas_pattern)
-    
-    # 还可能有子目录中的atlas文件，使用递归查找
-    recursive_pattern = os.path.join(folder_path, "**", "*.atlas")
-    atlas_files.extend(glob.glob(recursive_pattern, recursive=True))
-    
-    # 去重，防止重复添加
-    atlas_files = list(set(atlas_files))
+    if atlas_files is None:
+        # 构建搜索模式，查找所有.atlas文件
+        atlas_pattern = os.path.join(folder_path, "*.atlas")
+        
+        # 获取所有atlas文件
+        atlas_files = glob.glob(atlas_pattern)
+        
+        # 还可能有子目录中的atlas文件，使用递归查找
+        recursive_pattern = os.path.join(folder_path, "**", "*.atlas")
+        atlas_files.extend(glob.glob(recursive_pattern, recursive=True))
+        
+        # 去重，防止重复添加
+        atlas_files = list(set(atlas_files))
     
     if not atlas_files:
         print(f"在 {folder_path} 中未找到任何.atlas文件")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+面向运行时的列式关键帧接口：数值时间轴直接从缓冲区解码为 numpy 数组，
+不构造逐帧的 {"time":.., "x":..} 字典，也不经过 JSON
+
+每条时间轴为一个 TimelineColumns：
+  times        (n,) float32       关键帧时间
+  values       (n, k) float32     各列数值，列名见 columns（颜色按 r/g/b/a 拆成多列，布尔值为 0/1）
+  curve_types  (n-1,) uint8       每段曲线类型 CURVE_LINEAR / CURVE_STEPPED / CURVE_BEZIER
+  curves       (n-1, 4) float32   贝塞尔控制点 cx1, cy1, cx2, cy2（线性为 0,0,1,1，阶梯为 0）
+
+用法：
+  skeleton = load_columnar("xxx.scsp.decompressed")
+  rotate = skeleton["animations"]["idle"]["bones"]["root"]["rotate"]
+  rotate.times, rotate.column("angle")
+
+attachment / deform / event / drawOrder 时间轴不是数值列，仍为与 JSON 相同的列表结构
+"""
+import numpy as np
+
+from scsp_dec_to_json import BinaryReader, ScspParser, ScspTimelineLayout
+
+CURVE_LINEAR, CURVE_STEPPED, CURVE_BEZIER = 0, 1, 2
+# 每段曲线：4 字节类型（float32 0 线性 / 1 阶梯 / 其他贝塞尔）+ 9 个 (x, y) float32 采样点
+CURVE_BLOCK = 4 + 9 * 2 * 4
+CURVE_TYPE_LINEAR = 0x00000000
+CURVE_TYPE_STEPPED = 0x3f800000
+# 与 calculate_curve_params 相同的最小二乘拟合，预先求出伪逆后所有曲线一次矩阵乘法算完
+_T = np.linspace(0.1, 0.9, 9)
+_FIT = np.linalg.pinv(np.stack([3 * (1 - _T) ** 2 * _T, 3 * (1 - _T) * _T ** 2], axis=1))
+_LINEAR = np.array([0, 0, 1, 1], dtype=np.float32)
+
+COLOR_CHANNELS = "rgba"
+
+
+class TimelineColumns:
+    __slots__ = ("type_id", "columns", "times", "values", "curve_types", "curves")
+
+    def __init__(self, type_id, columns, times, values, curve_types, curves):
+        self.type_id = type_id
+        self.columns = columns
+        self.times = times
+        self.values = values
+        self.curve_types = curve_types
+        self.curves = curves
+
+    def __len__(self):
+        return len(self.times)
+
+    def column(self, name):
+        """按列名取一列数值"""
+        return self.values[:, self.columns.index(name)]
+
+    def __repr__(self):
+        return f"TimelineColumns(type_id={self.type_id}, frames={len(self)}, columns={self.columns})"
+
+
+def column_names(type_id):
+    """时间轴各数值列的名称，多分量字段展开为 name.r / name.g ..."""
+    if type_id == 5:
+        return [f"color.{c}" for c in COLOR_CHANNELS]
+    names = []
+    for name, width, kind in ScspTimelineLayout.fields(type_id):
+        names.extend([name] if width == 1 else [f"{name}.{c}" for c in COLOR_CHANNELS[:width]])
+    return names
+
+
+def fit_curves(blocks):
+    """
+    解码一组曲线块并批量拟合贝塞尔控制点
+    :param blocks: (m, CURVE_BLOCK) uint8
+    :return: (curve_types, curves)
+    """
+    count = len(blocks)
+    kinds = np.ascontiguousarray(blocks[:, :4]).view('<u4').ravel()
+    points = np.ascontiguousarray(blocks[:, 4:]).view('<f4').reshape(count, 9, 2).astype(np.float64)
+    # (2, 9) @ (m, 9, 2) -> (m, 2, 2)：[c1, c2] × [x, y]
+    fitted = np.clip(np.matmul(_FIT, points - (_T ** 3)[:, None]), 0.0, 1.0)
+    curves = np.stack([fitted[:, 0, 0], fitted[:, 0, 1], fitted[:, 1, 0], fitted[:, 1, 1]], axis=1).astype(np.float32)
+    curve_types = np.full(count, CURVE_BEZIER, dtype=np.uint8)
+    linear = kinds == CURVE_TYPE_LINEAR
+    stepped = kinds == CURVE_TYPE_STEPPED
+    curve_types[linear] = CURVE_LINEAR
+    curve_types[stepped] = CURVE_STEPPED
+    curves[linear] = _LINEAR
+    curves[stepped] = 0
+    return curve_types, curves
+
+
+def read_timeline(reader: BinaryReader, type_id):
+    """
+    读取与 ScspParser.linetime（type 5 为 parse_animations 中的 color 分支）相同的字节，
+    返回 TimelineColumns；不支持 6 deform / 8 drawOrder
+    """
+    if type_id == 5:
+        frame_count = max(0, int(reader.int16() / 5))
+        stride = 5
+        frames = reader.float32_view(frame_count * stride)
+        reader.skip(2)
+        curve_count = max(0, frame_count - 1)
+    else:
+        count = reader.int16()
+        stride = ScspTimelineLayout.stride(type_id)
+        frame_count = max(0, (count + stride - 1) // stride)
+        frames = reader.float32_view(frame_count * stride)
+        curve_count = max(0, frame_count - 1) if reader.int16() != 0 else 0
+    frames = frames.reshape(frame_count, stride)
+
+    reader.check_count(curve_count, CURVE_BLOCK, "曲线")
+    blocks = np.frombuffer(reader.data, dtype=np.uint8, count=curve_count * CURVE_BLOCK, offset=reader.pos)
+    reader.skip(curve_count * CURVE_BLOCK)
+    if curve_count:
+        curve_types, curves = fit_curves(blocks.reshape(curve_count, CURVE_BLOCK))
+    else:
+        curve_types = np.zeros(max(0, frame_count - 1), dtype=np.uint8)
+        curves = np.tile(_LINEAR, (max(0, frame_count - 1), 1))
+    return TimelineColumns(type_id, column_names(type_id), frames[:, 0], frames[:, 1:], curve_types, curves)
+
+
+def load_columnar(file_path, data=None, **reader_options):
+    """
+    解析整个文件，animations 中的数值时间轴为 TimelineColumns，其余部分与 ScspParser.parse() 相同
+    :param data: 已在内存中的文件内容，为 None 时读取 file_path
+    :param reader_options: 传给 BinaryReader 的其他参数（precision、time_budget、read_budget）
+    """
+    parser = ScspParser(BinaryReader(file_path, data=data, **reader_options))
+    parser.timeline_decoder = read_timeline
+    return parser.parse()
@@ -1,8 +1,24 @@
 #!/usr/bin/env python3
+import copy
+import io
+import math
+import os
+import re
 import struct
+import sys
+import time
 import simplejson as json
 import numpy as np
+from array import array
 from collections import defaultdict
+from decimal import Decimal
+import file_selection
+import node_shards
+from batch_progress import BatchProgress
+from metrics import METRICS, MetricsWriter
+from scsp_model import (BoneData, SlotData, TransformData, PathData, SkinData, VertexData, EMPTY_VERTICES,
+                        RegionAttachment, PointAttachment, BoundingBoxAttachment, PathAttachment,
+                        ClippingAttachment, MeshAttachment, SkeletonModel, float_cleaner)
 class ScspOffsets:
     HEADER_WIDTH        = 22
     HEADER_HEIGHT       = 26
@@ -16,17 +32,106 @@ class ScspOffsets:
     HASH_PTR            = 82
     SPINE_PTR            = 86
     BONES_COUNT         = 106
+class FloatPrecision:
+    """
+    按数据类别设置浮点数输出的有效小数位数
+    position: 坐标/长度/顶点, uv: 网格UV, curve: 曲线控制点, default: 其余数值
+    颜色总是按 0-255 精确转换，不受影响
+    """
+    DEFAULT = {
+        "position": 10,
+        "uv": 10,
+        "curve": 6,
+        "default": 10,
+    }
+    # 常用的紧凑输出配置
+    PRESETS = {
+        "compact": {"position": 2, "uv": 5, "curve": 4},
+    }
+
+    @classmethod
+    def parse(cls, spec):
+        """
+        解析精度配置字符串，如 "position=2,uv=5,curve=4" 或预设名 "compact"
+        返回完整的 {类别: 位数} 字典
+        """
+        precision = dict(cls.DEFAULT)
+        if not spec:
+            return precision
+        for item in spec.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            if item in cls.PRESETS:
+                precision.update(cls.PRESETS[item])
+                continue
+            category, _, digits = item.partition('=')
+            category = category.strip()
+            if category not in cls.DEFAULT or not digits.strip().isdigit():
+                raise ValueError(f"无效的精度设置: {item}")
+            precision[category] = int(digits)
+        return precision
+class ScspTimelineLayout:
+    """
+    各类型时间轴关键帧的定长布局：每帧以 time 开头，其后为 (字段名, float个数, 类型)
+    类型: float 普通数值, position 坐标数值, bool 以float存储的布尔值, rgba/rgb 颜色
+    未登记的类型 (如 6 deform、8 drawOrder) 每帧只有 time
+    """
+    FIELDS = {
+        0:  (("angle", 1, "float"),),
+        1:  (("x", 1, "position"), ("y", 1, "position")),
+        2:  (("x", 1, "float"), ("y", 1, "float")),
+        3:  (("x", 1, "float"), ("y", 1, "float")),
+        9:  (("mix", 1, "float"), ("softness", 1, "float"),
+             ("bendPositive", 1, "bool"), ("compress", 1, "bool"), ("stretch", 1, "bool")),
+        10: (("rotateMix", 1, "float"), ("translateMix", 1, "float"),
+             ("scaleMix", 1, "float"), ("shearMix", 1, "float")),
+        11: (("position", 1, "float"),),
+        12: (("position", 1, "float"),),
+        13: (("rotateMix", 1, "float"), ("translateMix", 1, "float")),
+        14: (("light", 4, "rgba"), ("dark", 3, "rgb")),
+    }
+
+    @classmethod
+    def fields(cls, type_id):
+        return cls.FIELDS.get(type_id, ())
+
+    @classmethod
+    def stride(cls, type_id):
+        """每帧占用的float个数（含time）"""
+        return 1 + sum(width for _, width, _ in cls.fields(type_id))
+class ScspBudgetError(ValueError):
+    """文件超出解析预算（耗时、累计读取字节数）或计数明显超出剩余数据，视为损坏/不支持的文件"""
+
+
 class BinaryReader:
-    def __init__(self, file_path, initial_pos=0):
+    # 累计读取每增加这么多字节检查一次耗时，避免每次读取都取时间
+    BUDGET_CHECK_BYTES = 64 * 1024
+
+    def __init__(self, file_path, initial_pos=0, precision=None, data=None,
+                 time_budget=None, read_budget=None):
+        """
+        :param file_path: 输入文件路径；传入 data 时仅用于显示
+        :param data: 已在内存中的文件内容（如归档成员、stdin），为 None 时从 file_path 读取
+        :param time_budget: 解析本文件的最长耗时（秒），None 为不限制
+        :param read_budget: 累计读取字节数上限，为文件大小的倍数（peek 和回读也计入），None 为不限制
+        """
         self.file_path = file_path
-        self.data = None
+        self.data = data
         self.pos = initial_pos
         self.strings_data = None
+        self.precision = dict(FloatPrecision.DEFAULT, **(precision or {}))
+        self.consumed = 0
+        self.next_check = float('inf')
         self.read_file()
+        self.deadline = time.perf_counter() + time_budget if time_budget else None
+        self.read_limit = int(len(self.data) * read_budget) if read_budget else float('inf')
+        self.next_check = self.BUDGET_CHECK_BYTES if self.deadline is not None else self.read_limit
 
     def read_file(self):
-        with open(self.file_path, 'rb') as f:
-            self.data = f.read()
+        if self.data is None:
+            with open(self.file_path, 'rb') as f:
+                self.data = f.read()
         
         # 根据 SCSPReader.cs: stringsOffset = ReadInt32() + 8
         self.strings_offset = self.uint32() + 8
@@ -35,9 +140,28 @@ class BinaryReader:
     def tell(self): return self.pos
     def seek(self, pos): self.pos = pos
     def skip(self, bytes_count): self.pos += bytes_count
+    def check_budget(self):
+        """累计读取超过检查点时调用：超出读取预算或耗时预算则抛出 ScspBudgetError"""
+        if self.consumed > self.read_limit:
+            raise ScspBudgetError(f"累计读取 {self.consumed} 字节，超过读取预算 {self.read_limit} 字节"
+                                  f"（文件 {len(self.data)} 字节，位置 {self.pos}）")
+        if self.deadline is not None:
+            if time.perf_counter() > self.deadline:
+                raise ScspBudgetError(f"解析超时（位置 {self.pos}，已读取 {self.consumed} 字节）")
+            self.next_check = min(self.consumed + self.BUDGET_CHECK_BYTES, self.read_limit)
+
+    def check_count(self, count, item_size, what):
+        """count 个至少 item_size 字节的条目必须能放进剩余数据，否则说明计数是垃圾值"""
+        remaining = len(self.data) - self.pos
+        if count > 0 and count * item_size > remaining:
+            raise ScspBudgetError(f"{what}数量 {count} × {item_size} 字节超出剩余数据 {remaining} 字节（位置 {self.pos}）")
+
     def unpack(self, fmt, size, read_pos=-1, peek=False):
         if read_pos == -1:
             read_pos = self.pos
+        self.consumed += size
+        if self.consumed > self.next_check:
+            self.check_budget()
         v = struct.unpack(fmt, self.data[read_pos:read_pos+size])[0]
         if not peek:
             self.pos = read_pos + size
@@ -51,8 +175,46 @@ class BinaryReader:
     def uint32(self,read_pos = -1,peek=False):
         return self.unpack('<I', 4, read_pos, peek)
 
-    def float32(self,read_pos = -1,peek=False):
-        return  self.clean_float(self.unpack('<f', 4, read_pos, peek))
+    def float32(self,read_pos = -1,peek=False,category="default"):
+        return  self.clean_float(self.unpack('<f', 4, read_pos, peek), self.precision[category])
+
+    def unpack_array(self, fmt, size, count, read_pos=-1, peek=False):
+        """一次读取 count 个连续的同类型数值，返回元组"""
+        if read_pos == -1:
+            read_pos = self.pos
+        # 计数为负或超出文件末尾，与 check_count 一样说明计数是垃圾值
+        if count < 0:
+            raise ScspBudgetError(f"数值个数 {count} 为负（位置 {read_pos}）")
+        if read_pos + size * count > len(self.data):
+            raise ScspBudgetError(f"数值个数 {count} × {size} 字节超出剩余数据 {len(self.data) - read_pos} 字节"
+                                  f"（位置 {read_pos}）")
+        self.consumed += size * count
+        if self.consumed > self.next_check:
+            self.check_budget()
+        values = struct.unpack_from(f'<{count}{fmt}', self.data, read_pos)
+        if not peek:
+            self.pos = read_pos + size * count
+        return values
+
+    def float32_view(self, count):
+        """以 numpy 数组视图读取 count 个 float32（不复制、不整理精度），计入读取预算"""
+        self.check_count(count, 4, "float32 ")
+        self.consumed += 4 * count
+        if self.consumed > self.next_check:
+            self.check_budget()
+        values = np.frombuffer(self.data, dtype='<f4', count=max(0, count), offset=self.pos)
+        self.pos += 4 * max(0, count)
+        return values
+
+    def int16_array(self, count, read_pos=-1, peek=False):
+        return list(self.unpack_array('h', 2, count, read_pos, peek))
+
+    def float32_array(self, count, read_pos=-1, peek=False, category="default"):
+        return self.clean_floats(self.unpack_array('f', 4, count, read_pos, peek), category)
+
+    def clean_floats(self, values, category="default"):
+        """按类别精度整理一组浮点数"""
+        return clean_floats(values, self.precision[category])
 
     def string(self,read_pos = -1,peek=False):      
         offset = self.uint32(read_pos,peek)
@@ -88,13 +250,17 @@ class BinaryReader:
     def color(self,read_pos = -1,peek=False,need_alpha=True):
         if read_pos == -1:
             read_pos = self.pos
-        r = self.clean_float(self.float32(read_pos,peek))
-        g = self.clean_float(self.float32(-1,peek))
-        b = self.clean_float(self.float32(-1,peek))
+        # 颜色分量不经过 --precision 的舍入，总是按完整精度转换为 0-255
+        r = self.clean_float(self.unpack('<f', 4, read_pos, peek))
+        g = self.clean_float(self.unpack('<f', 4, -1, peek))
+        b = self.clean_float(self.unpack('<f', 4, -1, peek))
         if need_alpha:
-            a = self.clean_float(self.float32(-1,peek))
-            return ''.join(f"{int(c * 255):02X}" for c in (r, g, b, a))
-        return ''.join(f"{int(c * 255):02X}" for c in (r, g, b))
+            a = self.clean_float(self.unpack('<f', 4, -1, peek))
+            return self.color_hex((r, g, b, a))
+        return self.color_hex((r, g, b))
+    @staticmethod
+    def color_hex(components):
+        return ''.join(f"{int(c * 255):02X}" for c in components)
     @staticmethod
     def clean_float(value, precision=10):
         """
@@ -102,7 +268,6 @@ class BinaryReader:
         - 如果是整数，返回int类型
         - 如果是小数，保留有效精度并去除尾随零
         """
-        import math
         # 检查是否为 NaN
         if isinstance(value, float) and math.isnan(value):
             raise ValueError("Value cannot be NaN")
@@ -117,10 +282,10 @@ class BinaryReader:
         
         # 使用指定精度格式化为字符串，然后转换为 Decimal
         formatted = f"{value:.{precision}f}"
-        # 去除尾随零，但保留至少 precision 位小数
-        formatted = f"{value:.{precision}f}".rstrip('0').rstrip('.')
-        from decimal import Decimal
-        return Decimal(formatted) if formatted and '.' in formatted else int(formatted)    
+        # 只去除小数部分的尾随零；precision 为 0 时没有小数点，整数部分的零不能去掉
+        if '.' in formatted:
+            formatted = formatted.rstrip('0').rstrip('.')
+        return Decimal(formatted) if '.' in formatted else int(formatted)
     def get_string(self, offset_in_strings):
         if offset_in_strings >= len(self.strings_data):
             return ""
@@ -166,9 +331,81 @@ class BinaryReader:
         
         # 返回所有找到的偏移量列表
         return offsets
+# 曲线块的类型字段（float32）：0 线性，1 阶梯，其他为贝塞尔
+CURVE_TYPE_LINEAR = b'\x00\x00\x00\x00'
+CURVE_TYPE_STEPPED = b'\x00\x00\x80\x3f'
+# 线性曲线拟合后的参数，与之相同时关键帧不写曲线字段
+LINEAR_CURVE = {"curve": 0, "c2": 0, "c3": 1, "c4": 1}
+CURVE_MODES = ('fit', 'raw', 'lazy')
+
+
+def check_curve_mode(curve_mode, output_format):
+    """raw 模式的关键帧只有采样点，skel 没有对应的字段，会全部写成线性曲线，因此不能与 skel 输出同时使用"""
+    if curve_mode not in CURVE_MODES:
+        raise ValueError(f"不支持的曲线模式: {curve_mode}")
+    if curve_mode == 'raw' and output_format in ('skel', 'both'):
+        raise ValueError(f"曲线模式 raw 不能与 {output_format} 输出格式同时使用，skel 需要拟合后的曲线")
+
+
+class LazyCurve:
+    """延迟拟合的贝塞尔曲线：保留采样点，第一次取值时才调用拟合函数"""
+    __slots__ = ("fit_func", "points", "curve_type", "params")
+
+    def __init__(self, fit_func, points, curve_type):
+        self.fit_func = fit_func
+        self.points = points
+        self.curve_type = curve_type
+        self.params = None
+
+    def fit(self):
+        """拟合结果 {"curve", "c2", "c3", "c4"}，无法拟合时按线性处理"""
+        if self.params is None:
+            self.params = self.fit_func(self.points, self.curve_type) or LINEAR_CURVE
+        return self.params
+
+
+class LazyCurveValue:
+    """关键帧中 curve/c2/c3/c4 的占位值，JSON 序列化（json_default）或 float() 时求值"""
+    __slots__ = ("curve", "key")
+
+    def __init__(self, curve, key):
+        self.curve = curve
+        self.key = key
+
+    def value(self):
+        return self.curve.fit()[self.key]
+
+    def __float__(self):
+        return float(self.value())
+
+
+def json_default(obj):
+    """JSON 序列化时求值延迟字段"""
+    if isinstance(obj, LazyCurveValue):
+        return obj.value()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 class ScspParser:
-    def __init__(self,reader:BinaryReader):
+    """
+    一个实例只解析一个文件，所有解析状态都在实例上，不打印任何内容，
+    不同线程各自创建 ScspParser 即可并行解析
+    """
+    # 动画数不少于此值且 animation_workers > 1 时才并行解码动画，动画少时进程开销不划算
+    PARALLEL_MIN_ANIMATIONS = 16
+
+    def __init__(self,reader:BinaryReader, curve_mode='fit', animation_workers=1):
+        """
+        :param curve_mode: 贝塞尔曲线的输出方式 fit / raw / lazy，见 read_curve
+        :param animation_workers: 解码动画的进程数，大于 1 时见 parse_animations_parallel
+        """
+        if curve_mode not in CURVE_MODES:
+            raise ValueError(f"不支持的曲线模式: {curve_mode}")
         self.reader = reader
+        self.curve_mode = curve_mode
+        self.animation_workers = max(1, animation_workers)
+        self.clean = float_cleaner(reader.precision)  # 按读取精度整理模型中的原始浮点数组
+        self.counts = {}  # 各部分解析出的条目数，parse() 后可用 format_counts 输出
         self.data = None
         self.bones_lookup = {}  # 记录索引到名称的映射，供Slot使用
         self.transform_lookup = {}
@@ -182,6 +419,8 @@ class ScspParser:
         self.events = {}
         self.skins = {}
         self.skins_lookup = {}
+        # 设置后数值时间轴改由 timeline_decoder(reader, type_id) 解码（见 scsp_columnar）
+        self.timeline_decoder = None
         
         
         
@@ -200,8 +439,6 @@ class ScspParser:
         points: 通过hex_curve方法得到的9个点的数组，代表贝塞尔曲线的采样点，每点为(x, y)
         curve_type_hex: 前4个字节的十六进制字符串，表示曲线类型（可选，但推荐传入以区分类型）
         """
-        import numpy as np
-        
         if curve_type_hex:
             # 特殊值处理（基于Spine的float表示）
             if curve_type_hex == b'\x00\x00\x80\x3f':  # 1.0 - stepped
@@ -214,6 +451,7 @@ class ScspParser:
         # 以下为贝塞尔拟合逻辑（假设默认或已确认是贝塞尔）
         if len(points) != 9:
             return None
+        METRICS.inc("scsp_curves_fitted_total")
         
         xs = np.array([p[0] for p in points])
         ys = np.array([p[1] for p in points])
@@ -251,12 +489,32 @@ class ScspParser:
         
         # if is_linear:
         #     return {"curve": 0, "c2": 0, "c3": 1, "c4": 1}
+        curve_precision = self.reader.precision["curve"]
         return {
-            "curve":self.reader.clean_float(float(cx1),6),
-            "c2":self.reader.clean_float(float(cy1),6),
-            "c3": self.reader.clean_float(float(cx2),6),
-            "c4": self.reader.clean_float(float(cy2),6)
+            "curve":self.reader.clean_float(float(cx1),curve_precision),
+            "c2":self.reader.clean_float(float(cy1),curve_precision),
+            "c3": self.reader.clean_float(float(cx2),curve_precision),
+            "c4": self.reader.clean_float(float(cy2),curve_precision)
         }
+    def read_curve(self):
+        """
+        读取一段曲线块（4字节类型 + 9个采样点共72字节），返回要并入关键帧的字段，线性曲线返回 None
+        贝塞尔曲线按 curve_mode 处理：
+          fit  最小二乘拟合出 curve/c2/c3/c4
+          raw  不拟合，输出 9 个采样点 {"samples": [x1, y1, ..., x9, y9]}（非 Spine 标准字段）
+          lazy 保留采样点，curve/c2/c3/c4 在序列化或访问时才拟合（见 LazyCurve）
+        """
+        reader = self.reader
+        curve_type = reader.data[reader.pos:reader.pos+4]
+        curve_p = self.hex_curve(reader.data[reader.pos+4:reader.pos+76])
+        reader.skip(76)
+        if self.curve_mode == 'fit' or curve_type in (CURVE_TYPE_LINEAR, CURVE_TYPE_STEPPED):
+            curve_params = self.calculate_curve_params(curve_p, curve_type)
+            return None if curve_params == LINEAR_CURVE else curve_params
+        if self.curve_mode == 'raw':
+            return {"samples": reader.clean_floats(curve_p.ravel().tolist(), "curve")}
+        curve = LazyCurve(self.calculate_curve_params, curve_p, curve_type)
+        return {key: LazyCurveValue(curve, key) for key in LINEAR_CURVE}
     def parse_skeleton_info(self):
         reader = self.reader
         width = reader.float32(ScspOffsets.HEADER_WIDTH)
@@ -276,16 +534,15 @@ class ScspParser:
         # Bones区域起始于 106
         reader = self.reader
         bones_count = reader.int16(ScspOffsets.BONES_COUNT)
-        print (f"--- 骨骼数量: {bones_count} ---")
         for i in range(bones_count):
             bone_id = reader.int16()
             name = reader.string()
             
             self.bones_lookup[i] = name 
             parent_id = reader.int16()
-            length = reader.float32()
-            x = reader.float32()
-            y = reader.float32()
+            length = reader.float32(category="position")
+            x = reader.float32(category="position")
+            y = reader.float32(category="position")
             rotation = reader.float32()
             scale_x = reader.float32()
             scale_y = reader.float32()
@@ -295,36 +552,10 @@ class ScspParser:
             skin_required = reader.bool8()
             reader.skip(1)
 
-            bone_data = {"name": name}
-            
-            # 只有非 root 骨骼才写 parent
-            if parent_id != -1:
-                bone_data["parent"] = self.bones_lookup.get(parent_id, "root")
-            
-            # 补全 length 字段
-            if abs(length) > 0.001:
-                bone_data["length"] = length
-            if abs(x) > 0.001: bone_data["x"] = x
-            if abs(y) > 0.001: bone_data["y"] = y
-            if abs(rotation) > 0.001: bone_data["rotation"] = rotation
-            if abs(float(scale_x) - 1.0) > 0.001: bone_data["scaleX"] = scale_x
-            if abs(float(scale_y) - 1.0) > 0.001: bone_data["scaleY"] = scale_y
-            if abs(float(shear_x)) > 0.001: bone_data["shearX"] = shear_x
-            if abs(float(shear_y)) > 0.001: bone_data["shearY"] = shear_y
-            # 映射 transform，确保默认值 normal 也被写入
-            mode_map = {
-                0: "normal",
-                1: "onlyTranslation", 
-                2: "noRotationOrReflection", 
-                3: "noScale", 
-                4: "noScaleOrReflection"
-            }
-            bone_data["transform"] = mode_map.get(transform_mode, "normal")
-            
-            if skin_required:
-                bone_data["skin"] = True
-                
-            bones.append(bone_data)
+            # 只有非 root 骨骼才有 parent
+            parent = self.bones_lookup.get(parent_id, "root") if parent_id != -1 else None
+            bones.append(BoneData(name, parent, length, x, y, rotation, scale_x, scale_y,
+                                  shear_x, shear_y, transform_mode, skin_required))
         reader.skip(2)
         return bones
     def parse_ik(self):
@@ -379,7 +610,6 @@ class ScspParser:
                 ik.append(ik_data)
 
                 #
-            print(f"所有约束跳过完成，当前指针: {reader.pos}，即将开始解析 Slots")
             return ik
     def parse_slots(self):
         """
@@ -406,30 +636,10 @@ class ScspParser:
             blend_mode = reader.int16()
             bone_name = self.bones_lookup.get(bone_id, "root")  # 默认为root
             
-            # 创建slot数据对象
-            slot_data = {
-                "name": slot_name,
-                "bone": bone_name,
-                 # 默认attachment和slot名称相同
-            }
-            if color != "FFFFFFFF": 
-                slot_data["color"] = color     
-            if darkColor != "FFFFFFFF" and darkColor != "00000000":   
-                #移除最后FF字符
-                if len(darkColor) >= 2 and darkColor.endswith("FF"):
-                    darkColor = darkColor[:-2]
-                slot_data["darkColor"] = darkColor
-            if attachment != "":            
-                slot_data["attachment"] = attachment
             if self.slots_name_attachment_map.get(attachment)  == None:               
                 self.slots_name_attachment_map[attachment] = slot_name
             self.solts_name_list.append(slot_name)
-            # 处理blend模式
-            if blend_mode != 0:  # 不是normal blend
-                blend_map = {1: "additive", 2: "multiply", 3: "screen"}
-                slot_data["blend"] = blend_map.get(blend_mode, "normal")
-            
-            slots.append(slot_data)
+            slots.append(SlotData(slot_name, bone_name, color, darkColor, attachment, blend_mode))
             
         return slots
 
@@ -454,8 +664,8 @@ class ScspParser:
             
             # 读取变换数据
             rotation = reader.float32()
-            x = reader.float32()
-            y = reader.float32()
+            x = reader.float32(category="position")
+            y = reader.float32(category="position")
             scaleX = reader.float32()
             scaleY = reader.float32()
             shearY = reader.float32()
@@ -471,26 +681,9 @@ class ScspParser:
                 bone_id = reader.int16()
                 bones.append(self.bones_lookup.get(bone_id))
             
-            transform_data = {
-                "name": name,
-                "order": order,
-                "skin": skin,
-                "target": target,
-                "bones": bones,
-                "rotateMix": rotateMix,
-                "translateMix": translateMix,
-                "scaleMix": scaleMix,
-                "shearMix": shearMix,
-                "rotation": rotation,
-                "x": x,
-                "y": y,
-                "scaleX": scaleX,
-                "scaleY": scaleY,
-                "shearY": shearY,
-                "relative": relative,
-                "local": local,
-            }
-            transform.append(transform_data)
+            transform.append(TransformData(name, order, skin, target, tuple(bones), rotateMix, translateMix,
+                                           scaleMix, shearMix, rotation, x, y, scaleX, scaleY, shearY,
+                                           relative, local))
             
         return transform
     def parse_path(self):
@@ -530,27 +723,12 @@ class ScspParser:
                 bone_id = reader.int16()
                 bones.append(self.bones_lookup.get(bone_id))
             self.path_lookup[i] = name
-            path_data = {
-                "name": name,
-                "order": order,
-                "skin": skin,
-                "positionMode": position_mode,
-                "spacingMode": spacing_mode,
-                "rotateMode": rotate_mode,
-                "rotation": rotation,
-                "position": position,
-                "spacing": spacing,
-                "rotateMix": rotateMix,
-                "translateMix": translateMix,
-                "target": target
-            }
-            path_data["bones"] = bones
-            
-            paths.append(path_data)
+            paths.append(PathData(name, order, skin, position_mode, spacing_mode, rotate_mode, rotation,
+                                  position, spacing, rotateMix, translateMix, target, tuple(bones)))
         return paths
     def vertices(self):
+        """读取附件顶点，返回 VertexData"""
         reader = self.reader
-        vertices = []
         vertexCount = 0
 
         bone_info_count = reader.int16()
@@ -563,33 +741,20 @@ class ScspParser:
             bone_count = reader.int16()
             bone_info_list.append(bone_count)
             vertexCount += 1 
-            for j in range(bone_count):
-                bone_id = reader.int16()
-                bone_info_list.append(bone_id)
-                
+            bone_info_list.extend(reader.int16_array(bone_count))
+
             count += bone_count + 1
             if(count >= bone_info_count):
                 break
         
         reader.skip(2)
-        bone_info_index = 0
-        while bone_info_index < len(bone_info_list):
-            bone_count = bone_info_list[bone_info_index]
-            bone_info_index += 1
-            vertices.append(bone_count)
-            
-            for j in range(bone_count):
-                bone_id = bone_info_list[bone_info_index]
-                bone_info_index += 1
-                x = reader.float32()
-                y = reader.float32()
-                weight = reader.float32()
-                vertices.extend([bone_id, x, y, weight])
+        # 每个骨骼权重为 x, y, weight 三个float，整块一次读出，保持原始 float32
+        weights_count = len(bone_info_list) - vertexCount
+        weights = array('f', reader.unpack_array('f', 4, weights_count * 3))
         if bone_info_count == 0 and coord_weight_count != 0:
-            vertexCount = int(coord_weight_count / 2)
-            for i in range(coord_weight_count):
-                vertices.append(reader.float32())  
-        return vertices, vertexCount
+            coords = array('f', reader.unpack_array('f', 4, coord_weight_count))
+            return VertexData(int(coord_weight_count / 2), None, coords)
+        return VertexData(vertexCount, array('h', bone_info_list), weights)
     def parse_skins(self):
         attachments_type_map = {
                 0:"region",
@@ -613,7 +778,7 @@ class ScspParser:
             attachments_count = reader.int16()
             attachments = {}
             self.skins_lookup[k] = name
-            skin = {"name": name, "attachments": attachments}
+            skin = SkinData(name, attachments)
             for j in range(attachments_count):
                 solt_id = reader.int16()
                 attachment_name = self.slots_lookup.get(solt_id)
@@ -632,106 +797,57 @@ class ScspParser:
                 #     unknown_count = reader.int16()
                 
                 
-                vertices = []
-                vertexCount = 0
+                vertices = EMPTY_VERTICES
                 if type != "region":
                     # reader.skip(2)
-                    vertices, vertexCount = self.vertices()
+                    vertices = self.vertices()
 
-                
-                if attachments.get(attachment_name) == None:
-                    attachments[attachment_name] = {value: {}}
-                else: 
-                    attachments[attachment_name][value] = {}
-                attachments[attachment_name][value]["type"] = type
-                
-                
+                attachment = PointAttachment()
                 if type == "boundingbox":
-                    attachments[attachment_name][value]["vertexCount"] = vertexCount
-                    attachments[attachment_name][value]["vertices"] = vertices 
-                    attachments[attachment_name][value]["path"] = path
+                    attachment = BoundingBoxAttachment(vertices, path)
                     reader.skip(4)
                     reader.skip(4)
                 elif type == "path":
                     reader.skip(8)
                     lengths_count = reader.int16()
-                    lengths = []
-                    for i in range(lengths_count):
-                        length = reader.float32()
-                        lengths.append(length)
+                    lengths = array('f', reader.unpack_array('f', 4, lengths_count))
                     closed = reader.bool8()
                     constantSpeed = reader.bool8()
-                    attachments[attachment_name][value]["closed"] = closed
-                    attachments[attachment_name][value]["constantSpeed"] = constantSpeed
-                    attachments[attachment_name][value]["lengths"] = lengths
-                    attachments[attachment_name][value]["vertices"] = vertices
-                    attachments[attachment_name][value]["vertexCount"] = vertexCount
-                    attachments[attachment_name][value]["path"] = str(path)
+                    attachment = PathAttachment(closed, constantSpeed, lengths, vertices, str(path))
                 elif type == "region":
-                    x = reader.float32()
-                    y = reader.float32()
+                    x = reader.float32(category="position")
+                    y = reader.float32(category="position")
                     rotation = reader.float32()
                     scale_x = reader.float32()
                     scale_y = reader.float32()
-                    width = reader.float32()
-                    height = reader.float32()
-
-                    attachments[attachment_name][value]["x"] = x
-                    attachments[attachment_name][value]["y"] = y
-                    attachments[attachment_name][value]["rotation"] = rotation
-                    attachments[attachment_name][value]["scaleX"] = scale_x
-                    attachments[attachment_name][value]["scaleY"] = scale_y
-                    attachments[attachment_name][value]["width"] = width
-                    attachments[attachment_name][value]["height"] = height
+                    width = reader.float32(category="position")
+                    height = reader.float32(category="position")
                     reader.skip(6)
                     reader.skip(86)
                     path = reader.string()
-                    attachments[attachment_name][value]["path"] = str(path)
                     color = reader.color()
-                    if color != "FFFFFFFF":
-                        attachments[attachment_name][value]["color"] = color 
+                    attachment = RegionAttachment(x, y, rotation, scale_x, scale_y, width, height, str(path), color)
                 elif type == "clipping":
                     reader.skip(8)
                     end_slot_id =  reader.int16()
-                    attachments[attachment_name][value]["end"] = self.slots_lookup.get(end_slot_id)
-                    attachments[attachment_name][value]["vertices"] = vertices
-                    attachments[attachment_name][value]["vertexCount"] = vertexCount
-                    attachments[attachment_name][value]["path"] = str(path)   
+                    attachment = ClippingAttachment(self.slots_lookup.get(end_slot_id), vertices, str(path))
                 elif type == "mesh" or type == "linkedmesh": 
                     unknown_count = reader.int16()
                     reader.skip(unknown_count * 4 + 4 * 6 + 8)
-                    uvs = []
                     uvs_count = reader.int16()
-                    for i in range(uvs_count):
-                        uv = reader.float32()
-                        uvs.append(uv)
-
-                    triangles = []
+                    uvs = array('f', reader.unpack_array('f', 4, uvs_count))
                     triangles_count = reader.int16()
-                    for i in range(triangles_count):
-                        triangle = reader.int16()
-                        triangles.append(triangle)
+                    triangles = array('h', reader.unpack_array('h', 2, triangles_count))
                     edges_count = reader.int16()
-                    edges = []
-                    for i in range(edges_count):
-                        edge = reader.int16()
-                        edges.append(edge)
+                    # edges 不输出
+                    reader.skip(edges_count * 2)
                     path = reader.string()
                     reader.skip(16)
-                    width = reader.float32()#TODO
-                    height = reader.float32()#TODO
+                    width = reader.float32(category="position")#TODO
+                    height = reader.float32(category="position")#TODO
                     color = reader.color()
                     hull = reader.int16()
-                    attachments[attachment_name][value]["uvs"] = uvs    
-                    attachments[attachment_name][value]["triangles"] = triangles    
-                    attachments[attachment_name][value]["vertices"] = vertices
-                    attachments[attachment_name][value]["hull"] = hull    
-                    attachments[attachment_name][value]["edges"] = []  
-                    attachments[attachment_name][value]["width"] = width    
-                    attachments[attachment_name][value]["height"] = height   
-                    attachments[attachment_name][value]["path"] = str(path)
-                    if color != "FFFFFFFF":
-                        attachments[attachment_name][value]["color"] = color   
+                    attachment = MeshAttachment(type, uvs, triangles, vertices, hull, width, height, str(path), color)
                     #TODO 奇怪的数据 读reader.data[reader.pos+14:reader.pos+18].hex() 等于ffffff00 则跳过2字节 然后再跳过16字节
                     hex = reader.data[reader.pos+14:reader.pos+18].hex()
                     hex1 = reader.data[reader.pos:reader.pos+2].hex()
@@ -739,95 +855,68 @@ class ScspParser:
                         reader.skip(2)
                     if hex1 == '0000':
                         reader.skip(16)
+                attachments.setdefault(attachment_name, {})[value] = attachment
 
-                else:
-                    print()
             skins.append(skin)
         return skins
     def linetime(self,type_id):
         reader = self.reader
+        if self.timeline_decoder is not None and type_id != 6 and type_id != 8:
+            return self.timeline_decoder(reader, type_id)
             
         count = reader.int16()
-        list = []
-        for_conut = 0
-        while(for_conut < count):
-            e = {}
-            time = reader.float32()
-            e['time'] = time
-            if(type_id == 1 or type_id == 2 or type_id == 3):
-                e['x'] = reader.float32()
-                e['y'] = reader.float32()
-                for_conut += 3
-            elif(type_id == 0):
-                e['angle'] = reader.float32()
-                for_conut += 2
-            elif(type_id == 11 or type_id == 12):
-                e['position'] = reader.float32() 
-                for_conut += 2
-            elif(type_id == 14):
-                e['light'] = reader.color()
-                e['dark'] = reader.color(need_alpha=False)
-                for_conut += 8
-            elif(type_id == 10):
-                e['rotateMix'] = reader.float32()
-                e['translateMix'] = reader.float32()
-                e['scaleMix'] = reader.float32()
-                e['shearMix'] = reader.float32()
-                for_conut += 5
-            elif(type_id == 9):
-                e['mix'] = reader.float32()
-                e['softness'] = reader.float32()
-                e['bendPositive'] = reader.bool_foolat32()
-                e['compress'] = reader.bool_foolat32()
-                e['stretch'] = reader.bool_foolat32()
-                for_conut += 6
-            elif(type_id == 13):
-                e['rotateMix'] = reader.float32()
-                e['translateMix'] = reader.float32()
-                for_conut += 3
+        # 按类型布局一次读出整条时间轴的所有帧，再按列组装关键帧
+        stride = ScspTimelineLayout.stride(type_id)
+        frame_count = max(0, (count + stride - 1) // stride)
+        reader.check_count(frame_count * stride, 4, "时间轴帧数据")
+        values = reader.unpack_array('f', 4, frame_count * stride)
+        names = ["time"]
+        columns = [reader.clean_floats(values[0::stride])]
+        column = 1
+        for field_name, width, kind in ScspTimelineLayout.fields(type_id):
+            names.append(field_name)
+            if kind == "float":
+                columns.append(reader.clean_floats(values[column::stride]))
+            elif kind == "position":
+                columns.append(reader.clean_floats(values[column::stride], "position"))
+            elif kind == "bool":
+                columns.append([v == 1 for v in reader.clean_floats(values[column::stride])])
             else:
-                for_conut += 1
-            list.append(e)
+                # 颜色按完整精度转换，不受 --precision 影响
+                components = [clean_floats(values[column + c::stride], FloatPrecision.DEFAULT["default"])
+                              for c in range(width)]
+                columns.append([BinaryReader.color_hex(c) for c in zip(*components)])
+            column += width
+        list = [dict(zip(names, row)) for row in zip(*columns)]
         curve_count = reader.int16()
         if curve_count != 0 and type_id != 8:
+            reader.check_count(len(list) - 1, 76, "曲线")
             curve_for_count = 0
             for j in list:
                 if curve_for_count >= len(list) - 1:
                     break
-                curve_type = reader.data[reader.pos:reader.pos+4]
-                reader.skip(4)
-                # 使用通用曲线计算方法
-                curve_data = reader.data[reader.pos:reader.pos+72]
-                curve_p = self.hex_curve(curve_data)
-                reader.skip(72)
-                curve_params = self.calculate_curve_params(curve_p, curve_type)
-                if curve_params != {"curve": 0, "c2": 0, "c3": 1, "c4": 1}:
+                curve_params = self.read_curve()
+                if curve_params is not None:
                     j.update(curve_params)
                 curve_for_count += 1
      
         if(type_id == 6):
             count = reader.int16()
+            reader.check_count(count, 2, "deform 关键帧")
             for i in range(count):
                 k = list[i]
                 offset = reader.int16() * 4
-                offset_count = 0
-
+                # 以uint32视图扫描本帧，首尾连续的0直接跳过，中间的非零区间一次读出
+                frame = np.frombuffer(reader.data, dtype='<u4', count=max(0, offset // 4), offset=reader.pos)
+                nonzero = np.flatnonzero(frame)
                 offset_num = 0
-                while reader.uint32(-1,True) == 0:
-                    reader.skip(4)
-                    offset_num += 4
-                    offset_count += 4
-                    
                 vertices = []
-                while offset_count < offset:
-                    # e10bd3bd
-                    v = reader.float32()
-                    offset_count += 4
-                    vertices.append(v)
-                    #判断self.data[curr:curr+offset-offset_count] 是否全部为 00 (代表0)) 都为0 则结束
-                    if reader.data[reader.pos:reader.pos+offset-offset_count] == b'\x00' * (offset-offset_count):
-                        reader.skip (offset - offset_count)
-                        break
+                if nonzero.size:
+                    first = int(nonzero[0])
+                    last = int(nonzero[-1])
+                    offset_num = first * 4
+                    vertices = reader.float32_array(last - first + 1, reader.pos + offset_num, True, "position")
+                reader.skip(offset)
                 re_oder = {
                     "time": k.get('time')
                 }        
@@ -859,6 +948,7 @@ class ScspParser:
         if(type_id == 8):
             for  k in list:
                 draw_order_count = reader.int16()
+                reader.check_count(draw_order_count, 4, "drawOrder 偏移")
                 # offset = reader.int16()
                 count = 0
                 offsets = []
@@ -908,332 +998,1059 @@ class ScspParser:
     def parse_animations(self):
         reader = self.reader
         amimations_count = reader.int16()
+        reader.check_count(amimations_count, 10, "动画")
+        if self.animation_workers > 1 and amimations_count >= self.PARALLEL_MIN_ANIMATIONS:
+            decoded = self.parse_animations_parallel(amimations_count)
+        else:
+            decoded = (self.parse_animation() for i in range(amimations_count))
         animations = {}
+        for key, animation in decoded:
+            animations[key] = animation
+        return animations
+
+    def parse_animations_parallel(self, amimations_count):
+        """
+        先按布局跳读一遍找出每个动画的起始位置，再由多个工作进程各自从起始位置解码
+        工作进程由 fork 创建，直接继承解析器和文件数据（写时复制，不经过序列化），
+        每个进程解码一段连续的动画，转成普通 dict（见 plain_animation）后传回，按原顺序合并
+        不支持 fork 的平台（Windows）或当前进程还有其他线程（fork 后可能死锁）时按顺序解码，并在 stderr 提示一次
+        :return: 按原顺序排列的 [(动画名, 动画)]
+        """
+        import multiprocessing
+        import threading
+        from concurrent.futures import ProcessPoolExecutor
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.warn_sequential("当前平台不支持 fork")
+            return [self.parse_animation() for i in range(amimations_count)]
+        if threading.active_count() > 1:
+            self.warn_sequential("当前进程有其他线程在运行，fork 可能死锁")
+            return [self.parse_animation() for i in range(amimations_count)]
+        reader = self.reader
+        starts = []
         for i in range(amimations_count):
-            key = reader.string()
-            duration = reader.float32()
-            linetime_num =  reader.int16()                     
-            slots = {}
-            bones = {}
-            # 使用嵌套的defaultdict来支持多层访问
-            from collections import defaultdict
-            deform = defaultdict(lambda: defaultdict(dict))
-            drawOrder = []
-            events = []
-            paths = {}
-            transforms = defaultdict(lambda: defaultdict(dict))
-            iks = {}
-            linetime_count = 0                
-            while(linetime_count < linetime_num):
-                type_id = reader.int16()
-                bones_id = reader.int16(-1,True)
-                name = None
-                if type_id != 7 and type_id != 8:
-                    reader.skip(2)
-                if type_id == 4 or type_id == 5 or type_id == 14:
-                    name = self.slots_lookup.get(bones_id)
-                    if slots.get(name) == None:
-                        slots[name] = {}
-                elif(type_id == 6):
-                    name = self.slots_lookup.get(bones_id)
-                elif(type_id == 9):
-                    name = self.ik_lookup.get(bones_id)
-                elif(type_id == 10):
-                    name = self.transform_lookup.get(bones_id)
-                    # if transforms.get(name) == None:
-                    #     transforms[name] = []
-                elif(type_id == 11) or type_id == 13 or type_id ==12: 
-                    name = self.path_lookup.get(bones_id)
-                    if paths.get(name) == None:
-                        paths[name] = {}
-                elif (type_id == 0 or type_id == 1 or type_id == 2 or type_id == 3 ):
-                    name = self.bones_lookup.get(bones_id)
-                    if bones.get(name) == None:
-                        bones[name] = {}
-                    
-                # print(f"bones_name: {name}, type_id: {type_id} , type_count: {linetime_count} , key: {key}")
-                if(type_id == 0):
-                    bones[name]["rotate"] = self.linetime(type_id)
-                    linetime_count += 1
-                    continue
-                elif(type_id == 1):
-                    bones[name]["translate"] = self.linetime(type_id)
-                    linetime_count += 1
-                    continue
-                elif(type_id == 2):                    
-                    bones[name]["scale"] = self.linetime(type_id)
-                    linetime_count += 1
-                    continue
-                elif(type_id == 3):
-                    bones[name]["shear"] = self.linetime(type_id)
-                    linetime_count += 1
-                    continue
-                elif(type_id == 4):
-                    frame_count = reader.int16()
-                    attachment = []
-                    for k in range(frame_count):
-                        tiem = reader.float32()
-                        attachment.append({"time": tiem,})
-                    count = reader.int16()
-                    for k in attachment:
-                        slot_name = reader.string()
-                        k["name"] = slot_name if slot_name != '' else None 
-                    if slots[name].get("attachment") != None:
-                        old = slots[name]["attachment"]
-                        old.extend(attachment)
-                    else:
-                        slots[name]["attachment"] = attachment    
-                    linetime_count += 1
-                    continue
-                elif(type_id == 5):
-                    frame_count = reader.int16()
-                    colors = []
-                    for k in range(int(frame_count/5)):
-                        time = reader.float32()
-                        color = reader.color()
-                        colors.append({"time": time,"color": color})
-                    reader.skip(2)
-                    count = 0
-                    for color in colors:
-                        if count == len(colors) - 1:
-                            break
-                        curve_type = reader.data[reader.pos:reader.pos+4]
-                        reader.skip(4)
-                        curve_data = reader.data[reader.pos:reader.pos+72]
-                        curve_p = self.hex_curve(curve_data)
-                        reader.skip(72)
-                        curve_params = self.calculate_curve_params(curve_p, curve_type)
-                        if curve_params != {"curve": 0, "c2": 0, "c3": 1, "c4": 1}:
-                            color.update(curve_params)
-                        count += 1
-                    slots[name]["color"] = colors
-                    linetime_count += 1
-                    continue
-                elif(type_id == 6):
-                    skin_id,map = self.linetime(type_id)
-                    for k in map.keys():
-                        v = map[k]
-                        vertices =  self.skins[skin_id]["attachments"][name][k]["vertices"]
-                        for e in v:
-                            zero_count = 0
-                            new_vertices = e.get("vertices")
-                            if new_vertices == None:
-                                continue
-                            if len(vertices) != len(new_vertices):
-                                continue
-                            for i in range(len(new_vertices)):
-                                value =   reader.clean_float(new_vertices[i] - vertices[i])
-                                new_vertices[i] = value   
-                                if value == 0:
-                                    zero_count += 1
-                            if zero_count == len(new_vertices):
-                                #删除vertices
-                                e.pop("vertices")
-                            
-                    attachment_name = self.skins_lookup.get(skin_id)
-                    if deform[attachment_name].get(name) != None:
-                        deform[attachment_name][name].update(map)
-                    else:
-                        deform[attachment_name][name] = map
-                    linetime_count += 1
-                    continue
-                elif(type_id == 7):
-                    events_count = reader.int16()
-                    list = []
-                    for i in range(events_count):
-                        #TODO
-                        event = {}
-                        time = reader.float32()
-                        event["time"] = time
-                        list.append(event)
-                    reader.skip(2)  
-                    for e in list:
-                        event_name = reader.string()                        
-                        e["name"] = event_name
-                        events.append(event)
-                    events = list
-                    linetime_count += 1
-                    continue
-                elif(type_id == 8):
-                    drawOrder = self.linetime(type_id)
-                    linetime_count += 1
-                    continue
-                elif(type_id == 9):
-                    ik = self.linetime(type_id)
-                    linetime_count += 1
-                    iks[name] = ik
-                    continue
-                elif(type_id == 10):
-                    transform = self.linetime(type_id)
-                    transforms[name] = transform
-                    linetime_count += 1
-                    continue          
-                elif(type_id == 11):
-                    path = self.linetime(type_id)
-                    paths[name]["position"] = path
-                    linetime_count += 1
-                    continue
-                elif(type_id == 12):
-                    path_spacing = self.linetime(type_id)
-                    paths[name]["spacing"] = path_spacing
-                    linetime_count += 1
-                    continue
-                elif(type_id == 13):   
-                    path_mix = self.linetime(type_id)   
-                    paths[name]["mix"] = path_mix 
-                    linetime_count += 1
-                    continue                    
-                elif(type_id == 14):
-                    two_color = self.linetime(14)
-                    slots[name]["twoColor"] = two_color
-                    linetime_count += 1
-                    continue
+            starts.append(reader.pos)
+            self.skip_animation()
+        end = reader.pos
+        # 每个进程分到几段，动画大小不一时各进程的负载仍较均衡
+        chunk_size = max(1, -(-amimations_count // (self.animation_workers * 4)))
+        chunks = [starts[i:i + chunk_size] for i in range(0, amimations_count, chunk_size)]
+        # fork 时 initargs 不经过序列化，工作进程直接继承解析器
+        with ProcessPoolExecutor(max_workers=min(self.animation_workers, len(chunks)),
+                                 mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_animation_worker, initargs=(self,)) as executor:
+            results = list(executor.map(_decode_animations, chunks))
+        decoded = []
+        for animations, consumed, metrics in results:
+            decoded.extend(animations)
+            # 各进程的读取量计入本文件的读取预算，指标并回本进程
+            reader.consumed += consumed
+            METRICS.merge(metrics)
+        reader.pos = end
+        reader.check_budget()
+        return decoded
+
+    # 每个进程只提示一次退回顺序解码，批量转换时不会每个文件都输出
+    sequential_warned = False
+
+    @classmethod
+    def warn_sequential(cls, reason):
+        if not cls.sequential_warned:
+            cls.sequential_warned = True
+            sys.stderr.write(f"警告: {reason}，--animation-workers 不生效，动画按顺序解码\n")
+
+    def skip_animation(self):
+        """按与 parse_animation 相同的布局跳过一个动画：只读取各处的数量，不解码帧数据"""
+        reader = self.reader
+        reader.skip(8)  # 名称引用 + duration
+        linetime_num = reader.int16()
+        reader.check_count(linetime_num, 4, "时间轴")
+        for i in range(linetime_num):
+            type_id = reader.int16()
+            if type_id != 7 and type_id != 8:
+                reader.skip(2)
+            if type_id == 4:
+                frame_count = reader.int16()
+                reader.check_count(frame_count, 8, "attachment 关键帧")
+                reader.skip(frame_count * 4 + 2 + frame_count * 4)
+            elif type_id == 5:
+                frame_count = int(reader.int16() / 5)
+                reader.check_count(frame_count, 20, "color 关键帧")
+                reader.skip(max(0, frame_count) * 20 + 2 + max(0, frame_count - 1) * 76)
+            elif type_id == 7:
+                events_count = reader.int16()
+                reader.check_count(events_count, 8, "event 关键帧")
+                reader.skip(events_count * 4 + 2 + events_count * 4)
+            elif 0 <= type_id <= 14:
+                self.skip_linetime(type_id)
+            else:
                 break
+
+    def skip_linetime(self, type_id):
+        """跳过一条由 linetime 解析的时间轴"""
+        reader = self.reader
+        stride = ScspTimelineLayout.stride(type_id)
+        frame_count = max(0, (reader.int16() + stride - 1) // stride)
+        reader.check_count(frame_count * stride, 4, "时间轴帧数据")
+        reader.skip(frame_count * stride * 4)
+        if reader.int16() != 0 and type_id != 8:
+            reader.check_count(frame_count - 1, 76, "曲线")
+            reader.skip(max(0, frame_count - 1) * 76)
+        if type_id == 6:
+            count = reader.int16()
+            reader.check_count(count, 2, "deform 关键帧")
+            for i in range(count):
+                reader.skip(reader.int16() * 4)
+            reader.skip(4)  # 附件名引用
+            if len(self.skins) >= reader.int16(peek=True):
+                reader.skip(2)
+        elif type_id == 8:
+            for i in range(frame_count):
+                draw_order_count = reader.int16()
+                reader.check_count(draw_order_count, 4, "drawOrder 偏移")
+                reader.skip(draw_order_count * 4)
+
+    def parse_animation(self):
+        """从当前位置解析一个动画，返回 (动画名, 动画)"""
+        reader = self.reader
+        reader.check_budget()
+        key = reader.string()
+        duration = reader.float32()
+        linetime_num =  reader.int16()                     
+        reader.check_count(linetime_num, 4, "时间轴")
+        slots = {}
+        bones = {}
+        # 使用嵌套的defaultdict来支持多层访问
+        deform = defaultdict(lambda: defaultdict(dict))
+        drawOrder = []
+        events = []
+        paths = {}
+        transforms = defaultdict(lambda: defaultdict(dict))
+        iks = {}
+        linetime_count = 0                
+        while(linetime_count < linetime_num):
+            type_id = reader.int16()
+            METRICS.inc("scsp_timelines_decoded_total", type_id=type_id)
+            bones_id = reader.int16(-1,True)
+            name = None
+            if type_id != 7 and type_id != 8:
+                reader.skip(2)
+            if type_id == 4 or type_id == 5 or type_id == 14:
+                name = self.slots_lookup.get(bones_id)
+                if slots.get(name) == None:
+                    slots[name] = {}
+            elif(type_id == 6):
+                name = self.slots_lookup.get(bones_id)
+            elif(type_id == 9):
+                name = self.ik_lookup.get(bones_id)
+            elif(type_id == 10):
+                name = self.transform_lookup.get(bones_id)
+                # if transforms.get(name) == None:
+                #     transforms[name] = []
+            elif(type_id == 11) or type_id == 13 or type_id ==12: 
+                name = self.path_lookup.get(bones_id)
+                if paths.get(name) == None:
+                    paths[name] = {}
+            elif (type_id == 0 or type_id == 1 or type_id == 2 or type_id == 3 ):
+                name = self.bones_lookup.get(bones_id)
+                if bones.get(name) == None:
+                    bones[name] = {}
                 
-            animations[key] = {
-                "bones":bones,
-                "slots":slots, 
-                "ik":iks, 
-                "transform": transforms,
-                "path": paths,
-                "deform": deform,
-                }
-            if len(drawOrder) != 0:
-                animations[key]["drawOrder"] = drawOrder
-            animations[key]["duration"] = duration
-            if len(events) != 0:
-                animations[key]["events"] = events
-            if len(paths) != 0:
-                animations[key]["path"] = paths
+            # print(f"bones_name: {name}, type_id: {type_id} , type_count: {linetime_count} , key: {key}")
+            if(type_id == 0):
+                bones[name]["rotate"] = self.linetime(type_id)
+                linetime_count += 1
+                continue
+            elif(type_id == 1):
+                bones[name]["translate"] = self.linetime(type_id)
+                linetime_count += 1
+                continue
+            elif(type_id == 2):                    
+                bones[name]["scale"] = self.linetime(type_id)
+                linetime_count += 1
+                continue
+            elif(type_id == 3):
+                bones[name]["shear"] = self.linetime(type_id)
+                linetime_count += 1
+                continue
+            elif(type_id == 4):
+                frame_count = reader.int16()
+                reader.check_count(frame_count, 8, "attachment 关键帧")
+                attachment = []
+                for k in range(frame_count):
+                    tiem = reader.float32()
+                    attachment.append({"time": tiem,})
+                count = reader.int16()
+                for k in attachment:
+                    slot_name = reader.string()
+                    k["name"] = slot_name if slot_name != '' else None 
+                if slots[name].get("attachment") != None:
+                    old = slots[name]["attachment"]
+                    old.extend(attachment)
+                else:
+                    slots[name]["attachment"] = attachment    
+                linetime_count += 1
+                continue
+            elif(type_id == 5):
+                if self.timeline_decoder is not None:
+                    slots[name]["color"] = self.timeline_decoder(reader, type_id)
+                    linetime_count += 1
+                    continue
+                frame_count = reader.int16()
+                reader.check_count(int(frame_count/5), 20, "color 关键帧")
+                colors = []
+                for k in range(int(frame_count/5)):
+                    time = reader.float32()
+                    color = reader.color()
+                    colors.append({"time": time,"color": color})
+                reader.skip(2)
+                count = 0
+                for color in colors:
+                    if count == len(colors) - 1:
+                        break
+                    curve_params = self.read_curve()
+                    if curve_params is not None:
+                        color.update(curve_params)
+                    count += 1
+                slots[name]["color"] = colors
+                linetime_count += 1
+                continue
+            elif(type_id == 6):
+                skin_id,map = self.linetime(type_id)
+                for k in map.keys():
+                    v = map[k]
+                    vertices =  self.skins[skin_id].attachments[name][k].vertices.to_spine(self.clean)
+                    for e in v:
+                        zero_count = 0
+                        new_vertices = e.get("vertices")
+                        if new_vertices == None:
+                            continue
+                        if len(vertices) != len(new_vertices):
+                            continue
+                        for i in range(len(new_vertices)):
+                            value =   reader.clean_float(new_vertices[i] - vertices[i], reader.precision["position"])
+                            new_vertices[i] = value   
+                            if value == 0:
+                                zero_count += 1
+                        if zero_count == len(new_vertices):
+                            #删除vertices
+                            e.pop("vertices")
+                        
+                attachment_name = self.skins_lookup.get(skin_id)
+                if deform[attachment_name].get(name) != None:
+                    deform[attachment_name][name].update(map)
+                else:
+                    deform[attachment_name][name] = map
+                linetime_count += 1
+                continue
+            elif(type_id == 7):
+                events_count = reader.int16()
+                reader.check_count(events_count, 8, "event 关键帧")
+                list = []
+                for i in range(events_count):
+                    #TODO
+                    event = {}
+                    time = reader.float32()
+                    event["time"] = time
+                    list.append(event)
+                reader.skip(2)  
+                for e in list:
+                    event_name = reader.string()                        
+                    e["name"] = event_name
+                    events.append(event)
+                events = list
+                linetime_count += 1
+                continue
+            elif(type_id == 8):
+                drawOrder = self.linetime(type_id)
+                linetime_count += 1
+                continue
+            elif(type_id == 9):
+                ik = self.linetime(type_id)
+                linetime_count += 1
+                iks[name] = ik
+                continue
+            elif(type_id == 10):
+                transform = self.linetime(type_id)
+                transforms[name] = transform
+                linetime_count += 1
+                continue          
+            elif(type_id == 11):
+                path = self.linetime(type_id)
+                paths[name]["position"] = path
+                linetime_count += 1
+                continue
+            elif(type_id == 12):
+                path_spacing = self.linetime(type_id)
+                paths[name]["spacing"] = path_spacing
+                linetime_count += 1
+                continue
+            elif(type_id == 13):   
+                path_mix = self.linetime(type_id)   
+                paths[name]["mix"] = path_mix 
+                linetime_count += 1
+                continue                    
+            elif(type_id == 14):
+                two_color = self.linetime(14)
+                slots[name]["twoColor"] = two_color
+                linetime_count += 1
+                continue
+            break
             
-        return animations
+        animation = {
+            "bones":bones,
+            "slots":slots, 
+            "ik":iks, 
+            "transform": transforms,
+            "path": paths,
+            "deform": deform,
+            }
+        if len(drawOrder) != 0:
+            animation["drawOrder"] = drawOrder
+        animation["duration"] = duration
+        if len(events) != 0:
+            animation["events"] = events
+        if len(paths) != 0:
+            animation["path"] = paths
+        return key, animation
 
-    def parse(self):
+    def parse_model(self):
+        """解析为紧凑的 SkeletonModel，bones / slots / transform / path / skins 为记录对象"""
         skeleton_info = self.parse_skeleton_info()
         #判断spine和hash有一项是否为空 直接抛出错误 不支持的版本
         if len(skeleton_info) == 0 or len(skeleton_info["hash"]) == 0:
             raise Exception("Unsupported version")
-        print(f"skeleton_info length: {len(skeleton_info)}")
         bones = self.parse_bones()
-        print(f"bones length: {len(bones)}")
         ik = self.parse_ik()
-        print(f"ik length: {len(ik)}")
         slots = self.parse_slots()
-        print(f"slots length: {len(slots)}")
         self.solts_list = slots
         transform = self.parse_transform()
-        print(f"transform length: {len(transform)}")
         path = self.parse_path()
-        print(f"path length: {len(path)}")
         skins = self.parse_skins()
-        print(f"skins length: {len(skins)}")
         self.skins = skins
         events = self.parse_events()
-        print(f"events length: {len(events)}")
         self.events = events
         animations = self.parse_animations()
-        print(f"animations length: {len(animations)}")
-        print()   
-        return {
-            "skeleton": skeleton_info,
-            "slots": slots,
-            "skins": skins,
-            "bones": bones,
-            "ik": ik,
-            "transform": transform,
-            "path":path,
-            "events": events,
-            "animations": animations, 
+        self.counts = {
+            "bones": len(bones),
+            "ik": len(ik),
+            "slots": len(slots),
+            "transform": len(transform),
+            "path": len(path),
+            "skins": len(skins),
+            "events": len(events),
+            "animations": len(animations),
         }
+        return SkeletonModel(skeleton_info, bones, ik, slots, transform, path, skins, events, animations,
+                             self.reader.precision)
+
+    def parse(self):
+        """解析为 Spine JSON 结构"""
+        return self.parse_model().to_spine()
+
+
+# 只在 parse_animations_parallel 的工作进程中由 _init_animation_worker 设置
+_worker_parser = None
+
+
+def _init_animation_worker(parser):
+    """解码动画的工作进程初始化：记下继承来的解析器，丢弃从主进程继承的指标，之后只传回本进程产生的指标"""
+    global _worker_parser
+    _worker_parser = parser
+    METRICS.drain()
+
+
+def _decode_animations(starts):
+    """
+    工作进程中解码从各起始位置开始的动画
+    :return: ([(动画名, 动画)], 读取字节数, 指标快照)
+    """
+    parser = copy.copy(_worker_parser)
+    parser.reader = reader = copy.copy(parser.reader)
+    base = reader.consumed
+    animations = []
+    for start in starts:
+        reader.pos = start
+        key, animation = parser.parse_animation()
+        animations.append((key, plain_animation(animation)))
+    return animations, reader.consumed - base, METRICS.drain()
+
+
+def plain_animation(obj):
+    """把解码结果转成可在进程间传递的普通结构：defaultdict 转为 dict，延迟曲线字段求值"""
+    if isinstance(obj, dict):
+        return {key: plain_animation(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [plain_animation(value) for value in obj]
+    if isinstance(obj, LazyCurveValue):
+        return obj.value()
+    return obj
+
+
+def clean_floats(values, precision):
+    """按精度位数整理一组浮点数；低于默认精度时先用numpy整体舍入"""
+    if precision < FloatPrecision.DEFAULT["default"] and len(values):
+        values = np.round(np.asarray(values, dtype=np.float64), precision).tolist()
+    clean_float = BinaryReader.clean_float
+    return [clean_float(v, precision) for v in values]
+
+
+def format_counts(name, counts):
+    """解析结果概要，一次性写出一整行，多线程转换时不会交错"""
+    return f"{name}: " + ", ".join(f"{k} {v}" for k, v in counts.items())
+
+
+def convert_numpy_types(obj):
+    """将 numpy 类型转换为 Python 原生类型，以便 JSON 序列化"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()  # 转换为 Python 列表
+    elif isinstance(obj, list):
+        return [convert_numpy_types(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {key: convert_numpy_types(value) for key, value in obj.items()}
+    else:
+        return obj
+
+
+COMPRESS_SUFFIXES = {
+    None: '',
+    'gzip': '.gz',
+    'lz4': '.lz4',
+}
+
+
+class ByteCounter(io.RawIOBase):
+    """包装底层二进制流，统计写入的未压缩字节数"""
+    def __init__(self, stream, raw=None):
+        self.stream = stream
+        self.raw = raw
+        self.count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.count += len(data)
+        return self.stream.write(data)
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+            # gzip / lz4 包装内存文件时不会关闭底层文件，需要单独关闭
+            if self.raw is not None:
+                self.raw.close()
+        super().close()
 
 
-def batch_convert_decompressed_files(directory_path, extension='scsp'):
+class MemoryOutputs:
+    """
+    把输出文件收集在内存中而不写磁盘（写入打包文件时使用）
+    files 为 {输出路径: 文件内容 bytes}，文件关闭时记录
+    """
+    def __init__(self):
+        self.files = {}
+
+    def open(self, path):
+        return _MemoryFile(self.files, path)
+
+    def write(self, path, data):
+        self.files[path] = data
+
+    def getsize(self, path):
+        return len(self.files[path])
+
+
+class _MemoryFile(io.BytesIO):
+    def __init__(self, files, path):
+        super().__init__()
+        self.files = files
+        self.path = path
+
+    def close(self):
+        if not self.closed:
+            self.files[self.path] = self.getvalue()
+        super().close()
+
+
+def open_json_output(output_path, compress=None, compress_level=None, memory=None):
+    """
+    打开JSON输出文本流，按需经 gzip / lz4 frame 压缩后写入
+    :param memory: MemoryOutputs，传入时写到内存而不是磁盘
+    返回 (文本流, 字节计数器)，计数器记录压缩前写入的字节数
+    """
+    if memory is not None:
+        return open_json_stream(memory.open(output_path), compress, compress_level)
+    if compress is None:
+        stream = open(output_path, 'wb')
+    elif compress == 'gzip':
+        import gzip
+        stream = gzip.open(output_path, 'wb', compresslevel=6 if compress_level is None else compress_level)
+    elif compress == 'lz4':
+        import lz4.frame
+        stream = lz4.frame.open(output_path, 'wb', compression_level=0 if compress_level is None else compress_level)
+    else:
+        raise ValueError(f"不支持的压缩方式: {compress}")
+    counter = ByteCounter(stream)
+    return io.TextIOWrapper(io.BufferedWriter(counter), encoding='utf-8'), counter
+
+
+def open_json_stream(raw, compress=None, compress_level=None):
+    """
+    把已打开的二进制流（内存文件、stdout）包装为JSON输出文本流，关闭文本流时一并关闭 raw
+    返回值同 open_json_output
+    """
+    if compress is None:
+        stream, raw = raw, None
+    elif compress == 'gzip':
+        import gzip
+        stream = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6 if compress_level is None else compress_level)
+    elif compress == 'lz4':
+        import lz4.frame
+        stream = lz4.frame.open(raw, 'wb', compression_level=0 if compress_level is None else compress_level)
+    else:
+        raise ValueError(f"不支持的压缩方式: {compress}")
+    counter = ByteCounter(stream, raw)
+    return io.TextIOWrapper(io.BufferedWriter(counter), encoding='utf-8'), counter
+
+
+def find_target_files(directory_path, extension, include=None, exclude=None):
+    """查找目录下所有指定扩展名的文件，包括子目录；include / exclude 见 file_selection"""
+    return file_selection.walk_files(directory_path, extension, include, exclude)
+
+
+def output_json_path(input_file, directory_path, extension):
+    """
+    创建输出JSON文件名 - 保持原有逻辑，但保留相对路径结构
+    """
+    # 获取相对于输入目录的路径
+    rel_path = os.path.relpath(input_file, directory_path)
+    # 处理文件名 - 去掉指定扩展名以及之前的所有扩展名部分
+    base_name = os.path.basename(rel_path)
+    dir_name = os.path.dirname(rel_path)
+    
+    # 只去掉指定扩展名后缀
+    if base_name.lower().endswith(extension.lower()):
+        base_name = base_name[:-len(extension)]
+        # 如果仍然包含点号，则只保留第一个点号之前的部分
+        if '.' in base_name:
+            base_name = base_name.split('.')[0]
+    
+    # 构建输出路径，保持原有的子目录结构
+    return os.path.join(directory_path, dir_name, f"{base_name}.json")
+
+
+def write_json(result, f, chunk_size=1 << 20):
+    """
+    序列化并写出JSON，按约 chunk_size 个字符分批写入
+    :return: (序列化耗时, 写入耗时)
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, use_decimal=True, default=json_default)
+    start = time.perf_counter()
+    write_seconds = 0.0
+    chunks = []
+    size = 0
+    for chunk in encoder.iterencode(result):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            write_start = time.perf_counter()
+            f.write(''.join(chunks))
+            write_seconds += time.perf_counter() - write_start
+            chunks = []
+            size = 0
+    write_start = time.perf_counter()
+    f.write(''.join(chunks))
+    f.flush()
+    write_seconds += time.perf_counter() - write_start
+    return time.perf_counter() - start - write_seconds, write_seconds
+
+
+def write_json_file(obj, output_path, compress=None, compress_level=None, memory=None):
+    """
+    把一个对象写成（可选压缩的）JSON文件
+    :param memory: MemoryOutputs，传入时写到内存而不是磁盘
+    :return: (压缩前字节数, 写入磁盘字节数, 序列化耗时, 写入耗时)
+    """
+    f, counter = open_json_output(output_path, compress, compress_level, memory)
+    with f:
+        serialize_seconds, write_seconds = write_json(obj, f)
+    written = memory.getsize(output_path) if memory is not None else os.path.getsize(output_path)
+    return counter.count, written, serialize_seconds, write_seconds
+
+
+def shard_file_name(name, used):
+    """动画名转为安全的分片文件名，重名时追加序号"""
+    safe = re.sub(r'[^\w.-]', '_', name).strip('.') or 'animation'
+    candidate = safe
+    n = 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{safe}_{n}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def write_sharded(result, output_json, compress=None, compress_level=None, memory=None):
+    """
+    按动画分片写出：
+      xxx.json                 基础文件（skeleton/bones/slots/skins/events 等，不含 animations）
+      xxx.animations/<动画>.json 每个动画一个分片，内容为 animations[动画名] 的值
+      xxx.index.json           索引，记录基础文件和每个分片的路径、字节数与动画时长
+    索引中的路径相对于索引文件所在目录，字节数为磁盘上的文件大小（压缩时为压缩后大小）
+    :return: (输出文件列表, 压缩前总字节数, 写入磁盘总字节数, 序列化耗时, 写入耗时)
+    """
+    suffix = COMPRESS_SUFFIXES[compress]
+    stem = output_json[:-len('.json')]
+    shard_dir = stem + '.animations'
+    base_name = os.path.basename(stem)
+    outputs = []
+    totals = [0, 0, 0.0, 0.0]
+
+    def write(obj, path):
+        sizes = write_json_file(obj, path, compress, compress_level, memory)
+        for i, value in enumerate(sizes):
+            totals[i] += value
+        outputs.append(path)
+        return sizes[1]
+
+    base = {k: v for k, v in result.items() if k != 'animations'}
+    base_path = output_json + suffix
+    index = {
+        "skeleton": result["skeleton"],
+        "base": {"file": os.path.basename(base_path), "bytes": write(base, base_path)},
+        "animations": {},
+    }
+    used = set()
+    for name, animation in result["animations"].items():
+        if not used and memory is None:
+            os.makedirs(shard_dir, exist_ok=True)
+        file_name = shard_file_name(name, used) + '.json' + suffix
+        shard_path = os.path.join(shard_dir, file_name)
+        index["animations"][name] = {
+            "file": f"{base_name}.animations/{file_name}",
+            "bytes": write(animation, shard_path),
+            "duration": animation.get("duration", 0),
+        }
+    # 索引很小且需要先被客户端读取，始终不压缩
+    index_path = stem + '.index.json'
+    raw, written, serialize_seconds, write_seconds = write_json_file(index, index_path, memory=memory)
+    outputs.append(index_path)
+    return (outputs, totals[0] + raw, totals[1] + written,
+            totals[2] + serialize_seconds, totals[3] + write_seconds)
+
+
+def convert_file(input_file, output_json, output_format='json', compress=None, compress_level=None,
+                 precision=None, precision_report=False, bundle=False, budget=None, curve_mode='fit',
+                 animation_workers=1, data=None):
+    """
+    转换单个文件并写出结果，出错时直接抛出异常
+    :param bundle: 为 True 时不写磁盘，输出以 {输出路径: bytes} 放在 stats['files'] 中，由主进程写入打包文件
+    :param budget: 解析预算 {"time_budget": 秒, "read_budget": 文件大小倍数}，见 BinaryReader
+    :param curve_mode: 贝塞尔曲线输出方式 fit / raw / lazy，见 ScspParser.read_curve
+    :param animation_workers: 单个文件内解码动画的进程数，见 ScspParser.parse_animations_parallel
+    :param data: 已在内存中的输入内容（如归档成员），为 None 时读取 input_file
+    :return: 本文件的输出统计字典
+    """
+    result, stats = parse_file(input_file, precision, precision_report, budget, curve_mode, animation_workers, data)
+    return write_result(result, stats, output_json, output_format, compress, compress_level, bundle)
+
+
+def parse_file(input_file, precision=None, precision_report=False, budget=None, curve_mode='fit',
+               animation_workers=1, data=None):
+    """
+    解析单个文件（convert_file 的解析部分），参数同 convert_file
+    :return: (Spine JSON 结构, 输出统计字典)，precision_report 时统计中已有量化前后的JSON字节数
+    """
+    stats = {
+        'outputs': [],
+        'raw_bytes': 0,
+        'written_bytes': 0,
+        'write_seconds': 0.0,
+        'full_json_bytes': 0,
+        'quantized_json_bytes': 0,
+        'skel_bytes': 0,
+    }
+    with METRICS.time("scsp_stage_duration_seconds", stage="parse"):
+        reader =  BinaryReader(input_file, precision=precision, data=data, **(budget or {}))
+        parser = ScspParser(reader, curve_mode, animation_workers)
+        result = parser.parse()
+        
+        result = convert_numpy_types(result)
+    sys.stderr.write(format_counts(input_file, parser.counts) + "\n")
+
+    if precision_report:
+        # 以默认精度重新解析一次，对比量化前后的JSON大小
+        full = convert_numpy_types(ScspParser(BinaryReader(input_file, data=reader.data, **(budget or {})), curve_mode,
+                                                  animation_workers).parse())
+        stats['full_json_bytes'] = len(json.dumps(full, ensure_ascii=False, use_decimal=True, default=json_default).encode('utf-8'))
+        stats['quantized_json_bytes'] = len(json.dumps(result, ensure_ascii=False, use_decimal=True, default=json_default).encode('utf-8'))
+    return result, stats
+
+
+def write_result(result, stats, output_json, output_format='json', compress=None, compress_level=None, bundle=False):
+    """
+    序列化并写出一个文件的解析结果（convert_file 的输出部分），参数同 convert_file
+    :return: 更新后的输出统计字典
+    """
+    memory = MemoryOutputs() if bundle else None
+    # 确保输出目录存在
+    output_dir = os.path.dirname(output_json)
+    if output_dir and memory is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if output_format in ('json', 'both'):
+        # 写入JSON文件
+        output_path = output_json + COMPRESS_SUFFIXES[compress]
+        raw_bytes, written_bytes, serialize_seconds, write_seconds = write_json_file(
+            result, output_path, compress, compress_level, memory)
+        stats['outputs'].append(output_path)
+    if output_format == 'sharded':
+        # 基础文件 + 每个动画一个分片 + 索引
+        outputs, raw_bytes, written_bytes, serialize_seconds, write_seconds = write_sharded(
+            result, output_json, compress, compress_level, memory)
+        stats['outputs'].extend(outputs)
+    if output_format in ('json', 'both', 'sharded'):
+        METRICS.observe("scsp_stage_duration_seconds", serialize_seconds, stage="serialize")
+        METRICS.observe("scsp_stage_duration_seconds", write_seconds, stage="write")
+        stats['write_seconds'] = write_seconds
+        stats['raw_bytes'] = raw_bytes
+        stats['written_bytes'] = written_bytes
+    if output_format in ('skel', 'both'):
+        # 写入Spine二进制骨骼文件
+        import scsp_json_to_skel
+        output_skel = output_json[:-len('.json')] + '.skel'
+        with METRICS.time("scsp_stage_duration_seconds", stage="skel"):
+            if memory is not None:
+                skel_data = scsp_json_to_skel.SkelExporter(result).export()
+                memory.write(output_skel, skel_data)
+                stats['skel_bytes'] = len(skel_data)
+            else:
+                stats['skel_bytes'] = scsp_json_to_skel.export_skel(result, output_skel)
+        stats['outputs'].append(output_skel)
+    if memory is not None:
+        stats['files'] = memory.files
+    return stats
+
+
+def convert_file_in_process(*args):
+    """在工作进程中转换，本文件产生的指标随结果一起传回主进程"""
+    stats = convert_file(*args)
+    stats['metrics'] = METRICS.drain()
+    return stats
+
+
+# LZ4 frame 格式的魔数，管道模式下据此自动解压输入
+LZ4_FRAME_MAGIC = b'\x04\x22\x4d\x18'
+
+
+def convert_stream(data, out, output_format='json', compress=None, compress_level=None,
+                   precision=None, block_lz4=False, name='<stdin>', budget=None, curve_mode='fit',
+                   animation_workers=1):
+    """
+    管道模式：转换内存中的一份 SCSP 数据，结果写到二进制流 out（如 stdout），诊断信息全部在 stderr
+    输入为 LZ4 frame 格式时自动解压；block_lz4=True 时按 lz4_processor 的分块格式解压
+    :param output_format: json 或 skel（skel 不受 compress 影响）
+    :param budget: 解析预算，同 convert_file
+    :param curve_mode: 贝塞尔曲线输出方式，同 convert_file
+    :param animation_workers: 解码动画的进程数，同 convert_file
+    :return: 写出的字节数（JSON为压缩前字节数）
+    """
+    if output_format not in ('json', 'skel'):
+        raise ValueError(f"管道模式只支持 json / skel 输出格式: {output_format}")
+    check_curve_mode(curve_mode, output_format)
+    if data[:4] == LZ4_FRAME_MAGIC:
+        import lz4.frame
+        with METRICS.time("scsp_stage_duration_seconds", stage="lz4"):
+            data = lz4.frame.decompress(data)
+    elif block_lz4:
+        import lz4_processor
+        data = lz4_processor.decompress_bytes(data)
+
+    with METRICS.time("scsp_stage_duration_seconds", stage="parse"):
+        parser = ScspParser(BinaryReader(name, precision=precision, data=data, **(budget or {})),
+                            curve_mode, animation_workers)
+        result = convert_numpy_types(parser.parse())
+    sys.stderr.write(format_counts(name, parser.counts) + "\n")
+
+    if output_format == 'skel':
+        import scsp_json_to_skel
+        with METRICS.time("scsp_stage_duration_seconds", stage="skel"):
+            skel_data = scsp_json_to_skel.SkelExporter(result).export()
+        out.write(skel_data)
+        out.close()
+        return len(skel_data)
+    f, counter = open_json_stream(out, compress, compress_level)
+    with f:
+        serialize_seconds, write_seconds = write_json(result, f)
+    METRICS.observe("scsp_stage_duration_seconds", serialize_seconds, stage="serialize")
+    METRICS.observe("scsp_stage_duration_seconds", write_seconds, stage="write")
+    return counter.count
+
+
+def batch_convert_decompressed_files(directory_path, extension='scsp', output_format='json',
+                                     compress=None, compress_level=None,
+                                     precision=None, precision_report=False,
+                                     jobs=1, max_memory=None, metrics_path=None, metrics_interval=15.0,
+                                     lz4=False, bundle_path=None, backend='process',
+                                     file_timeout=600.0, read_budget=64.0, curve_mode='fit',
+                                     animation_workers=1, pipeline_workers=None, queue_size=None,
+                                     files=None, include=None, exclude=None, shard=None, shard_balance=False):
     """
     批量转换指定目录下的所有指定扩展名文件为JSON格式
-    :param directory_path: 包含指定扩展名文件的目录路径
+    :param directory_path: 包含指定扩展名文件的目录路径，也可以是 zip / tar 归档（见 archive_input）
     :param extension: 要查找的文件扩展名，默认为.scsp
+    :param output_format: 输出格式 json / skel / both / sharded（按动画分片，见 write_sharded），默认为json
+    :param compress: JSON输出压缩方式 gzip / lz4，默认不压缩
+    :param compress_level: 压缩等级，默认使用各压缩方式的默认等级
+    :param precision: 各类别浮点数保留的小数位数，见 FloatPrecision，默认为不量化
+    :param precision_report: 是否统计量化前后的JSON大小（会额外以默认精度解析一次）
+    :param jobs: 并行转换的进程数，默认为1（在当前进程中顺序转换）
+    :param max_memory: 并行转换的内存预算（字节），设置后按预算调度并记录每个文件的峰值内存
+    :param metrics_path: 指标输出文件，.json 为 JSON 快照，其余为 Prometheus textfile，默认不输出
+    :param metrics_interval: 转换过程中定期写出指标文件的间隔（秒）
+    :param lz4: 输入为归档或 backend 为 pipeline 时，是否在内存中对 .scsp 文件做 LZ4 解压
+    :param bundle_path: 打包输出文件（.zip / .tar / 其他为索引包，见 bundle_output），
+                        设置后所有输出以相对路径写入该文件而不是逐个写磁盘
+    :param backend: jobs > 1 时的并行方式：process 为进程池（按内存预算调度），
+                    thread 为线程池（共享一次 numpy 导入，free-threaded Python 上可多核解析，
+                    普通构建上也能让读写与解析重叠；不做内存预算调度），
+                    pipeline 为分阶段流水线（见 staged_pipeline，不受 jobs 限制，jobs 为解析线程数的默认值）
+    :param file_timeout: 单个文件的最长解析耗时（秒），超时的文件记入错误汇总，None 为不限制
+    :param read_budget: 单个文件累计读取字节数上限（文件大小的倍数），None 为不限制
+    :param curve_mode: 贝塞尔曲线输出方式 fit（拟合）/ raw（输出采样点）/ lazy（序列化时才拟合）
+    :param animation_workers: 单个文件内解码动画的进程数（大骨骼文件），见 ScspParser.parse_animations_parallel
+    :param pipeline_workers: pipeline 各阶段线程数 {阶段名: 线程数}，见 staged_pipeline.parse_workers
+    :param queue_size: pipeline 各阶段输入队列的容量，默认为 staged_pipeline.DEFAULT_QUEUE_SIZE
+    :param files: 明确给出的输入文件列表（如 --from-list），设置后不遍历目录，
+                  只处理其中指定扩展名的文件，输出路径仍相对于 directory_path
+    :param include: 只处理匹配其中任一模式的文件（相对路径的 fnmatch 模式，见 file_selection）
+    :param exclude: 不处理匹配其中任一模式的文件；目录命中时整个跳过
+    :param shard: (index, count)，只转换选出的文件中属于第 index 个节点分片的部分，见 node_shards
+    :param shard_balance: 按文件大小均衡分片，否则按相对路径哈希分片
+    :return: 每个文件的结果 [{"file": 相对路径, "bytes", "status": ok / error, "outputs": [相对路径], "error"}]，
+             节点分片时由调用方写入结果清单
     """
-    import os
-    import glob
+    if backend not in ('process', 'thread', 'pipeline'):
+        raise ValueError(f"不支持的并行方式: {backend}")
+    if jobs < 1:
+        raise ValueError(f"无效的并行数: {jobs}，应不小于 1")
+    if output_format not in ('json', 'skel', 'both', 'sharded'):
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    check_curve_mode(curve_mode, output_format)
+    if compress not in COMPRESS_SUFFIXES:
+        raise ValueError(f"不支持的压缩方式: {compress}")
+    if (animation_workers > 1 and not os.path.isfile(directory_path)
+            and (backend == 'pipeline' or (backend == 'thread' and jobs > 1))):
+        # 多线程中 fork 可能死锁，parse_animations_parallel 只会按顺序解码
+        raise ValueError(f"--animation-workers 不能与 {backend} 并行方式同时使用，请改用 process 后端")
     extension = f".{extension.lstrip('.')}"  # 确保扩展名前有点号
-    # 查找目录下所有指定扩展名的文件，包括子目录
-    target_files = []
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            if file.lower().endswith(extension.lower()):
-                target_files.append(os.path.join(root, file))
+    archive = None
+    if os.path.isfile(directory_path):
+        # 归档输入：成员按归档内顺序读入内存转换，输出写到与归档同名的目录
+        import archive_input
+        if not archive_input.is_archive(directory_path):
+            raise ValueError(f"不支持的归档文件: {directory_path}")
+        archive = archive_input.ArchiveInput(directory_path, lz4=lz4)
+        output_root = archive_input.default_output_dir(directory_path)
+        if files is not None:
+            print("归档输入按成员名选择文件，忽略文件列表")
+        target_files = [name for name in archive.find_members(extension)
+                        if file_selection.matches(name, include, exclude)]
+    elif files is not None:
+        output_root = directory_path
+        target_files = file_selection.select_listed(files, directory_path, extension, include, exclude)
+    else:
+        output_root = directory_path
+        target_files = find_target_files(directory_path, extension, include, exclude)
     
     if not target_files:
-        print(f"在目录 {directory_path} 及其子目录中未找到 {extension} 文件")
-        return
+        print(f"在 {directory_path} 中未找到 {extension} 文件")
+        return []
     
     print(f"找到 {len(target_files)} 个 {extension} 文件")
+
+    if archive is not None:
+        file_sizes = {name: archive.size(name) for name in target_files}
+        relative_path = str
+    else:
+        file_sizes = {input_file: os.path.getsize(input_file) for input_file in target_files}
+
+        def relative_path(path):
+            return node_shards.relative_key(path, output_root)
+    if shard is not None:
+        target_files = node_shards.select_shard(target_files, shard, relative_path,
+                                                file_sizes if shard_balance else None)
+        print(f"节点分片 {shard[0]}/{shard[1]}: 本节点转换其中 {len(target_files)} 个文件")
+    if archive is None:
+        # 按文件大小从大到小排序（LPT），避免并行时大文件最后才开始成为拖尾
+        target_files.sort(key=file_sizes.get, reverse=True)
+    progress = BatchProgress(len(target_files), sum(file_sizes.values()))
+    bundle = None
+    if bundle_path is not None:
+        import bundle_output
+        bundle = bundle_output.open_bundle(bundle_path)
+    metrics_writer = MetricsWriter(METRICS, metrics_path, metrics_interval)
     
     # 创建错误记录列表
     error_records = []
-    
-    for input_file in target_files:
-        try:
-            print(f"正在处理: {input_file}")
-            
-            # 创建输出JSON文件名 - 保持原有逻辑，但保留相对路径结构
-            # 获取相对于输入目录的路径
-            rel_path = os.path.relpath(input_file, directory_path)
-            # 处理文件名 - 去掉指定扩展名以及之前的所有扩展名部分
-            base_name = os.path.basename(rel_path)
-            dir_name = os.path.dirname(rel_path)
-            
-            # 只去掉指定扩展名后缀
-            if base_name.lower().endswith(extension.lower()):
-                base_name = base_name[:-len(extension)]
-                # 如果仍然包含点号，则只保留第一个点号之前的部分
-                if '.' in base_name:
-                    base_name = base_name.split('.')[0]
-            
-            # 构建输出路径，保持原有的子目录结构
-            output_json = os.path.join(directory_path, dir_name, f"{base_name}.json")
-            
-            # 确保输出目录存在
-            output_dir = os.path.dirname(output_json)
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-            
-            # 解析文件
-            reader =  BinaryReader(input_file)
-            parser = ScspParser(reader)
-            result = parser.parse()
-            
-            # 将 numpy 类型转换为 Python 原生类型，以便 JSON 序列化
-            def convert_numpy_types(obj):
-                import numpy as np
-                if isinstance(obj, np.integer):
-                    return int(obj)
-                elif isinstance(obj, np.floating):
-                    return float(obj)
-                elif isinstance(obj, np.ndarray):
-                    return obj.tolist()  # 转换为 Python 列表
-                elif isinstance(obj, list):
-                    return [convert_numpy_types(item) for item in obj]
-                elif isinstance(obj, dict):
-                    return {key: convert_numpy_types(value) for key, value in obj.items()}
-                else:
-                    return obj
+    # 每个文件的结果，按完成顺序
+    records = []
+    # JSON输出统计：压缩前字节数、写入磁盘字节数、写入耗时；量化前后的JSON字节数
+    totals = defaultdict(float)
 
-            result = convert_numpy_types(result)
-            
-            # 写入JSON文件
-            with open(output_json, 'w', encoding='utf-8') as f:
-                json.dump(result, f,ensure_ascii=False, use_decimal=True)
-            
-            print(f"成功转换: {os.path.basename(input_file)} -> {os.path.basename(output_json)}")
-        
-        except Exception as e:
+    def on_done(input_file, stats, error, memory=None):
+        progress.update(file_sizes[input_file], failed=error is not None)
+        METRICS.inc("scsp_input_bytes_total", file_sizes[input_file])
+        records.append({
+            "file": relative_path(input_file),
+            "bytes": file_sizes[input_file],
+            "status": "ok" if error is None else "error",
+            "outputs": [] if error is not None else
+                       [node_shards.relative_key(path, output_root) for path in stats['outputs']],
+            "error": error,
+        })
+        if error is not None:
+            METRICS.inc("scsp_files_failed_total")
+            metrics_writer.maybe_write()
             # 记录错误信息和完整文件路径到列表
             error_records.append({
-                'file_path': input_file,
-                'error_message': str(e)
+                'file_path': archive.display_path(input_file) if archive is not None else input_file,
+                'error_message': error
             })
+            return
+        METRICS.merge(stats.get('metrics'))
+        if bundle is not None:
+            # 成员名为相对于输出根目录的路径，与逐个写磁盘时的目录结构一致
+            for path, data in stats['files'].items():
+                bundle.add(os.path.relpath(path, output_root).replace(os.sep, '/'), data)
+        METRICS.inc("scsp_files_converted_total")
+        METRICS.inc("scsp_output_bytes_total", stats['written_bytes'] + stats['skel_bytes'])
+        metrics_writer.maybe_write()
+        for key in ('raw_bytes', 'written_bytes', 'write_seconds', 'full_json_bytes', 'quantized_json_bytes'):
+            totals[key] += stats[key]
+
+    budget = {"time_budget": file_timeout, "read_budget": read_budget}
+    options = (output_format, compress, compress_level, precision, precision_report, bundle is not None, budget,
+               curve_mode, animation_workers)
+    if archive is not None:
+        if jobs > 1 or max_memory is not None:
+            print("归档输入按成员顺序在当前进程中转换，忽略 --jobs / --max-memory")
+        with archive:
+            for name in target_files:
+                try:
+                    output_path = archive_input.member_output_path(output_root, name)
+                    output_json = output_json_path(output_path, output_root, extension)
+                    stats = convert_file(archive.display_path(name), output_json, *options, data=archive.read(name))
+                except Exception as e:
+                    on_done(name, None, str(e))
+                    continue
+                on_done(name, stats, None)
+    elif backend == 'pipeline':
+        import staged_pipeline
+        if max_memory is not None:
+            print("流水线按队列容量限制同时处理的文件数，忽略 --max-memory")
+        workers = pipeline_workers or staged_pipeline.parse_workers(None, jobs)
+
+        def read_stage(input_file, _):
+            with open(input_file, 'rb') as f:
+                return f.read()
+
+        def lz4_stage(input_file, data):
+            import lz4_processor
+            return lz4_processor.decompress_bytes(data)
+
+        def parse_stage(input_file, data):
+            return parse_file(input_file, precision, precision_report, budget, curve_mode, animation_workers, data)
+
+        def serialize_stage(input_file, parsed):
+            # 输出先序列化（并压缩）到内存，由 write 阶段写盘或在主线程中写入打包文件
+            result, stats = parsed
+            return write_result(result, stats, output_json_path(input_file, directory_path, extension),
+                                output_format, compress, compress_level, bundle=True)
+
+        def write_stage(input_file, stats):
+            start = time.perf_counter()
+            for path, data in stats.pop('files').items():
+                output_dir = os.path.dirname(path)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            stats['write_seconds'] += time.perf_counter() - start
+            return stats
+
+        stages = [staged_pipeline.Stage('read', read_stage, workers['read'])]
+        if lz4:
+            stages.append(staged_pipeline.Stage('lz4', lz4_stage, workers['lz4']))
+        stages.append(staged_pipeline.Stage('parse', parse_stage, workers['parse']))
+        stages.append(staged_pipeline.Stage('serialize', serialize_stage, workers['serialize']))
+        if bundle is None:
+            stages.append(staged_pipeline.Stage('write', write_stage, workers['write']))
+        pipeline = staged_pipeline.Pipeline(stages, queue_size or staged_pipeline.DEFAULT_QUEUE_SIZE)
+        # 结果在主线程中汇总（进度、指标、打包输出都只在主线程更新）
+        pipeline.run(((input_file, None) for input_file in target_files), on_done)
+    elif jobs > 1 and backend == 'thread':
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        if max_memory is not None:
+            print("线程池不做内存预算调度，忽略 --max-memory")
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # 按 LPT 顺序提交，结果在主线程中汇总（进度、指标、打包输出都只在主线程更新）
+            futures = {
+                executor.submit(convert_file, input_file, output_json_path(input_file, directory_path, extension), *options): input_file
+                for input_file in target_files
+            }
+            for future in as_completed(futures):
+                input_file = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    on_done(input_file, None, str(e))
+                    continue
+                on_done(input_file, stats, None)
+    elif jobs > 1 or max_memory is not None:
+        import memory_scheduler
+        tasks = [(input_file, input_file, (input_file, output_json_path(input_file, directory_path, extension)) + options)
+                 for input_file in target_files]
+        peaks = memory_scheduler.run_scheduled(tasks, convert_file_in_process, jobs=jobs, max_memory=max_memory, on_done=on_done)
+        if peaks and max_memory is not None:
+            top = max(peaks, key=lambda p: p['peak'])
+            print(f"\n内存峰值最高: {top['file_path']} {top['peak'] / memory_scheduler.MB:.1f} MB"
+                  f" (估计 {top['estimate'] / memory_scheduler.MB:.1f} MB)")
+    else:
+        for input_file in target_files:
+            try:
+                output_json = output_json_path(input_file, directory_path, extension)
+                stats = convert_file(input_file, output_json, *options)
+            except Exception as e:
+                on_done(input_file, None, str(e))
+                continue
+            on_done(input_file, stats, None)
+
+    if bundle is not None:
+        bundle.close()
+        print(f"\n打包输出: {bundle_path} ({len(bundle.index)} 个成员，{os.path.getsize(bundle_path) / (1024 * 1024):.2f} MB)")
     
+    raw_bytes = totals['raw_bytes']
+    written_bytes = totals['written_bytes']
+    write_seconds = totals['write_seconds']
+    if raw_bytes:
+        mb = 1024 * 1024
+        print(f"\nJSON 输出: {raw_bytes / mb:.2f} MB -> {written_bytes / mb:.2f} MB"
+              f" (压缩比 {raw_bytes / max(written_bytes, 1):.2f}x)，"
+              f"写入耗时 {write_seconds:.2f}s，吞吐 {raw_bytes / mb / max(write_seconds, 1e-9):.2f} MB/s")
+
+    full_json_bytes = totals['full_json_bytes']
+    quantized_json_bytes = totals['quantized_json_bytes']
+    if full_json_bytes:
+        mb = 1024 * 1024
+        print(f"\n浮点量化: {full_json_bytes / mb:.2f} MB -> {quantized_json_bytes / mb:.2f} MB"
+              f" (减少 {(1 - quantized_json_bytes / full_json_bytes) * 100:.1f}%)")
+
+    metrics_writer.write()
+
     # 最后统一打印错误信息
     if error_records:
         print(f"\n=== 错误汇总 ===")
@@ -1243,6 +2060,7 @@ def batch_convert_decompressed_files(directory_path, extension='scsp'):
             print(f"   错误: {record['error_message']}\n")
     else:
         print(f"\n所有文件转换完成，无错误发生！")
+    return records
 
 
 if __name__ == "__main__":
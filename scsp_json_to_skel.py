@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+将 ScspParser.parse 得到的骨骼数据写为 Spine 3.8 二进制骨骼 (.skel)
+格式参考 Spine 3.8 运行时 SkeletonBinary：大端序，变长整数，字符串常量池
+"""
+import struct
+
+
+class SkelOutput:
+    """Spine 二进制写入器，与 SkeletonBinary 的读取方法一一对应"""
+    def __init__(self):
+        self.buf = bytearray()
+
+    def byte(self, v):
+        self.buf += struct.pack('>b', v)
+
+    def boolean(self, v):
+        self.buf += b'\x01' if v else b'\x00'
+
+    def short(self, v):
+        self.buf += struct.pack('>h', int(v))
+
+    def int32(self, v):
+        self.buf += struct.pack('>i', int(v))
+
+    def float32(self, v):
+        self.buf += struct.pack('>f', float(v))
+
+    def varint(self, v, optimize_positive=True):
+        v = int(v)
+        if not optimize_positive:
+            v = (v << 1) ^ (v >> 31)
+        # 负数按32位无符号写出（与 Java writeInt(v, true) 一致，占5字节）
+        v &= 0xFFFFFFFF
+        while True:
+            b = v & 0x7F
+            v >>= 7
+            if v:
+                self.buf.append(b | 0x80)
+            else:
+                self.buf.append(b)
+                return
+
+    def string(self, v):
+        """字符串：长度+1 后跟 UTF-8 字节，None 写 0，空串写 1"""
+        if v is None:
+            self.varint(0)
+            return
+        data = str(v).encode('utf-8')
+        self.varint(len(data) + 1)
+        self.buf += data
+
+    def float_array(self, values):
+        for v in values:
+            self.float32(v)
+
+    def short_array(self, values):
+        self.varint(len(values))
+        for v in values:
+            self.short(v)
+
+
+class SkelExporter:
+    TRANSFORM_MODES = ["normal", "onlyTranslation", "noRotationOrReflection", "noScale", "noScaleOrReflection"]
+    BLEND_MODES = ["normal", "additive", "multiply", "screen"]
+    ATTACHMENT_TYPES = ["region", "boundingbox", "mesh", "linkedmesh", "path", "point", "clipping"]
+    POSITION_MODES = ["fixed", "percent"]
+    SPACING_MODES = ["length", "fixed", "percent"]
+    ROTATE_MODES = ["tangent", "chain", "chainScale"]
+
+    BONE_ROTATE, BONE_TRANSLATE, BONE_SCALE, BONE_SHEAR = 0, 1, 2, 3
+    SLOT_ATTACHMENT, SLOT_COLOR, SLOT_TWO_COLOR = 0, 1, 2
+    PATH_POSITION, PATH_SPACING, PATH_MIX = 0, 1, 2
+    CURVE_LINEAR, CURVE_STEPPED, CURVE_BEZIER = 0, 1, 2
+
+    def __init__(self, skeleton):
+        self.skeleton = skeleton
+        self.strings = []
+        self.strings_lookup = {}
+        self.bones_index = {b["name"]: i for i, b in enumerate(skeleton.get("bones", []))}
+        self.slots_index = {s["name"]: i for i, s in enumerate(skeleton.get("slots", []))}
+        self.ik_index = {c["name"]: i for i, c in enumerate(skeleton.get("ik", []))}
+        self.transform_index = {c["name"]: i for i, c in enumerate(skeleton.get("transform", []))}
+        self.path_index = {c["name"]: i for i, c in enumerate(skeleton.get("path", []))}
+        self.events_index = {name: i for i, name in enumerate(skeleton.get("events", {}))}
+        # 二进制中默认皮肤固定排在第一位，其余皮肤按原顺序跟随
+        skins = skeleton.get("skins", [])
+        self.default_skin = next((s for s in skins if s["name"] == "default" and s["attachments"]), None)
+        self.other_skins = [s for s in skins if s is not self.default_skin]
+        ordered = ([self.default_skin] if self.default_skin else []) + self.other_skins
+        self.skins_index = {s["name"]: i for i, s in enumerate(ordered)}
+
+    def string_ref(self, out, v):
+        """字符串常量池引用：索引+1，None 写 0"""
+        if v is None:
+            out.varint(0)
+            return
+        index = self.strings_lookup.get(v)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(v)
+            self.strings_lookup[v] = index
+        out.varint(index + 1)
+
+    @staticmethod
+    def color_int(hex_color, default="FFFFFFFF"):
+        return int(hex_color or default, 16)
+
+    @staticmethod
+    def is_weighted(vertices, vertex_count):
+        return len(vertices) != vertex_count * 2
+
+    def export(self):
+        info = self.skeleton["skeleton"]
+        version = str(info.get("spine", ""))
+        if not version.startswith("3.8"):
+            raise ValueError(f"不支持导出的 Spine 版本: {version}")
+
+        body = SkelOutput()
+        self.write_bones(body)
+        self.write_slots(body)
+        self.write_ik(body)
+        self.write_transform(body)
+        self.write_path(body)
+        self.write_skins(body)
+        self.write_events(body)
+        self.write_animations(body)
+
+        out = SkelOutput()
+        out.string(info.get("hash") or "")
+        out.string(version)
+        out.float32(info.get("x", 0))
+        out.float32(info.get("y", 0))
+        out.float32(info.get("width", 0))
+        out.float32(info.get("height", 0))
+        out.boolean(False)  # nonessential
+        out.varint(len(self.strings))
+        for s in self.strings:
+            out.string(s)
+        return bytes(out.buf + body.buf)
+
+    def write_bones(self, out):
+        bones = self.skeleton.get("bones", [])
+        out.varint(len(bones))
+        for i, bone in enumerate(bones):
+            out.string(bone["name"])
+            if i != 0:
+                out.varint(self.bones_index.get(bone.get("parent"), 0))
+            out.float32(bone.get("rotation", 0))
+            out.float32(bone.get("x", 0))
+            out.float32(bone.get("y", 0))
+            out.float32(bone.get("scaleX", 1))
+            out.float32(bone.get("scaleY", 1))
+            out.float32(bone.get("shearX", 0))
+            out.float32(bone.get("shearY", 0))
+            out.float32(bone.get("length", 0))
+            mode = bone.get("transform", "normal")
+            out.varint(self.TRANSFORM_MODES.index(mode) if mode in self.TRANSFORM_MODES else 0)
+            out.boolean(bone.get("skin", False))
+
+    def write_slots(self, out):
+        slots = self.skeleton.get("slots", [])
+        out.varint(len(slots))
+        for slot in slots:
+            out.string(slot["name"])
+            out.varint(self.bones_index.get(slot.get("bone"), 0))
+            out.int32(self.signed_color(slot.get("color")))
+            dark = slot.get("darkColor")
+            out.int32(int(dark[:6], 16) if dark else -1)
+            self.string_ref(out, slot.get("attachment"))
+            blend = slot.get("blend", "normal")
+            out.varint(self.BLEND_MODES.index(blend) if blend in self.BLEND_MODES else 0)
+
+    def write_bone_list(self, out, names):
+        out.varint(len(names))
+        for name in names:
+            out.varint(self.bones_index.get(name, 0))
+
+    def write_ik(self, out):
+        iks = self.skeleton.get("ik", [])
+        out.varint(len(iks))
+        for ik in iks:
+            out.string(ik["name"])
+            out.varint(ik.get("order", 0))
+            out.boolean(ik.get("skin", False))
+            self.write_bone_list(out, ik.get("bones", []))
+            out.varint(self.bones_index.get(ik.get("target"), 0))
+            out.float32(ik.get("mix", 1))
+            out.float32(ik.get("softness", 0))
+            out.byte(1 if ik.get("bendPositive", True) else -1)
+            out.boolean(ik.get("compress", False))
+            out.boolean(ik.get("stretch", False))
+            out.boolean(ik.get("uniform", False))
+
+    def write_transform(self, out):
+        transforms = self.skeleton.get("transform", [])
+        out.varint(len(transforms))
+        for t in transforms:
+            out.string(t["name"])
+            out.varint(t.get("order", 0))
+            out.boolean(t.get("skin", False))
+            self.write_bone_list(out, t.get("bones", []))
+            out.varint(self.bones_index.get(t.get("target"), 0))
+            out.boolean(t.get("local", False))
+            out.boolean(t.get("relative", False))
+            out.float32(t.get("rotation", 0))
+            out.float32(t.get("x", 0))
+            out.float32(t.get("y", 0))
+            out.float32(t.get("scaleX", 0))
+            out.float32(t.get("scaleY", 0))
+            out.float32(t.get("shearY", 0))
+            out.float32(t.get("rotateMix", 1))
+            out.float32(t.get("translateMix", 1))
+            out.float32(t.get("scaleMix", 1))
+            out.float32(t.get("shearMix", 1))
+
+    def write_path(self, out):
+        paths = self.skeleton.get("path", [])
+        out.varint(len(paths))
+        for p in paths:
+            out.string(p["name"])
+            out.varint(p.get("order", 0))
+            out.boolean(p.get("skin", False))
+            self.write_bone_list(out, p.get("bones", []))
+            out.varint(self.slots_index.get(p.get("target"), 0))
+            out.varint(self.mode_index(self.POSITION_MODES, p.get("positionMode")))
+            out.varint(self.mode_index(self.SPACING_MODES, p.get("spacingMode")))
+            out.varint(self.mode_index(self.ROTATE_MODES, p.get("rotateMode")))
+            out.float32(p.get("rotation", 0))
+            out.float32(p.get("position", 0))
+            out.float32(p.get("spacing", 0))
+            out.float32(p.get("rotateMix", 1))
+            out.float32(p.get("translateMix", 1))
+
+    @staticmethod
+    def mode_index(modes, mode):
+        return modes.index(mode) if mode in modes else 0
+
+    def write_skins(self, out):
+        if self.default_skin:
+            self.write_skin_attachments(out, self.default_skin)
+        else:
+            out.varint(0)
+        out.varint(len(self.other_skins))
+        for skin in self.other_skins:
+            self.string_ref(out, skin["name"])
+            # 皮肤约束（bones/ik/transform/path）在 SCSP 中未解析，全部写 0
+            for _ in range(4):
+                out.varint(0)
+            self.write_skin_attachments(out, skin)
+
+    def write_skin_attachments(self, out, skin):
+        slots = [(name, atts) for name, atts in skin["attachments"].items() if name in self.slots_index]
+        out.varint(len(slots))
+        for slot_name, attachments in slots:
+            out.varint(self.slots_index[slot_name])
+            out.varint(len(attachments))
+            for name, attachment in attachments.items():
+                self.string_ref(out, name)
+                self.write_attachment(out, name, attachment)
+
+    def write_attachment(self, out, name, attachment):
+        type = attachment.get("type", "region")
+        # linkedmesh 在 SCSP 中已带完整网格数据，按 mesh 写出
+        if type == "linkedmesh":
+            type = "mesh"
+        self.string_ref(out, None)  # 与 skin 中的名称相同
+        out.byte(self.ATTACHMENT_TYPES.index(type))
+        path = attachment.get("path") or name
+        if type == "region":
+            self.string_ref(out, path)
+            out.float32(attachment.get("rotation", 0))
+            out.float32(attachment.get("x", 0))
+            out.float32(attachment.get("y", 0))
+            out.float32(attachment.get("scaleX", 1))
+            out.float32(attachment.get("scaleY", 1))
+            out.float32(attachment.get("width", 0))
+            out.float32(attachment.get("height", 0))
+            out.int32(self.signed_color(attachment.get("color")))
+        elif type == "boundingbox":
+            vertex_count = attachment.get("vertexCount", 0)
+            out.varint(vertex_count)
+            self.write_vertices(out, attachment.get("vertices", []), vertex_count)
+        elif type == "mesh":
+            uvs = attachment.get("uvs", [])
+            vertex_count = len(uvs) // 2
+            self.string_ref(out, path)
+            out.int32(self.signed_color(attachment.get("color")))
+            out.varint(vertex_count)
+            out.float_array(uvs)
+            out.short_array(attachment.get("triangles", []))
+            self.write_vertices(out, attachment.get("vertices", []), vertex_count)
+            out.varint(attachment.get("hull", 0))
+        elif type == "path":
+            vertex_count = attachment.get("vertexCount", 0)
+            out.boolean(attachment.get("closed", False))
+            out.boolean(attachment.get("constantSpeed", True))
+            out.varint(vertex_count)
+            self.write_vertices(out, attachment.get("vertices", []), vertex_count)
+            lengths = list(attachment.get("lengths", []))
+            lengths = (lengths + [0] * (vertex_count // 3))[:vertex_count // 3]
+            out.float_array(lengths)
+        elif type == "point":
+            out.float32(attachment.get("rotation", 0))
+            out.float32(attachment.get("x", 0))
+            out.float32(attachment.get("y", 0))
+        elif type == "clipping":
+            vertex_count = attachment.get("vertexCount", 0)
+            out.varint(self.slots_index.get(attachment.get("end"), 0))
+            out.varint(vertex_count)
+            self.write_vertices(out, attachment.get("vertices", []), vertex_count)
+
+    def signed_color(self, hex_color):
+        return struct.unpack('>i', struct.pack('>I', self.color_int(hex_color)))[0]
+
+    def write_vertices(self, out, vertices, vertex_count):
+        if not self.is_weighted(vertices, vertex_count):
+            out.boolean(False)
+            out.float_array(vertices)
+            return
+        out.boolean(True)
+        i = 0
+        for _ in range(vertex_count):
+            bone_count = int(vertices[i])
+            i += 1
+            out.varint(bone_count)
+            for _ in range(bone_count):
+                out.varint(vertices[i])
+                out.float32(vertices[i + 1])
+                out.float32(vertices[i + 2])
+                out.float32(vertices[i + 3])
+                i += 4
+
+    def write_curve(self, out, frame):
+        curve = frame.get("curve")
+        if curve == "stepped":
+            out.byte(self.CURVE_STEPPED)
+        elif curve is None:
+            out.byte(self.CURVE_LINEAR)
+        else:
+            out.byte(self.CURVE_BEZIER)
+            out.float32(curve)
+            out.float32(frame.get("c2", 0))
+            out.float32(frame.get("c3", 1))
+            out.float32(frame.get("c4", 1))
+
+    def write_frames(self, out, frames, write_values, curves=True):
+        out.varint(len(frames))
+        for i, frame in enumerate(frames):
+            out.float32(frame.get("time", 0))
+            write_values(frame)
+            if curves and i < len(frames) - 1:
+                self.write_curve(out, frame)
+
+    def write_animations(self, out):
+        animations = self.skeleton.get("animations", {})
+        out.varint(len(animations))
+        for name, animation in animations.items():
+            out.string(name)
+            self.write_animation(out, animation)
+
+    def write_animation(self, out, animation):
+        # 插槽时间轴
+        slots = [(n, t) for n, t in animation.get("slots", {}).items() if n in self.slots_index]
+        out.varint(len(slots))
+        for slot_name, timelines in slots:
+            out.varint(self.slots_index[slot_name])
+            out.varint(len(timelines))
+            for timeline_name, frames in timelines.items():
+                if timeline_name == "attachment":
+                    out.byte(self.SLOT_ATTACHMENT)
+                    self.write_frames(out, frames, lambda f: self.string_ref(out, f.get("name")), curves=False)
+                elif timeline_name == "color":
+                    out.byte(self.SLOT_COLOR)
+                    self.write_frames(out, frames, lambda f: out.int32(self.signed_color(f.get("color"))))
+                elif timeline_name == "twoColor":
+                    out.byte(self.SLOT_TWO_COLOR)
+                    def two_color(f):
+                        out.int32(self.signed_color(f.get("light")))
+                        out.int32(int(f.get("dark") or "FFFFFF", 16))
+                    self.write_frames(out, frames, two_color)
+
+        # 骨骼时间轴
+        bones = [(n, t) for n, t in animation.get("bones", {}).items() if n in self.bones_index]
+        out.varint(len(bones))
+        for bone_name, timelines in bones:
+            out.varint(self.bones_index[bone_name])
+            out.varint(len(timelines))
+            for timeline_name, frames in timelines.items():
+                if timeline_name == "rotate":
+                    out.byte(self.BONE_ROTATE)
+                    self.write_frames(out, frames, lambda f: out.float32(f.get("angle", 0)))
+                else:
+                    out.byte({"translate": self.BONE_TRANSLATE, "scale": self.BONE_SCALE,
+                              "shear": self.BONE_SHEAR}[timeline_name])
+                    default = 1 if timeline_name == "scale" else 0
+                    def xy(f):
+                        out.float32(f.get("x", default))
+                        out.float32(f.get("y", default))
+                    self.write_frames(out, frames, xy)
+
+        # IK 时间轴
+        iks = [(n, f) for n, f in animation.get("ik", {}).items() if n in self.ik_index]
+        out.varint(len(iks))
+        for ik_name, frames in iks:
+            out.varint(self.ik_index[ik_name])
+            def ik(f):
+                out.float32(f.get("mix", 1))
+                out.float32(f.get("softness", 0))
+                out.byte(1 if f.get("bendPositive", True) else -1)
+                out.boolean(f.get("compress", False))
+                out.boolean(f.get("stretch", False))
+            self.write_frames(out, frames, ik)
+
+        # 变换约束时间轴
+        transforms = [(n, f) for n, f in animation.get("transform", {}).items() if n in self.transform_index]
+        out.varint(len(transforms))
+        for transform_name, frames in transforms:
+            out.varint(self.transform_index[transform_name])
+            def transform(f):
+                out.float32(f.get("rotateMix", 1))
+                out.float32(f.get("translateMix", 1))
+                out.float32(f.get("scaleMix", 1))
+                out.float32(f.get("shearMix", 1))
+            self.write_frames(out, frames, transform)
+
+        # 路径约束时间轴
+        paths = [(n, t) for n, t in animation.get("path", {}).items() if n in self.path_index]
+        out.varint(len(paths))
+        for path_name, timelines in paths:
+            out.varint(self.path_index[path_name])
+            out.varint(len(timelines))
+            for timeline_name, frames in timelines.items():
+                if timeline_name == "mix":
+                    out.byte(self.PATH_MIX)
+                    def mix(f):
+                        out.float32(f.get("rotateMix", 1))
+                        out.float32(f.get("translateMix", 1))
+                    self.write_frames(out, frames, mix)
+                else:
+                    out.byte(self.PATH_POSITION if timeline_name == "position" else self.PATH_SPACING)
+                    self.write_frames(out, frames, lambda f: out.float32(f.get("position", 0)))
+
+        # 变形时间轴
+        deform = [(n, s) for n, s in animation.get("deform", {}).items() if n in self.skins_index]
+        out.varint(len(deform))
+        for skin_name, slots in deform:
+            out.varint(self.skins_index[skin_name])
+            slots = [(n, a) for n, a in slots.items() if n in self.slots_index]
+            out.varint(len(slots))
+            for slot_name, attachments in slots:
+                out.varint(self.slots_index[slot_name])
+                out.varint(len(attachments))
+                for attachment_name, frames in attachments.items():
+                    self.string_ref(out, attachment_name)
+                    def vertices(f):
+                        values = f.get("vertices") or []
+                        out.varint(len(values))
+                        if values:
+                            out.varint(f.get("offset", 0))
+                            out.float_array(values)
+                    self.write_frames(out, frames, vertices)
+
+        # 绘制顺序时间轴
+        draw_order = animation.get("drawOrder", [])
+        out.varint(len(draw_order))
+        for frame in draw_order:
+            out.float32(frame.get("time", 0))
+            offsets = [o for o in frame.get("offsets", []) if o.get("slot") in self.slots_index]
+            out.varint(len(offsets))
+            for o in offsets:
+                out.varint(self.slots_index[o["slot"]])
+                out.varint(o.get("offset", 0))
+
+        # 事件时间轴
+        events = [e for e in animation.get("events", []) if e.get("name") in self.events_index]
+        event_data = self.skeleton.get("events", {})
+        out.varint(len(events))
+        for e in events:
+            data = event_data[e["name"]]
+            out.float32(e.get("time", 0))
+            out.varint(self.events_index[e["name"]])
+            out.varint(e.get("int", data.get("int", 0)), False)
+            out.float32(e.get("float", data.get("float", 0)))
+            string = e.get("string")
+            out.boolean(string is not None)
+            if string is not None:
+                out.string(string)
+            if data.get("audio"):
+                out.float32(e.get("volume", data.get("volume", 1)))
+                out.float32(e.get("balance", data.get("balance", 0)))
+
+    def write_events(self, out):
+        events = self.skeleton.get("events", {})
+        out.varint(len(events))
+        for name, event in events.items():
+            self.string_ref(out, name)
+            out.varint(event.get("int", 0), False)
+            out.float32(event.get("float", 0))
+            out.string(event.get("string", ""))
+            audio = event.get("audio")
+            out.string(audio if audio else None)
+            if audio:
+                out.float32(event.get("volume", 1))
+                out.float32(event.get("balance", 0))
+
+
+def export_skel(skeleton, output_path):
+    """将解析结果写为 .skel 文件，返回写入字节数"""
+    data = SkelExporter(skeleton).export()
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return len(data)
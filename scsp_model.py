@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+解析结果的紧凑中间模型：bones / slots / transform / path / skins 每条记录是一个 __slots__ 对象，
+顶点、UV、三角形等大块数据以 array 保存原始 float32 / int16，不再为每个数值创建 int / Decimal 对象
+
+记录里保存的都是原始值，省略默认值、颜色处理、按精度整理浮点数等规则只在 to_spine() 中执行一次，
+得到与原来完全相同的 Spine JSON 结构。需要常驻内存的场景（如长期缓存大量骨骼）保留
+ScspParser.parse_model() 返回的 SkeletonModel，输出时再调用 to_spine()
+
+ik / events / animations 仍为 JSON 结构（数值动画可用 scsp_columnar 的列式接口）
+"""
+from array import array
+
+TRANSFORM_MODES = {
+    0: "normal",
+    1: "onlyTranslation",
+    2: "noRotationOrReflection",
+    3: "noScale",
+    4: "noScaleOrReflection"
+}
+BLEND_MODES = {1: "additive", 2: "multiply", 3: "screen"}
+
+
+def float_cleaner(precision):
+    """按 {类别: 位数} 整理一组浮点数的函数 clean(values, category)，与 BinaryReader.clean_floats 一致"""
+    from scsp_dec_to_json import clean_floats
+
+    def clean(values, category="default"):
+        return clean_floats(values, precision[category])
+    return clean
+
+
+class Record:
+    """按 __slots__ 顺序接收构造参数的记录基类"""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class BoneData(Record):
+    """parent 为 None 表示根骨骼；transform 为原始模式编号"""
+    __slots__ = ("name", "parent", "length", "x", "y", "rotation", "scaleX", "scaleY",
+                 "shearX", "shearY", "transform", "skin")
+
+    def to_spine(self):
+        bone_data = {"name": self.name}
+        # 只有非 root 骨骼才写 parent
+        if self.parent is not None:
+            bone_data["parent"] = self.parent
+        if abs(self.length) > 0.001:
+            bone_data["length"] = self.length
+        if abs(self.x) > 0.001: bone_data["x"] = self.x
+        if abs(self.y) > 0.001: bone_data["y"] = self.y
+        if abs(self.rotation) > 0.001: bone_data["rotation"] = self.rotation
+        if abs(float(self.scaleX) - 1.0) > 0.001: bone_data["scaleX"] = self.scaleX
+        if abs(float(self.scaleY) - 1.0) > 0.001: bone_data["scaleY"] = self.scaleY
+        if abs(float(self.shearX)) > 0.001: bone_data["shearX"] = self.shearX
+        if abs(float(self.shearY)) > 0.001: bone_data["shearY"] = self.shearY
+        # 默认值 normal 也写入
+        bone_data["transform"] = TRANSFORM_MODES.get(self.transform, "normal")
+        if self.skin:
+            bone_data["skin"] = True
+        return bone_data
+
+
+class SlotData(Record):
+    """color / darkColor 为读出的 8 位十六进制字符串，blend 为原始混合模式编号"""
+    __slots__ = ("name", "bone", "color", "darkColor", "attachment", "blend")
+
+    def to_spine(self):
+        slot_data = {"name": self.name, "bone": self.bone}
+        if self.color != "FFFFFFFF":
+            slot_data["color"] = self.color
+        dark_color = self.darkColor
+        if dark_color != "FFFFFFFF" and dark_color != "00000000":
+            # 移除最后FF字符
+            if len(dark_color) >= 2 and dark_color.endswith("FF"):
+                dark_color = dark_color[:-2]
+            slot_data["darkColor"] = dark_color
+        if self.attachment != "":
+            slot_data["attachment"] = self.attachment
+        if self.blend != 0:
+            slot_data["blend"] = BLEND_MODES.get(self.blend, "normal")
+        return slot_data
+
+
+class ConstraintData(Record):
+    """所有字段都输出的约束记录，字段顺序即 JSON 键顺序；bones 为骨骼名元组"""
+    __slots__ = ()
+
+    def to_spine(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["bones"] = list(self.bones)
+        return data
+
+
+class TransformData(ConstraintData):
+    __slots__ = ("name", "order", "skin", "target", "bones", "rotateMix", "translateMix", "scaleMix",
+                 "shearMix", "rotation", "x", "y", "scaleX", "scaleY", "shearY", "relative", "local")
+
+
+class PathData(ConstraintData):
+    __slots__ = ("name", "order", "skin", "positionMode", "spacingMode", "rotateMode", "rotation",
+                 "position", "spacing", "rotateMix", "translateMix", "target", "bones")
+
+
+class VertexData(Record):
+    """
+    顶点数据，count 为顶点数
+    带权重时 bones 为 int16 的 [骨骼数, 骨骼索引...] 序列，values 为每个骨骼的 x, y, weight 原始 float32；
+    不带权重时 bones 为 None，values 为 x, y 坐标
+    """
+    __slots__ = ("count", "bones", "values")
+
+    def to_spine(self, clean):
+        if self.bones is None:
+            return clean(self.values, "position")
+        weights = [None] * len(self.values)
+        weights[0::3] = clean(self.values[0::3], "position")
+        weights[1::3] = clean(self.values[1::3], "position")
+        weights[2::3] = clean(self.values[2::3])
+        vertices = []
+        bones = self.bones
+        weight_index = 0
+        bone_index = 0
+        while bone_index < len(bones):
+            bone_count = bones[bone_index]
+            bone_index += 1
+            vertices.append(bone_count)
+            for j in range(bone_count):
+                vertices.append(bones[bone_index])
+                bone_index += 1
+                vertices.extend(weights[weight_index:weight_index + 3])
+                weight_index += 3
+        return vertices
+
+
+EMPTY_VERTICES = VertexData(0, None, array('f'))
+
+
+class RegionAttachment(Record):
+    __slots__ = ("x", "y", "rotation", "scaleX", "scaleY", "width", "height", "path", "color")
+
+    def to_spine(self, clean):
+        data = {
+            "type": "region",
+            "x": self.x,
+            "y": self.y,
+            "rotation": self.rotation,
+            "scaleX": self.scaleX,
+            "scaleY": self.scaleY,
+            "width": self.width,
+            "height": self.height,
+            "path": self.path,
+        }
+        if self.color != "FFFFFFFF":
+            data["color"] = self.color
+        return data
+
+
+class PointAttachment(Record):
+    """point 附件只输出类型"""
+    __slots__ = ()
+
+    def to_spine(self, clean):
+        return {"type": "point"}
+
+
+class BoundingBoxAttachment(Record):
+    __slots__ = ("vertices", "path")
+
+    def to_spine(self, clean):
+        return {
+            "type": "boundingbox",
+            "vertexCount": self.vertices.count,
+            "vertices": self.vertices.to_spine(clean),
+            "path": self.path,
+        }
+
+
+class PathAttachment(Record):
+    """lengths 为原始 float32"""
+    __slots__ = ("closed", "constantSpeed", "lengths", "vertices", "path")
+
+    def to_spine(self, clean):
+        return {
+            "type": "path",
+            "closed": self.closed,
+            "constantSpeed": self.constantSpeed,
+            "lengths": clean(self.lengths, "position"),
+            "vertices": self.vertices.to_spine(clean),
+            "vertexCount": self.vertices.count,
+            "path": self.path,
+        }
+
+
+class ClippingAttachment(Record):
+    __slots__ = ("end", "vertices", "path")
+
+    def to_spine(self, clean):
+        return {
+            "type": "clipping",
+            "end": self.end,
+            "vertices": self.vertices.to_spine(clean),
+            "vertexCount": self.vertices.count,
+            "path": self.path,
+        }
+
+
+class MeshAttachment(Record):
+    """type 为 mesh / linkedmesh；uvs 为原始 float32，triangles 为 int16（edges 不保留，输出总是空列表）"""
+    __slots__ = ("type", "uvs", "triangles", "vertices", "hull", "width", "height", "path", "color")
+
+    def to_spine(self, clean):
+        data = {
+            "type": self.type,
+            "uvs": clean(self.uvs, "uv"),
+            "triangles": self.triangles.tolist(),
+            "vertices": self.vertices.to_spine(clean),
+            "hull": self.hull,
+            "edges": [],
+            "width": self.width,
+            "height": self.height,
+            "path": self.path,
+        }
+        if self.color != "FFFFFFFF":
+            data["color"] = self.color
+        return data
+
+
+class SkinData(Record):
+    """attachments 为 {slot 名: {附件名: 附件记录}}"""
+    __slots__ = ("name", "attachments")
+
+    def to_spine(self, clean):
+        return {
+            "name": self.name,
+            "attachments": {
+                slot: {name: attachment.to_spine(clean) for name, attachment in entries.items()}
+                for slot, entries in self.attachments.items()
+            },
+        }
+
+
+class SkeletonModel(Record):
+    """
+    一个骨骼的完整解析结果；precision 为解析时的 {类别: 位数}，to_spine() 按它整理数组中的浮点数
+    skeleton / ik / events / animations 为 JSON 结构
+    """
+    __slots__ = ("skeleton", "bones", "ik", "slots", "transform", "path", "skins", "events",
+                 "animations", "precision")
+
+    def to_spine(self):
+        """渲染为与 ScspParser.parse() 相同的 Spine JSON 结构"""
+        clean = float_cleaner(self.precision)
+        return {
+            "skeleton": self.skeleton,
+            "slots": [slot.to_spine() for slot in self.slots],
+            "skins": [skin.to_spine(clean) for skin in self.skins],
+            "bones": [bone.to_spine() for bone in self.bones],
+            "ik": self.ik,
+            "transform": [t.to_spine() for t in self.transform],
+            "path": [p.to_spine() for p in self.path],
+            "events": self.events,
+            "animations": self.animations,
+        }
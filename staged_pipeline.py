@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+有界队列连接的分阶段流水线：预读 -> LZ4 解压 -> 解析 -> 序列化 -> 写出
+每个阶段有自己的一组线程，阶段之间用有界队列传递文件；下游处理不过来时上游阻塞在入队上（背压），
+同时在内存中的文件数不超过各队列容量与线程数之和，磁盘读写和解析可以同时进行
+
+每个阶段的输入队列深度、等待输入和阻塞在下游的累计时间记录在 METRICS 中：
+  scsp_pipeline_queue_depth{stage} / scsp_pipeline_queue_depth_max{stage}
+  scsp_pipeline_idle_seconds_total{stage} / scsp_pipeline_blocked_seconds_total{stage}
+  scsp_pipeline_stage_seconds{stage}
+"""
+import queue
+import threading
+import time
+
+from metrics import METRICS
+
+# 各阶段的默认线程数，parse 默认取 --jobs
+DEFAULT_WORKERS = {"read": 2, "lz4": 1, "parse": 1, "serialize": 1, "write": 2}
+DEFAULT_QUEUE_SIZE = 4
+
+# 队列结束标记
+_DONE = object()
+
+
+def parse_workers(spec, jobs=1):
+    """
+    解析各阶段线程数设置，如 "read=2,parse=4,write=2"，未设置的阶段使用默认值
+    :return: {阶段名: 线程数}
+    """
+    workers = dict(DEFAULT_WORKERS, parse=max(1, jobs))
+    if not spec:
+        return workers
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        stage, _, count = item.partition('=')
+        stage = stage.strip()
+        if stage not in workers or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"无效的流水线线程数设置: {item}")
+        workers[stage] = int(count)
+    return workers
+
+
+class Stage:
+    """流水线的一个阶段：func(key, payload) 返回交给下一阶段的 payload"""
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+
+class Pipeline:
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        self.stages = stages
+        # 每个阶段的输入队列
+        self.queues = [queue.Queue(queue_size) for _ in stages]
+        # 最后一个阶段的结果和各阶段的错误，由调用线程取出
+        self.results = queue.Queue()
+        self.remaining = [stage.workers for stage in stages]
+        self.lock = threading.Lock()
+
+    def put(self, index, item):
+        """放入第 index 个阶段的输入队列，队列满时阻塞，阻塞时间计入上一个阶段"""
+        q = self.queues[index]
+        start = time.perf_counter()
+        q.put(item)
+        if index > 0:
+            METRICS.inc("scsp_pipeline_blocked_seconds_total", time.perf_counter() - start,
+                        stage=self.stages[index - 1].name)
+        self.record_depth(index)
+
+    def record_depth(self, index):
+        depth = self.queues[index].qsize()
+        name = self.stages[index].name
+        METRICS.set("scsp_pipeline_queue_depth", depth, stage=name)
+        METRICS.set_max("scsp_pipeline_queue_depth_max", depth, stage=name)
+
+    def feed(self, items):
+        for item in items:
+            self.put(0, item)
+        for _ in range(self.stages[0].workers):
+            self.queues[0].put(_DONE)
+
+    def work(self, index):
+        stage = self.stages[index]
+        last = index == len(self.stages) - 1
+        while True:
+            start = time.perf_counter()
+            item = self.queues[index].get()
+            METRICS.inc("scsp_pipeline_idle_seconds_total", time.perf_counter() - start, stage=stage.name)
+            self.record_depth(index)
+            if item is _DONE:
+                break
+            key, payload = item
+            try:
+                with METRICS.time("scsp_pipeline_stage_seconds", stage=stage.name):
+                    payload = stage.func(key, payload)
+            except Exception as e:
+                self.results.put((key, None, str(e)))
+                continue
+            if last:
+                self.results.put((key, payload, None))
+            else:
+                self.put(index + 1, (key, payload))
+        # 本阶段最后一个线程退出时通知下一阶段结束
+        with self.lock:
+            self.remaining[index] -= 1
+            finished = self.remaining[index] == 0
+        if finished:
+            if last:
+                self.results.put(_DONE)
+            else:
+                for _ in range(self.stages[index + 1].workers):
+                    self.queues[index + 1].put(_DONE)
+
+    def run(self, items, on_result):
+        """
+        处理 items 中的每个 (key, payload)
+        :param on_result: on_result(key, payload, error) 在调用线程中执行，成功时 error 为 None，
+                          失败时 payload 为 None、error 为错误信息，失败的文件不再进入后续阶段
+        """
+        threads = [threading.Thread(target=self.feed, args=(items,), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(threading.Thread(target=self.work, args=(index,), daemon=True,
+                                            name=f"pipeline-{stage.name}-{n}")
+                           for n in range(stage.workers))
+        for thread in threads:
+            thread.start()
+        while True:
+            item = self.results.get()
+            if item is _DONE:
+                break
+            on_result(*item)
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,65 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive_input
+from scsp_dec_to_json import batch_convert_decompressed_files
+
+ATLAS = "\npage.sct\nsize: 64,64\n"
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+
+
+@pytest.mark.parametrize("name", [
+    "sub/../../escaped.atlas", "../escaped.atlas", "/etc/escaped.atlas", "C:/escaped.atlas",
+    "C:escaped.atlas", "sub\\..\\..\\escaped.atlas", "\\escaped.atlas", "./", "",
+])
+def test_member_output_path_rejects_unsafe_names(tmp_path, name):
+    with pytest.raises(ValueError):
+        archive_input.member_output_path(str(tmp_path / "out"), name)
+
+
+def test_member_output_path_keeps_relative_layout(tmp_path):
+    output_dir = str(tmp_path / "out")
+    assert archive_input.member_output_path(output_dir, "a/./b/c.atlas") == os.path.join(output_dir, "a", "b", "c.atlas")
+
+
+def test_atlas_members_stay_in_output_dir(tmp_path):
+    archive = str(tmp_path / "in.zip")
+    make_zip(archive, {"sub/../../escaped.atlas": ATLAS, "sub/ok.atlas": ATLAS})
+    output_dir = str(tmp_path / "deep" / "out")
+    assert archive_input.process_atlas_members(archive, output_dir) == 1
+    assert not os.path.exists(tmp_path / "escaped.atlas")
+    assert not os.path.exists(tmp_path / "deep" / "escaped.atlas")
+    with open(os.path.join(output_dir, "sub", "ok.atlas"), encoding='utf-8') as f:
+        assert "page.png" in f.read()
+
+
+
+@pytest.mark.parametrize("content, changed", [
+    (ATLAS, True), ("\r\npage.sct\r\nsize: 64,64\r\n", True), ("\npage.png\n", False), ("page.sct\n", False),
+])
+def test_disk_and_member_atlas_rewrites_agree(tmp_path, content, changed):
+    from replace_sct_with_png import process_atlas_file, replace_page_extension
+    path = tmp_path / "a.atlas"
+    path.write_bytes(content.encode('utf-8'))
+    expected, expected_changed = replace_page_extension(content)
+    assert expected_changed is changed
+    assert process_atlas_file(str(path)) is changed
+    assert path.read_bytes() == expected.encode('utf-8')
+
+def test_batch_rejects_escaping_members(tmp_path):
+    archive = str(tmp_path / "in.zip")
+    make_zip(archive, {"sub/../../escaped.scsp": b"\0" * 64})
+    records = batch_convert_decompressed_files(archive)
+    assert [record['status'] for record in records] == ['error']
+    assert "不安全的归档成员名" in records[0]['error']
+    assert not any(name.startswith("escaped") for name in os.listdir(tmp_path))
@@ -0,0 +1,86 @@
+import os
+import struct
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scsp_dec_to_json import BinaryReader, FloatPrecision, ScspBudgetError, ScspParser, clean_floats
+
+
+def make_reader(payload, **options):
+    """头部 8 字节（字符串区偏移、长度）之后紧跟 payload，字符串区为空"""
+    return BinaryReader("<test>", data=struct.pack('<II', len(payload), 0) + payload, **options)
+
+
+def test_unpack_array_reads_values():
+    reader = make_reader(struct.pack('<3h', 1, -2, 3))
+    assert reader.unpack_array('h', 2, 3) == (1, -2, 3)
+    assert reader.pos == 14
+    assert reader.unpack_array('h', 2, 0) == ()
+
+
+def test_unpack_array_peek_keeps_position():
+    reader = make_reader(struct.pack('<2f', 1.5, 2.5))
+    assert reader.unpack_array('f', 4, 2, peek=True) == (1.5, 2.5)
+    assert reader.pos == 8
+
+
+@pytest.mark.parametrize("count", [-1, -32768])
+def test_unpack_array_rejects_negative_count(count):
+    reader = make_reader(b"\0" * 16)
+    with pytest.raises(ScspBudgetError):
+        reader.unpack_array('h', 2, count)
+
+
+@pytest.mark.parametrize("fmt, size, count", [('h', 2, 9), ('f', 4, 5), ('f', 4, 1 << 30)])
+def test_unpack_array_rejects_count_past_end(fmt, size, count):
+    reader = make_reader(b"\0" * 16)
+    with pytest.raises(ScspBudgetError):
+        reader.unpack_array(fmt, size, count)
+
+
+def test_unpack_array_rejects_count_past_end_from_read_pos():
+    reader = make_reader(b"\0" * 16)
+    with pytest.raises(ScspBudgetError):
+        reader.unpack_array('h', 2, 8, read_pos=10)
+    assert reader.unpack_array('h', 2, 7, read_pos=10) == (0,) * 7
+
+
+@pytest.mark.parametrize("value, precision, expected", [
+    (10.4, 0, 10), (0.3, 0, 0), (0.5, 0, 0), (0.7, 0, 1), (100.0, 0, 100), (-2.6, 0, -3),
+    (1.25, 1, Decimal("1.2")), (0.30000001, 2, Decimal("0.3")), (2.0, 3, 2),
+])
+def test_clean_float(value, precision, expected):
+    result = BinaryReader.clean_float(value, precision)
+    assert result == expected
+    assert type(result) is type(expected)
+    if precision == 0:
+        assert result == int(result)
+
+
+def test_clean_floats_precision_zero():
+    assert clean_floats([10.4, 0.3, 1.5, -0.2], 0) == [10, 0, 2, 0]
+
+
+COLOR = (128 / 255, 0.3, 1.0, 0.5)
+
+
+@pytest.mark.parametrize("spec", [None, "compact", "compact,default=2", "default=0,position=0,uv=0,curve=0"])
+def test_colors_keep_full_precision(spec):
+    precision = FloatPrecision.parse(spec) if spec else None
+    reader = make_reader(struct.pack('<4f', *COLOR), precision=precision)
+    assert reader.color() == "804CFF7F"
+
+
+@pytest.mark.parametrize("spec", [None, "compact,default=2", "default=0"])
+def test_color_timeline_keeps_full_precision(spec):
+    # type 14：每帧 time + light(rgba) + dark(rgb)，曲线数为 0
+    frame = struct.pack('<8f', 0.25, *COLOR, 128 / 255, 0.3, 1.0)
+    payload = struct.pack('<h', len(frame) // 4) + frame + struct.pack('<h', 0)
+    precision = FloatPrecision.parse(spec) if spec else None
+    parser = ScspParser(make_reader(payload, precision=precision))
+    frames = parser.linetime(14)
+    assert [(f["light"], f["dark"]) for f in frames] == [("804CFF7F", "804CFF")]
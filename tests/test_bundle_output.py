@@ -0,0 +1,86 @@
+import os
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bundle_output
+from scsp_dec_to_json import write_result
+
+SKELETON = {
+    "skeleton": {"hash": "h", "spine": "3.8.99", "width": 10, "height": 20},
+    "bones": [{"name": "root"}, {"name": "臂", "parent": "root", "rotation": 90}],
+    "slots": [{"name": "s0", "bone": "root"}],
+    "skins": [],
+    "events": {},
+    "animations": {
+        "idle": {"duration": 1, "bones": {"臂": {"rotate": [{"time": 0, "angle": 0}, {"time": 1, "angle": 90}]}}},
+        "run": {"duration": 0.5, "bones": {"root": {"translate": [{"time": 0, "x": 1, "y": 2}] * 40}}},
+    },
+}
+
+
+def new_stats():
+    return {'outputs': [], 'raw_bytes': 0, 'written_bytes': 0, 'write_seconds': 0.0,
+            'full_json_bytes': 0, 'quantized_json_bytes': 0, 'skel_bytes': 0}
+
+
+def standalone_outputs(root, output_format, compress):
+    """逐个写磁盘时的输出 {相对路径: bytes}"""
+    output_json = os.path.join(root, "sub", "sample.json")
+    write_result(SKELETON, new_stats(), output_json, output_format, compress)
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, root).replace(os.sep, '/')] = f.read()
+    assert files
+    return files
+
+
+@pytest.mark.parametrize("bundle_name", ["out.zip", "out.tar", "out.scjb"])
+@pytest.mark.parametrize("output_format, compress", [("both", None), ("sharded", None), ("json", "lz4")])
+def test_index_offsets_match_standalone_output(tmp_path, bundle_name, output_format, compress):
+    expected = standalone_outputs(str(tmp_path / "disk"), output_format, compress)
+
+    root = str(tmp_path / "mem")
+    stats = write_result(SKELETON, new_stats(), os.path.join(root, "sub", "sample.json"), output_format, compress,
+                         bundle=True)
+    assert not os.path.exists(root)
+    bundle_path = str(tmp_path / bundle_name)
+    bundle = bundle_output.open_bundle(bundle_path)
+    for path, data in stats['files'].items():
+        bundle.add(os.path.relpath(path, root).replace(os.sep, '/'), data)
+    # 补齐 tar 块边界、空成员和非 ASCII 成员名也要按偏移读对
+    extras = {"empty.bin": b"", "块/边界.bin": b"x" * 512, "odd.bin": b"y" * 513}
+    for name, data in extras.items():
+        bundle.add(name, data)
+    bundle.close()
+
+    index = bundle_output.load_index(bundle_path)
+    assert sorted(index) == sorted({**expected, **extras})
+    for name, data in {**expected, **extras}.items():
+        assert index[name]["size"] == len(data)
+        assert bundle_output.read_member(bundle_path, name, index) == data
+
+    # zip / tar 仍是标准格式，标准库读出的内容相同
+    if bundle_name.endswith('.zip'):
+        with zipfile.ZipFile(bundle_path) as z:
+            assert all(z.read(name) == data for name, data in expected.items())
+            assert bundle_output.INDEX_NAME in z.namelist()
+    elif bundle_name.endswith('.tar'):
+        with tarfile.open(bundle_path) as t:
+            for name, data in expected.items():
+                with t.extractfile(name) as f:
+                    assert f.read() == data
+
+
+def test_load_index_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-bundle.bin"
+    path.write_bytes(b"0" * 64)
+    with pytest.raises(ValueError):
+        bundle_output.load_index(str(path))
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import node_shards
+
+# 固定的分片归属：改动哈希方式会让已部署的各节点重新分配文件，这些值不能变
+PINNED = [
+    ("a.scsp", 4, 1), ("a.scsp", 7, 6),
+    ("hero/idle.scsp", 4, 2), ("hero/idle.scsp", 7, 1),
+    ("角色/战士.scsp.decompressed", 4, 1), ("角色/战士.scsp.decompressed", 7, 5),
+    ("x/y/z.scsp", 4, 2), ("x/y/z.scsp", 7, 3),
+]
+
+
+@pytest.mark.parametrize("path, count, shard", PINNED)
+def test_shard_of_is_pinned(path, count, shard):
+    assert node_shards.shard_of(path, count) == shard
+    digest = hashlib.sha1(path.encode('utf-8')).digest()
+    assert int.from_bytes(digest[:8], 'big') % count == shard
+
+
+@pytest.mark.parametrize("spec, expected", [("0/4", (0, 4)), (" 3 / 4 ", (3, 4)), ("0/1", (0, 1))])
+def test_parse_shard(spec, expected):
+    assert node_shards.parse_shard(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["4/4", "0/0", "-1/4", "1", "a/b", "1/4/2"])
+def test_parse_shard_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        node_shards.parse_shard(spec)
+
+
+def test_hash_shards_partition_files():
+    files = [f"dir{i % 5}/file{i}.scsp" for i in range(200)]
+    shards = [node_shards.select_shard(files, (i, 3), str) for i in range(3)]
+    assert sorted(sum(shards, [])) == sorted(files)
+    for shard in shards:
+        # 保持原有顺序
+        assert shard == [f for f in files if f in set(shard)]
+
+
+def test_relative_key_uses_forward_slashes(tmp_path):
+    path = os.path.join(str(tmp_path), "a", "b.scsp")
+    assert node_shards.relative_key(path, str(tmp_path)) == "a/b.scsp"
+
+
+def test_balanced_shards():
+    sizes = {"a": 10, "b": 9, "c": 3, "d": 3, "e": 2, "f": 1}
+    files = list("fedcba")
+    # 从大到小依次分给当前总大小最小的分片，总大小相同时取编号小的分片
+    assert node_shards.select_shard(files, (0, 2), str, sizes) == ["f", "d", "a"]
+    assert node_shards.select_shard(files, (1, 2), str, sizes) == ["e", "c", "b"]
+
+
+def test_balanced_shards_partition_and_even_out():
+    files = [f"f{i}" for i in range(60)]
+    sizes = {f: (i * 7919) % 1000 + 1 for i, f in enumerate(files)}
+    shards = [node_shards.select_shard(files, (i, 4), str, sizes) for i in range(4)]
+    assert sorted(sum(shards, [])) == sorted(files)
+    loads = [sum(sizes[f] for f in shard) for shard in shards]
+    assert max(loads) - min(loads) <= max(sizes.values())
+
+
+def test_write_manifest(tmp_path):
+    path = node_shards.default_manifest_path(str(tmp_path / "out"), (1, 3))
+    assert os.path.basename(path) == "scsp-shard-1-of-3.json"
+    records = [
+        {"file": "a.scsp", "bytes": 10, "status": "ok", "outputs": ["a.json"], "error": None},
+        {"file": "b.scsp", "bytes": 5, "status": "error", "outputs": [], "error": "bad"},
+    ]
+    node_shards.write_manifest(path, (1, 3), True, "in", records, 1.5)
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest["shard"] == {"index": 1, "count": 3, "balance": True}
+    assert (manifest["converted"], manifest["failed"], manifest["input_bytes"]) == (1, 1, 15)
+    assert manifest["files"] == records
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pose_sampler import NORMAL, ONLY_TRANSLATION, PoseSampler, bezier_samples, evaluate
+from scsp_columnar import CURVE_BEZIER, CURVE_LINEAR, CURVE_STEPPED, TimelineColumns
+from scsp_model import BoneData
+
+
+def bone(name, parent, x=0.0, y=0.0, rotation=0.0, scale_x=1.0, transform=NORMAL):
+    return BoneData(name, parent, 0.0, x, y, rotation, scale_x, 1.0, 0.0, 0.0, transform, False)
+
+
+# root 在 (10, 0) 旋转 90 度；child 沿 root 的 x 轴偏移 5；scaled 再偏移 2 并横向放大 2 倍；
+# tip 为 onlyTranslation，只继承位置
+BONES = [
+    bone("root", None, x=10, rotation=90),
+    bone("child", "root", x=5),
+    bone("scaled", "child", x=2, scale_x=2),
+    bone("tip", "child", x=3, transform=ONLY_TRANSLATION),
+]
+WORLD = {
+    "root": [[0, -1, 10], [1, 0, 0]],
+    "child": [[0, -1, 10], [1, 0, 5]],
+    "scaled": [[0, -1, 10], [2, 0, 7]],
+    "tip": [[1, 0, 10], [0, 1, 8]],
+}
+
+
+def timeline(times, values, curve_types=None, curves=None):
+    values = np.asarray(values, dtype=np.float32).reshape(len(times), -1)
+    segments = max(len(times) - 1, 0)
+    if curve_types is None:
+        curve_types = [CURVE_LINEAR] * segments
+    if curves is None:
+        curves = [[0, 0, 1, 1]] * segments
+    return TimelineColumns(None, [f"v{i}" for i in range(values.shape[1])], np.asarray(times, dtype=np.float32),
+                           values, np.asarray(curve_types, dtype=np.uint8),
+                           np.asarray(curves, dtype=np.float32).reshape(segments, 4))
+
+
+def test_setup_world_matrices():
+    world = PoseSampler(BONES).world(None, [0.0])
+    assert world.shape == (1, len(BONES), 2, 3)
+    for i, b in enumerate(BONES):
+        np.testing.assert_allclose(world[0, i], WORLD[b.name], atol=1e-9)
+
+
+def test_negative_skeleton_scale_flips_x():
+    world = PoseSampler(BONES, scale_x=-1.0).world(None, [0.0])
+    np.testing.assert_allclose(world[0, 0], [[0, 1, -10], [1, 0, 0]], atol=1e-9)
+    np.testing.assert_allclose(world[0, 1], [[0, 1, -10], [1, 0, 5]], atol=1e-9)
+
+
+def test_animated_world_matrices():
+    # root 的旋转从 0 到 -90（加到初始的 90 度上），第一帧之前保持初始姿势
+    animations = {"turn": {"bones": {"root": {"rotate": timeline([0, 1], [0, -90])}}}}
+    world = PoseSampler(BONES, animations).world("turn", [-1.0, 0.5, 1.0])
+    np.testing.assert_allclose(world[0, 1], WORLD["child"], atol=1e-9)
+    h = np.sqrt(0.5)
+    np.testing.assert_allclose(world[1, 1], [[h, -h, 10 + 5 * h], [h, h, 5 * h]], atol=1e-6)
+    np.testing.assert_allclose(world[2, 1], [[1, 0, 15], [0, 1, 0]], atol=1e-6)
+    np.testing.assert_allclose(world[2, 3], [[1, 0, 18], [0, 1, 0]], atol=1e-6)
+
+
+def test_evaluate_linear_and_stepped():
+    line = timeline([0, 1, 2], [0, 10, 30], [CURVE_LINEAR, CURVE_STEPPED])
+    values, active = evaluate(line, np.array([-0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 3.0]))
+    assert active.tolist() == [False, True, True, True, True, True, True]
+    np.testing.assert_allclose(values[1:, 0], [0, 5, 10, 10, 30, 30])
+
+
+@pytest.mark.parametrize("curve", [(0.25, 0.0, 0.75, 1.0), (0.42, 0.0, 1.0, 1.0), (0.0, 0.6, 0.4, 1.0)])
+def test_evaluate_bezier_matches_runtime_polyline(curve):
+    line = timeline([1, 3], [10, 20], [CURVE_BEZIER], [curve])
+    times = np.array([1.5, 2.0, 2.5])
+    values, active = evaluate(line, times)
+    assert active.all()
+    xs, ys = bezier_samples(np.array([curve], dtype=np.float32))
+    expected = 10 + 10 * np.interp((times - 1) / 2, xs[0], ys[0])
+    np.testing.assert_allclose(values[:, 0], expected, atol=1e-6)
+    if curve == (0.25, 0.0, 0.75, 1.0):
+        # 对称曲线经过中点
+        assert values[1, 0] == pytest.approx(15)
+
+
+def test_evaluate_rotation_takes_shortest_path():
+    line = timeline([0, 1], [170, -170])
+    values, _ = evaluate(line, np.array([0.5]), rotate=True)
+    assert values[0, 0] == pytest.approx(180)
+    values, _ = evaluate(line, np.array([0.5]))
+    assert values[0, 0] == pytest.approx(0)
+
+
+def test_evaluate_multiple_columns_after_last_frame():
+    line = timeline([0, 1], [[0, 4], [2, 8]])
+    values, active = evaluate(line, np.array([0.25, 5.0]))
+    assert active.all()
+    np.testing.assert_allclose(values, [[0.5, 5], [2, 8]])
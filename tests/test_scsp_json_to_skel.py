@@ -0,0 +1,177 @@
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scsp_json_to_skel import SkelExporter, SkelOutput, export_skel
+
+SKELETON = {
+    "skeleton": {"hash": "h", "spine": "3.8.99", "x": -1.5, "y": 2, "width": 10, "height": 20},
+    "bones": [
+        {"name": "root"},
+        {"name": "arm", "parent": "root", "rotation": 90, "x": 3, "length": 5, "transform": "noScale"},
+    ],
+    "slots": [
+        {"name": "s0", "bone": "root", "attachment": "a"},
+        {"name": "s1", "bone": "arm", "color": "FF000080", "darkColor": "102030"},
+    ],
+    "skins": [],
+    "events": {"e": {"int": -3}},
+    "animations": {
+        "anim": {
+            "bones": {"arm": {"rotate": [
+                {"time": 0, "angle": 0, "curve": 0.25, "c2": 0, "c3": 0.75, "c4": 1},
+                {"time": 0.5, "angle": 45, "curve": "stepped"},
+                {"time": 0.75, "angle": 60},
+                {"time": 1, "angle": 90},
+            ]}},
+            "drawOrder": [{"time": 0.5, "offsets": [{"slot": "s1", "offset": -1}, {"slot": "s0", "offset": 1}]}],
+            "events": [{"time": 0.25, "name": "e"}],
+        },
+    },
+}
+
+
+class SkelInput:
+    """按 Spine 3.8 SkeletonBinary 的读取方法解码，供测试逐字段核对"""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def take(self, n):
+        chunk = self.data[self.pos:self.pos + n]
+        assert len(chunk) == n
+        self.pos += n
+        return chunk
+
+    def byte(self):
+        return struct.unpack('>b', self.take(1))[0]
+
+    def boolean(self):
+        return self.take(1) != b'\x00'
+
+    def int32(self):
+        return struct.unpack('>i', self.take(4))[0]
+
+    def float32(self):
+        return struct.unpack('>f', self.take(4))[0]
+
+    def varint(self, optimize_positive=True):
+        result = shift = 0
+        while True:
+            b = self.take(1)[0]
+            result |= (b & 0x7F) << shift
+            shift += 7
+            if not b & 0x80:
+                break
+        result &= 0xFFFFFFFF
+        if not optimize_positive:
+            return (result >> 1) ^ -(result & 1)
+        return result - (1 << 32) if result & 0x80000000 else result
+
+    def string(self):
+        length = self.varint()
+        if length == 0:
+            return None
+        return self.take(length - 1).decode('utf-8')
+
+
+@pytest.mark.parametrize("value, optimize_positive, expected", [
+    (0, True, b'\x00'), (127, True, b'\x7f'), (128, True, b'\x80\x01'), (-1, True, b'\xff\xff\xff\xff\x0f'),
+    (-1, False, b'\x01'), (1, False, b'\x02'), (-3, False, b'\x05'), (-65, False, b'\x81\x01'),
+])
+def test_varint_encoding(value, optimize_positive, expected):
+    out = SkelOutput()
+    out.varint(value, optimize_positive)
+    assert bytes(out.buf) == expected
+    assert SkelInput(expected).varint(optimize_positive) == value
+
+
+@pytest.mark.parametrize("frame, expected", [
+    ({}, b'\x00'),
+    ({"curve": "stepped"}, b'\x01'),
+    ({"curve": 0.25, "c2": 0, "c3": 0.75, "c4": 1}, b'\x02' + struct.pack('>4f', 0.25, 0, 0.75, 1)),
+])
+def test_curve_bytes(frame, expected):
+    out = SkelOutput()
+    SkelExporter(SKELETON).write_curve(out, frame)
+    assert bytes(out.buf) == expected
+
+
+def test_export_layout(tmp_path):
+    path = str(tmp_path / "sample.skel")
+    size = export_skel(SKELETON, path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert size == len(data)
+    r = SkelInput(data)
+
+    # 头部与字符串常量池（按首次引用的顺序）
+    assert r.string() == "h"
+    assert r.string() == "3.8.99"
+    assert [r.float32() for _ in range(4)] == [-1.5, 2, 10, 20]
+    assert r.boolean() is False
+    assert [r.string() for _ in range(r.varint())] == ["a", "e"]
+
+    # 骨骼
+    assert r.varint() == 2
+    assert r.string() == "root"
+    assert [r.float32() for _ in range(8)] == [0, 0, 0, 1, 1, 0, 0, 0]
+    assert (r.varint(), r.boolean()) == (0, False)
+    assert r.string() == "arm"
+    assert r.varint() == 0
+    assert [r.float32() for _ in range(8)] == [90, 3, 0, 1, 1, 0, 0, 5]
+    assert (r.varint(), r.boolean()) == (3, False)
+
+    # 插槽：颜色为有符号 int32，无暗色时写 -1，附件为常量池索引 + 1
+    assert r.varint() == 2
+    assert (r.string(), r.varint(), r.int32(), r.int32(), r.varint(), r.varint()) == ("s0", 0, -1, -1, 1, 0)
+    assert (r.string(), r.varint(), r.int32(), r.int32(), r.varint(), r.varint()) == \
+        ("s1", 1, 0xFF000080 - (1 << 32), 0x102030, 0, 0)
+
+    # ik / transform / path / 默认皮肤 / 其他皮肤
+    assert [r.varint() for _ in range(5)] == [0, 0, 0, 0, 0]
+
+    # 事件定义：int 按 zigzag 写出
+    assert r.varint() == 1
+    assert r.varint() == 2
+    assert r.varint(False) == -3
+    assert r.float32() == 0
+    assert r.string() == ""
+    assert r.string() is None
+
+    # 动画
+    assert r.varint() == 1
+    assert r.string() == "anim"
+    assert r.varint() == 0  # 插槽时间轴
+    assert (r.varint(), r.varint(), r.varint(), r.byte()) == (1, 1, 1, SkelExporter.BONE_ROTATE)
+    assert r.varint() == 4
+    start = r.pos
+    assert (r.float32(), r.float32()) == (0, 0)
+    assert r.take(17) == b'\x02' + struct.pack('>4f', 0.25, 0, 0.75, 1)
+    assert (r.float32(), r.float32(), r.byte()) == (0.5, 45, SkelExporter.CURVE_STEPPED)
+    assert (r.float32(), r.float32(), r.byte()) == (0.75, 60, SkelExporter.CURVE_LINEAR)
+    # 最后一帧没有曲线
+    assert (r.float32(), r.float32()) == (1, 90)
+    assert r.pos - start == 8 + 17 + 9 + 9 + 8
+    assert [r.varint() for _ in range(4)] == [0, 0, 0, 0]  # ik / transform / path / deform
+
+    # 绘制顺序：插槽索引与偏移都按 readInt(true) 写出，负偏移占 5 字节
+    assert r.varint() == 1
+    assert r.float32() == 0.5
+    assert r.varint() == 2
+    assert r.take(6) == b'\x01' + b'\xff\xff\xff\xff\x0f'
+    assert (r.varint(), r.varint()) == (0, 1)
+
+    # 事件时间轴：未覆盖的 int 取事件定义的值
+    assert r.varint() == 1
+    assert (r.float32(), r.varint(), r.varint(False), r.float32(), r.boolean()) == (0.25, 0, -3, 0, False)
+    assert r.pos == len(data)
+
+
+def test_rejects_other_versions():
+    with pytest.raises(ValueError):
+        SkelExporter(dict(SKELETON, skeleton={"spine": "4.0.1"})).export()
@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import work_queue
+from work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with WorkQueue(path) as queue:
+        queue.enqueue([("small", 1), ("big", 100), ("mid", 50)])
+    return path
+
+
+def test_claims_largest_first_and_never_twice(queue_path):
+    with WorkQueue(queue_path) as a, WorkQueue(queue_path) as b:
+        assert a.claim("a") == ("big", 1)
+        assert b.claim("b") == ("mid", 1)
+        assert a.claim("a") == ("small", 1)
+        assert b.claim("b") is None
+        assert a.counts() == {"running": 3}
+
+
+def test_concurrent_claimers_get_distinct_items(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with WorkQueue(path) as queue:
+        queue.enqueue([(f"f{i}", i) for i in range(60)])
+    claimed = {}
+
+    def claimer(name):
+        with WorkQueue(path) as queue:
+            claimed[name] = []
+            while True:
+                job = queue.claim(name)
+                if job is None:
+                    return
+                claimed[name].append(job[0])
+
+    threads = [threading.Thread(target=claimer, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    items = sum(claimed.values(), [])
+    assert len(items) == 60
+    assert sorted(items) == sorted(f"f{i}" for i in range(60))
+
+
+def test_expired_lease_is_reclaimed(queue_path):
+    with WorkQueue(queue_path, lease_seconds=0.05) as a, WorkQueue(queue_path) as b:
+        job = a.claim("a")
+        assert job == ("big", 1)
+        b.claim("b")
+        b.claim("b")
+        # 租约未过期时不会被其他进程领取
+        assert b.claim("b") is None
+        time.sleep(0.1)
+        assert b.claim("b") == ("big", 2)
+        # 原进程的续约和结果都不再生效
+        assert not a.renew(job, "a")
+        assert not a.complete(job, "a", [], 0.0)
+        assert b.complete(("big", 2), "b", ["big.json"], 0.0)
+        assert b.counts() == {"done": 1, "running": 2}
+
+
+def test_renewed_lease_is_not_reclaimed(queue_path):
+    with WorkQueue(queue_path, lease_seconds=0.2) as a, WorkQueue(queue_path) as b:
+        job = a.claim("a")
+        for _ in range(3):
+            time.sleep(0.1)
+            assert a.renew(job, "a")
+        b.claim("b")
+        b.claim("b")
+        assert b.claim("b") is None
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with WorkQueue(path, lease_seconds=0.01, max_attempts=2) as queue:
+        queue.enqueue([("crash", 1)])
+        assert queue.claim("a") == ("crash", 1)
+        time.sleep(0.02)
+        assert queue.claim("b") == ("crash", 2)
+        time.sleep(0.02)
+        assert queue.claim("c") is None
+        assert queue.counts() == {"failed": 1}
+        assert "2 次" in queue.failures()[0][1]
+
+
+def test_enqueue_requeues_failed_only(queue_path):
+    with WorkQueue(queue_path) as queue:
+        big, mid = queue.claim("a"), queue.claim("a")
+        queue.fail(big, "a", "bad", 0.0)
+        queue.complete(mid, "a", [], 0.0)
+        added, requeued = queue.enqueue([("big", 100), ("mid", 50), ("new", 5)])
+        assert (added, requeued) == (1, 1)
+        assert queue.counts() == {"pending": 3, "done": 1}
+
+
+@pytest.mark.parametrize("lease", [0, -5, float('nan')])
+def test_rejects_non_positive_lease(queue_path, lease):
+    import main
+    with pytest.raises(ValueError):
+        WorkQueue(queue_path, lease_seconds=lease)
+    with pytest.raises(ValueError, match="--lease"):
+        main.worker_process(queue_path, lease_seconds=lease)
+
+
+def test_run_worker_records_results(queue_path):
+    def convert(path):
+        if path == "mid":
+            raise ValueError("broken")
+        return [path + ".json"]
+
+    with WorkQueue(queue_path, lease_seconds=30) as queue:
+        assert work_queue.run_worker(queue, convert, worker="w") == (2, 1)
+        assert queue.counts() == {"done": 2, "failed": 1}
+        assert queue.failures() == [("mid", "broken")]
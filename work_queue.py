@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+SQLite 工作队列：一条命令把选出的 SCSP 文件写进队列数据库（--enqueue），
+任意数量的 main.py --worker 进程（同一台机器或共享该路径的多台机器）从中逐个领取文件转换，
+每个文件的状态、耗时、输出和错误都记录在数据库中，适合工作进程随时增减、文件耗时相差很大的转换任务
+
+  领取：在 BEGIN IMMEDIATE 事务中按文件大小从大到小（LPT）取一个待处理文件，同一文件不会被两个进程同时领取
+  租约：领取时设置租约到期时间，转换期间由心跳线程定期续约；进程崩溃后租约过期，文件由其他进程重新领取，
+        同一文件租约过期达到 max_attempts 次后记为失败，不再重试
+  转换出错的文件直接记为失败（解析错误重试也不会成功），再次 --enqueue 时重新排队
+
+状态：pending 待处理 / running 转换中 / done 完成 / failed 失败
+租约按各机器的系统时间比较，多台机器需要同步时钟；数据库所在文件系统需支持 SQLite 的文件锁
+"""
+import json
+import os
+import platform
+import sqlite3
+import threading
+import time
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+# 没有可领取的文件、但其他进程仍在转换时，等待其完成或租约过期的轮询间隔
+POLL_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    outputs TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_status ON files (status, bytes);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def worker_name():
+    """默认的工作进程标识：主机名:进程号"""
+    return f"{platform.node()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    一个数据库连接，只在创建它的线程中使用；每个事务都很短，并发进程之间靠 SQLite 的锁串行
+    领取到的任务为 (路径, 第几次领取)，续约、完成、失败都要求任务仍属于本进程的这次领取
+    """
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        # 租约不为正时心跳线程会空转，其他进程也会立即接管正在转换的文件
+        if not lease_seconds > 0:
+            raise ValueError(f"无效的租约秒数: {lease_seconds}，应大于 0")
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # isolation_level=None：由 transaction() 显式开始和结束事务
+        self.conn = sqlite3.connect(path, timeout=60.0, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def transaction(self):
+        """BEGIN IMMEDIATE 事务：开始时即取得写锁，读取和更新之间不会被其他进程插入"""
+        return _Transaction(self.conn)
+
+    def set_options(self, options):
+        """保存转换选项（输入目录、格式、精度等），各工作进程按同一套选项转换"""
+        with self.transaction():
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('options', ?)",
+                              (json.dumps(options, ensure_ascii=False),))
+
+    def options(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'options'").fetchone()
+        if row is None:
+            raise ValueError(f"队列中没有转换选项，请先用 --enqueue 写入文件: {self.path}")
+        return json.loads(row[0])
+
+    def enqueue(self, files):
+        """
+        写入待处理文件：新文件加入队列，之前失败的文件重新排队，已完成和转换中的文件不变
+        :param files: [(路径, 字节数)]
+        :return: (新加入数, 重新排队数)
+        """
+        with self.transaction():
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO files (path, bytes) VALUES (?, ?)", files)
+            added = self.conn.total_changes - before
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "UPDATE files SET status = 'pending', bytes = ?, attempts = 0, worker = NULL, lease_until = NULL,"
+                " error = NULL WHERE path = ? AND status = 'failed'",
+                [(size, path) for path, size in files])
+            requeued = self.conn.total_changes - before
+        return added, requeued
+
+    def claim(self, worker):
+        """
+        领取一个文件：优先最大的待处理文件，其次租约已过期的转换中文件
+        :return: (路径, 第几次领取)，没有可领取的文件时为 None
+        """
+        now = time.time()
+        with self.transaction():
+            # 崩溃次数过多的文件不再重试
+            self.conn.execute(
+                "UPDATE files SET status = 'failed', finished_at = ?,"
+                " error = '工作进程租约过期 ' || attempts || ' 次，放弃重试'"
+                " WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            row = self.conn.execute(
+                "SELECT path, attempts FROM files WHERE status = 'pending'"
+                " OR (status = 'running' AND lease_until < ?)"
+                " ORDER BY status = 'running', bytes DESC LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            path, attempts = row
+            self.conn.execute(
+                "UPDATE files SET status = 'running', attempts = ?, worker = ?, lease_until = ?, started_at = ?,"
+                " error = NULL WHERE path = ?",
+                (attempts + 1, worker, now + self.lease_seconds, now, path))
+        return path, attempts + 1
+
+    def _update_claimed(self, job, worker, assignments, values):
+        path, attempt = job
+        with self.transaction():
+            cursor = self.conn.execute(
+                f"UPDATE files SET {assignments} WHERE path = ? AND status = 'running' AND worker = ? AND attempts = ?",
+                (*values, path, worker, attempt))
+        return cursor.rowcount == 1
+
+    def renew(self, job, worker):
+        """续约，返回 False 表示租约已被其他进程接管"""
+        return self._update_claimed(job, worker, "lease_until = ?", (time.time() + self.lease_seconds,))
+
+    def complete(self, job, worker, outputs, seconds):
+        return self._update_claimed(job, worker, "status = 'done', finished_at = ?, seconds = ?, outputs = ?",
+                                    (time.time(), seconds, json.dumps(outputs, ensure_ascii=False)))
+
+    def fail(self, job, worker, error, seconds):
+        return self._update_claimed(job, worker, "status = 'failed', finished_at = ?, seconds = ?, error = ?",
+                                    (time.time(), seconds, error))
+
+    def counts(self):
+        """{状态: 文件数}"""
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM files GROUP BY status"))
+
+    def failures(self):
+        """[(路径, 错误信息)]"""
+        return self.conn.execute("SELECT path, error FROM files WHERE status = 'failed' ORDER BY path").fetchall()
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+
+
+def format_counts(counts):
+    return "，".join(f"{status} {counts.get(status, 0)}" for status in ('pending', 'running', 'done', 'failed'))
+
+
+class Heartbeat:
+    """转换一个文件期间，在后台线程中每隔租约的 1/3 续约一次（线程使用自己的数据库连接）"""
+    def __init__(self, queue, job, worker):
+        self.queue = queue
+        self.job = job
+        self.worker = worker
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        with WorkQueue(self.queue.path, self.queue.lease_seconds, self.queue.max_attempts) as queue:
+            while not self.stopped.wait(self.queue.lease_seconds / 3):
+                if not queue.renew(self.job, self.worker):
+                    print(f"租约已被其他工作进程接管: {self.job[0]}")
+                    return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_worker(queue, convert, worker=None, poll_seconds=POLL_SECONDS):
+    """
+    工作进程主循环：领取、转换、记录结果，直到队列中没有待处理和转换中的文件
+    :param convert: convert(路径) 转换一个文件，返回输出文件路径列表，出错时抛出异常
+    :return: (本进程完成数, 本进程失败数)
+    """
+    worker = worker or worker_name()
+    done = failed = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            if queue.counts().get('running'):
+                # 其他进程仍在转换：等待其完成，或租约过期后接手
+                time.sleep(poll_seconds)
+                continue
+            break
+        path, attempt = job
+        print(f"[{worker}] 领取: {path}" + (f"（第 {attempt} 次）" if attempt > 1 else ""))
+        start = time.perf_counter()
+        try:
+            with Heartbeat(queue, job, worker):
+                outputs = convert(path)
+        except Exception as e:
+            failed += 1
+            if not queue.fail(job, worker, str(e), time.perf_counter() - start):
+                print(f"租约已被其他工作进程接管，结果未记录: {path}")
+            print(f"[{worker}] 失败: {path}: {e}")
+            continue
+        done += 1
+        if not queue.complete(job, worker, outputs, time.perf_counter() - start):
+            print(f"租约已被其他工作进程接管，结果未记录: {path}")
+    return done, failed